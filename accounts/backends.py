@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'accounts:user:%s'
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY % user_id
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps session users in the cache.
+
+    Authentication itself is unchanged; get_user() — called once per request by
+    AuthenticationMiddleware (request.user is memoized for the rest of the request) — reads
+    the user from the cache and queries auth_user only on a miss. Saving or deleting a user
+    drops the cached copy (accounts.signals).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is not None:
+            return user if self.user_can_authenticate(user) else None
+
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+        return user
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+
+from .backends import forget_user
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Password, permission or is_active changes must not be served from a stale cached user."""
+    forget_user(instance.pk)
+
+
+def connect(user_model):
+    post_save.connect(invalidate_cached_user, sender=user_model, dispatch_uid='accounts_invalidate_user_save')
+    post_delete.connect(invalidate_cached_user, sender=user_model, dispatch_uid='accounts_invalidate_user_delete')
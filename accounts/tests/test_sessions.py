@@ -0,0 +1,63 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+CACHED_SESSIONS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTHENTICATION_BACKENDS': ['accounts.backends.CachedModelBackend', 'django.contrib.auth.backends.ModelBackend'],
+}
+
+
+@override_settings(**CACHED_SESSIONS)
+class CachedSessionQueriesTest(TestCase):
+    """Queries per authenticated page view: database sessions vs cached sessions and users."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def queries_per_request(self, url, requests=5):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(url)  # первый запрос заполняет кэш
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(requests):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx.captured_queries) / requests
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db',
+                       AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+    def test_database_sessions_baseline(self):
+        self.assertEqual(self.queries_per_request(reverse('home')), 2)
+
+    def test_cached_sessions_skip_session_and_user_queries(self):
+        self.assertEqual(self.queries_per_request(reverse('home')), 0)
+
+    def test_user_changes_invalidate_cache(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('home'))
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('home'))
+
+        self.user.set_password('newpass12345')
+        self.user.save()
+
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_sessions_of_model_backend_stay_valid(self):
+        # сессии, созданные до включения кэша, хранят путь ModelBackend
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('home'))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
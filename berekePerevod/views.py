@@ -1,12 +1,14 @@
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.shortcuts import render, redirect
 
 from django.contrib.auth.decorators import login_required
-from django.utils.dateparse import parse_date
 
+from bereke_perevod_api import jobs
+from bereke_perevod_api.filters import filter_certificates
 from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.pagination import InvalidCursor, keyset_page, wants_cursor_pagination
+from bereke_perevod_api.routers import replica_reads
 from bereke_perevod_api.serializers import CertCreateSerializer
 
 
@@ -29,8 +31,9 @@ def index(request):
         serializer = CertCreateSerializer(data=data)
 
         if serializer.is_valid():
-            serializer.save()
-            messages.success(request, "Сертификат успешно создан!")
+            # Сертификат собирается фоновым воркером, страница не ждёт генерации ключа
+            job = jobs.enqueue(serializer.validated_data, user=request.user)
+            messages.success(request, f"Сертификат поставлен в очередь (задача #{job.pk}).")
             return redirect('home')
         else:
             # Вывод ошибок сериализатора
@@ -41,49 +44,54 @@ def index(request):
     return render(request, 'berekePerevod/index.html')
 
 
+@replica_reads
 @login_required
 def detail(request):
-    page = int(request.GET.get('page', '1'))
     search_query = request.GET.get('search', '').strip()
     date_filter = request.GET.get('date', '').strip()
+    date_from = request.GET.get('date_from', '').strip()
+    date_to = request.GET.get('date_to', '').strip()
 
-    queryset = UploadedP12.objects.all()
+    # Поиск по имени файла (с учётом символов - _ . и пробелов) и фильтрация по дате загрузки
+    queryset = filter_certificates(UploadedP12.objects.metadata(), request.GET)
 
-    # Поиск по имени файла (с учётом символов - _ . и пробелов)
-    if search_query:
-        import re
-        normalized_search = re.sub(r'[-_.]', ' ', search_query).lower()
-        queryset = queryset.filter(
-            Q(filename__icontains=search_query) |
-            Q(filename__icontains=normalized_search)
-        )
-
-    # Фильтрация по дате загрузки
-    if date_filter:
-        parsed_date = parse_date(date_filter)
-        if parsed_date:
-            queryset = queryset.filter(uploaded_at__date=parsed_date)
-
-    queryset = queryset.order_by('-uploaded_at')
+    context = {
+        'search': search_query,
+        'date': date_filter,
+        'date_from': date_from,
+        'date_to': date_to,
+    }
 
     # Пагинация
     page_size = 5
-    paginator = Paginator(queryset, page_size)
-    page_obj = paginator.get_page(page)
-
-    return render(request, 'berekePerevod/view.html', {
-        'files': page_obj.object_list,
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
-        'search': search_query,
-        'date': date_filter,
-    })
+    if wants_cursor_pagination(request.GET):
+        # Курсорный режим: без COUNT(*) и OFFSET, номер страницы не показывается
+        try:
+            files, next_cursor, previous_cursor = keyset_page(queryset, request.GET.get('cursor'), page_size)
+        except InvalidCursor:
+            files, next_cursor, previous_cursor = keyset_page(queryset, None, page_size)
+        context.update({
+            'files': files,
+            'cursor_mode': True,
+            'next_cursor': next_cursor or '',
+            'previous_cursor': previous_cursor or '',
+        })
+    else:
+        paginator = Paginator(queryset, page_size)
+        page_obj = paginator.get_page(request.GET.get('page', '1'))
+        context.update({
+            'files': page_obj.object_list,
+            'current_page': page_obj.number,
+            'total_pages': paginator.num_pages,
+        })
+
+    return render(request, 'berekePerevod/view.html', context)
 
 
 @login_required
 def delete(request, pk):
     try:
-        file_obj = UploadedP12.objects.get(pk=pk)
+        file_obj = UploadedP12.objects.metadata().get(pk=pk)
         file_obj.delete()
         messages.success(request, 'Файл успешно удалён.')
     except UploadedP12.DoesNotExist:
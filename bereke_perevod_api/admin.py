@@ -1,18 +1,29 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import UploadedP12
+from .models import ApiToken, IssuanceJob, UploadedP12
 
 @admin.register(UploadedP12)
 class UploadedP12Admin(admin.ModelAdmin):
-    list_display = ('id', 'filename', 'uploaded_at', 'file_preview')
-    readonly_fields = ('uploaded_at', 'file_preview')
+    list_display = ('id', 'filename', 'subject_cn', 'subject_o', 'not_after', 'uploaded_at')
+    list_filter = ('key_algorithm', 'subject_c')
+    readonly_fields = ('uploaded_at', *UploadedP12.CERTIFICATE_FIELDS, 'file_preview')
     search_fields = ('filename',)
     ordering = ('-uploaded_at',)
 
+    def get_queryset(self, request):
+        # Содержимое файла подгружается отдельно только в форме редактирования (file_preview)
+        return super().get_queryset(request).metadata()
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск через индекс нормализованных имён вместо icontains по filename
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
     def file_preview(self, obj):
         # Попытка показать первые 300 символов файла как текст
         try:
-            content = obj.file_data.decode('utf-8')
+            content = obj.read_payload().decode('utf-8')
             preview = content[:300]
             if len(content) > 300:
                 preview += '...'
@@ -21,3 +32,30 @@ class UploadedP12Admin(admin.ModelAdmin):
             return "Cannot decode file content"
 
     file_preview.short_description = "File Preview"
+
+
+@admin.register(IssuanceJob)
+class IssuanceJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'result', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('spec', 'result', 'error', 'attempts', 'created_by', 'created_at', 'started_at', 'finished_at')
+    ordering = ('-id',)
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'name', 'user', 'created_at', 'expires_at', 'revoked_at', 'last_used_at')
+    list_filter = ('revoked_at',)
+    search_fields = ('prefix', 'name', 'user__username')
+    readonly_fields = ('prefix', 'created_at', 'last_used_at')
+    ordering = ('-created_at',)
+    actions = ['revoke_tokens']
+
+    def has_add_permission(self, request):
+        # Ключ показывается один раз при создании — токены выпускаются командой create_api_token
+        return False
+
+    @admin.action(description='Отозвать выбранные токены')
+    def revoke_tokens(self, request, queryset):
+        for token in queryset.filter(revoked_at__isnull=True):
+            token.revoke()
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class BerekePerevodApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bereke_perevod_api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import jobs, signals, sqlite
+
+        post_migrate.connect(signals.ensure_search_index, sender=self)
+        connection_created.connect(sqlite.apply_pragmas, dispatch_uid='bereke_sqlite_pragmas')
+
+        # Задачи, оставшиеся после перезапуска или поставленные другим процессом, подхватываются сразу
+        if jobs.should_start_worker():
+            jobs.get_worker().start()
@@ -1,5 +1,139 @@
-from rest_framework.authentication import SessionAuthentication
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import BasePermission
+
+from .models import ApiToken
+
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
     def enforce_csrf(self, request):
-        return
\ No newline at end of file
+        return
+
+
+class TokenCache:
+    """
+    Small in-process LRU of authenticated tokens with a TTL.
+
+    Maps the key digest to (user, token id, expires_at, cached_at). Revocation clears the entry
+    in the current process; other processes notice it once their entry expires (CERT_API_TOKEN_CACHE_TTL).
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key_hash):
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[-1] > self.ttl:
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return entry
+
+    def set(self, key_hash, user, token_id, expires_at):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (user, token_id, expires_at, time.monotonic())
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key_hash):
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache(
+                    maxsize=getattr(settings, 'CERT_API_TOKEN_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'CERT_API_TOKEN_CACHE_TTL', 60),
+                )
+    return _token_cache
+
+
+class ApiTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates `Authorization: Token <key>` (or `Bearer <key>`) against hashed ApiToken rows.
+
+    A cache hit costs one SHA-256 and a dictionary lookup; the database is queried (and
+    last_used_at updated) only on a cache miss.
+    """
+    keywords = (b'token', b'bearer')
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        # сравниваем байты: схема не в UTF-8 — просто не наш заголовок, а не 500
+        if not auth or auth[0].lower() not in self.keywords:
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Неверный заголовок токена.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed('Неверный заголовок токена.')
+        return self.authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        key_hash = ApiToken.hash_key(key)
+        cache = get_token_cache()
+        entry = cache.get(key_hash)
+        if entry is not None:
+            user, token_id, expires_at, _ = entry
+            if expires_at is None or expires_at > timezone.now():
+                return user, token_id
+            cache.discard(key_hash)
+            raise AuthenticationFailed('Срок действия токена истёк.')
+
+        token = ApiToken.objects.select_related('user').filter(key_hash=key_hash).first()
+        if token is None or token.revoked_at is not None:
+            raise AuthenticationFailed('Недействительный токен.')
+        if not token.is_valid:
+            raise AuthenticationFailed('Срок действия токена истёк.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('Пользователь неактивен.')
+
+        ApiToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        cache.set(key_hash, token.user, token.pk, token.expires_at)
+        return token.user, token.pk
+
+    def authenticate_header(self, request):
+        return 'Token'
+
+
+class MetricsAccess(BasePermission):
+    """
+    Access to /metrics: a scraper sends `Authorization: Bearer <METRICS_TOKEN>`; staff users
+    are always allowed. Without METRICS_TOKEN only staff users can read the metrics.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
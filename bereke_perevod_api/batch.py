@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from . import metrics
+from .certs import build_p12
+from .issuance import get_batch_backend
+from .models import CollectionVersion, UploadedP12
+from .retention import delete_orphaned_blobs
+from .serializers import CertCreateSerializer
+
+
+class BatchParseError(ValueError):
+    pass
+
+
+def parse_items(request):
+    """
+    Extracts certificate specs from a batch request.
+
+    Accepts a JSON array (or {"items": [...]}) in the body, or an uploaded `file`
+    in CSV (header row with field names) or NDJSON (one JSON object per line) format.
+    Returns a list where unparseable NDJSON lines are kept as BatchParseError instances.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        data = request.data
+        if isinstance(data, dict) and 'items' in data:
+            data = data['items']
+        if not isinstance(data, list):
+            raise BatchParseError('Ожидается массив сертификатов или файл (CSV/NDJSON).')
+        return list(data)
+
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise BatchParseError('Файл должен быть в кодировке UTF-8.')
+
+    name = (upload.name or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or text.lstrip().startswith('{'):
+        items = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                items.append(BatchParseError(f'Некорректная строка JSON: {exc}'))
+        return items
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def create_batch(items):
+    """
+    Validates every item up front, builds the valid ones in parallel and stores them
+    with bulk_create in chunked transactions.
+
+    Returns per-item results in input order: {"index", "status": "created", "id", "filename"}
+    or {"index", "status": "error", "errors"}.
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        if isinstance(item, BatchParseError):
+            results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': [str(item)]}}
+            continue
+        serializer = CertCreateSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    built = get_batch_backend().run_many(build_p12, [spec for _, spec in valid])
+
+    instances = []
+    for (index, spec), (result, exc) in zip(valid, built):
+        if exc is not None:
+            detail = getattr(exc, 'detail', None) or str(exc) or exc.__class__.__name__
+            results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': [str(detail)]}}
+            continue
+        p12_data, metadata = result
+        instances.append((index, CertCreateSerializer.build_instance(spec, p12_data, metadata)))
+
+    chunk_size = getattr(settings, 'CERT_BATCH_CHUNK_SIZE', 100)
+    for start in range(0, len(instances), chunk_size):
+        chunk = instances[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                UploadedP12.objects.bulk_create([instance for _, instance in chunk])
+                # bulk_create не отправляет post_save — версию списка обновляем сами
+                CollectionVersion.bump(CollectionVersion.CERTIFICATES)
+        except DatabaseError as exc:
+            for index, _ in chunk:
+                results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': [str(exc)]}}
+            # build_instance уже записал содержимое в хранилище — без строк оно осиротело
+            delete_orphaned_blobs([instance.blob_key for _, instance in chunk])
+            continue
+        metrics.CERTIFICATES_CREATED.inc(len(chunk), source='batch')
+        for index, instance in chunk:
+            results[index] = {'index': index, 'status': 'created', 'id': instance.pk, 'filename': instance.filename}
+
+    return results
@@ -0,0 +1,149 @@
+import datetime
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed448, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from cryptography.hazmat.backends import default_backend
+
+from .keypool import acquire_key
+from .timing import StageTimer
+
+
+# Поля subject, которые хранятся в отдельных колонках UploadedP12
+SUBJECT_FIELDS = {
+    'subject_cn': NameOID.COMMON_NAME,
+    'subject_o': NameOID.ORGANIZATION_NAME,
+    'subject_ou': NameOID.ORGANIZATIONAL_UNIT_NAME,
+    'subject_l': NameOID.LOCALITY_NAME,
+    'subject_st': NameOID.STATE_OR_PROVINCE_NAME,
+    'subject_c': NameOID.COUNTRY_NAME,
+}
+
+# max_length колонок UploadedP12: модуль не импортирует модели (выполняется в пуле процессов),
+# соответствие проверяет тест. Длиннее колонки значение не сохранится на PostgreSQL (DataError)
+SUBJECT_MAX_LENGTHS = {
+    'subject_cn': 255,
+    'subject_o': 255,
+    'subject_ou': 255,
+    'subject_l': 255,
+    'subject_st': 255,
+    'subject_c': 2,
+}
+
+
+def _key_algorithm(public_key):
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return 'RSA', public_key.key_size
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return 'EC', public_key.curve.key_size
+    if isinstance(public_key, dsa.DSAPublicKey):
+        return 'DSA', public_key.key_size
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return 'Ed25519', 256
+    if isinstance(public_key, ed448.Ed448PublicKey):
+        return 'Ed448', 456
+    return public_key.__class__.__name__[:16], None
+
+
+def certificate_metadata(cert):
+    """
+    Returns the X.509 fields stored as UploadedP12 columns: serial (hex), subject parts,
+    validity period (aware UTC), key algorithm and size, SHA-256 fingerprint (hex).
+    """
+    metadata = {}
+    for field, oid in SUBJECT_FIELDS.items():
+        values = cert.subject.get_attributes_for_oid(oid)
+        metadata[field] = str(values[0].value)[:SUBJECT_MAX_LENGTHS[field]] if values else ''
+    key_algorithm, key_size = _key_algorithm(cert.public_key())
+    metadata.update({
+        'serial_number': format(cert.serial_number, 'x'),
+        'not_before': cert.not_valid_before_utc,
+        'not_after': cert.not_valid_after_utc,
+        'key_algorithm': key_algorithm,
+        'key_size': key_size,
+        'fingerprint_sha256': cert.fingerprint(hashes.SHA256()).hex(),
+    })
+    return metadata
+
+
+def read_p12_metadata(p12_data, password):
+    """Decrypts a .p12 and returns certificate_metadata of its certificate; ValueError on a wrong password."""
+    _, cert, _ = pkcs12.load_key_and_certificates(
+        p12_data, password.encode() if password else None, backend=default_backend()
+    )
+    if cert is None:
+        raise ValueError('PKCS#12 does not contain a certificate')
+    return certificate_metadata(cert)
+
+
+def build_p12(spec):
+    """
+    Builds a self-signed certificate and packs it with its private key into PKCS#12 (.p12) bytes.
+
+    Returns (p12_data, metadata), where metadata is certificate_metadata of the new certificate.
+    `spec` is the validated data of CertCreateSerializer. The function does not touch the
+    database, so it can be run in a worker process of the issuance backend.
+    """
+    p12_data, metadata, _ = build_p12_timed(spec)
+    return p12_data, metadata
+
+
+def build_p12_timed(spec):
+    """Same as build_p12, plus {stage: seconds} of keygen, sign and pkcs12 measured where it ran."""
+    timer = StageTimer()
+
+    # Ключ из пула заранее сгенерированных ключей (в воркере пула процессов и при пустом пуле — генерация на месте)
+    with timer.stage('keygen'):
+        key = acquire_key()
+
+    # Данные владельца
+    subject = issuer = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, spec['country_code']),
+        x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, spec['region']),
+        x509.NameAttribute(NameOID.LOCALITY_NAME, spec['city']),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, spec['organization']),
+        x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, spec['department']),
+        x509.NameAttribute(NameOID.COMMON_NAME, spec['full_name']),
+    ])
+
+    expiration_days = spec['expiration']
+    with timer.stage('sign'):
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(subject)
+            .issuer_name(issuer)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(datetime.datetime.utcnow())
+            .not_valid_after(datetime.datetime.utcnow() + datetime.timedelta(days=expiration_days))
+            .sign(private_key=key, algorithm=hashes.SHA256(), backend=default_backend())
+        )
+
+    # Сборка PKCS#12 (.p12)
+    with timer.stage('pkcs12'):
+        p12_data = pkcs12.serialize_key_and_certificates(
+            name=spec['full_name'].encode(),
+            key=key,
+            cert=cert,
+            cas=None,
+            encryption_algorithm=serialization.BestAvailableEncryption(spec['password'].encode())
+        )
+    return p12_data, certificate_metadata(cert), timer.stages
+
+
+def parse_p12(item):
+    """
+    Reads certificate_metadata of an existing .p12, trying each password of `item` in turn.
+
+    `item` is (p12_data, passwords); an empty password also covers unencrypted files. Like
+    build_p12 it does not touch the database and can run in a worker process.
+    """
+    p12_data, passwords = item
+    for password in passwords:
+        try:
+            return read_p12_metadata(p12_data, password)
+        except ValueError:
+            continue
+    raise ValueError('Не удалось открыть PKCS#12: неверный пароль или повреждённый файл')
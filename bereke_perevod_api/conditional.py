@@ -0,0 +1,46 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import CollectionVersion
+
+
+def certificate_etag(cert):
+    """Strong ETag of a certificate payload (its SHA-256); None for legacy rows without a digest."""
+    return f'"{cert.sha256}"' if cert.sha256 else None
+
+
+def metadata_etag(cert):
+    """ETag of the certificate metadata returned by the detail endpoint."""
+    source = f'{cert.pk}:{cert.filename}:{cert.uploaded_at.isoformat()}:{cert.sha256}:{cert.fingerprint_sha256}'
+    return '"%s"' % hashlib.sha256(source.encode()).hexdigest()[:32]
+
+
+def listing_validators(request):
+    """
+    Returns (etag, last_modified) of a certificate listing page.
+
+    The ETag combines the collection version with the full URL (host, filters, page),
+    so it changes whenever a certificate is created, updated or deleted.
+    """
+    version, updated_at = CollectionVersion.current(CollectionVersion.CERTIFICATES)
+    source = f'{version}:{request.build_absolute_uri()}'
+    etag = '"v%d-%s"' % (version, hashlib.sha256(source.encode()).hexdigest()[:16])
+    return etag, updated_at
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """Returns a 304/412 response when the request preconditions allow it, otherwise None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # клиент может хранить ответ, но обязан перепроверять его через If-None-Match
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,154 @@
+import io
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header, http_date
+
+from .conditional import certificate_etag, not_modified
+from .storage import get_blob_storage
+
+P12_CONTENT_TYPE = 'application/x-pkcs12'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """
+    File wrapper limited to `length` bytes from the current position.
+
+    Keeps `fileno()` of the underlying file, so WSGI servers can still use sendfile:
+    they send Content-Length bytes starting from the current file offset.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Parses a single-range `Range` header.
+
+    Returns (start, end) inclusive, 'unsatisfiable', or None when the header should be ignored
+    (absent, malformed or multi-range — then the whole payload is served).
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if not length:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return 'unsatisfiable'
+    if end < start:
+        return None
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """A Range request is honoured only if If-Range (when sent) still matches the payload."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return etag is not None and if_range == etag
+    return last_modified is not None and if_range == http_date(last_modified.timestamp())
+
+
+def _payload_size(cert, payload):
+    if cert.size is not None:
+        return cert.size
+    if isinstance(payload, io.BytesIO):
+        return payload.getbuffer().nbytes
+    return os.fstat(payload.fileno()).st_size
+
+
+def _accel_response(cert, path):
+    """Hands the transfer over to the front proxy (nginx X-Accel-Redirect or Apache/lighttpd X-Sendfile)."""
+    mode = getattr(settings, 'CERT_DOWNLOAD_ACCEL', '')
+    if mode not in ('x-accel-redirect', 'x-sendfile'):
+        return None
+    response = HttpResponse(content_type=P12_CONTENT_TYPE)
+    if mode == 'x-accel-redirect':
+        storage = get_blob_storage()
+        relative = os.path.relpath(path, storage.location).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.CERT_DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + relative
+    else:
+        response['X-Sendfile'] = path
+    response['Content-Disposition'] = content_disposition_header(True, cert.filename)
+    return response
+
+
+def serve_payload(request, cert):
+    """
+    Builds the download response for a certificate.
+
+    File-backed payloads are either delegated to the front proxy (CERT_DOWNLOAD_ACCEL) or streamed
+    with FileResponse, which lets the WSGI server use `wsgi.file_wrapper`/sendfile. Single byte ranges
+    (`Range`, guarded by `If-Range`) are answered with 206 Partial Content; If-None-Match /
+    If-Modified-Since are answered with 304 before the payload is opened.
+    """
+    etag = certificate_etag(cert)
+    response = not_modified(request, etag, cert.uploaded_at)
+    if response is not None:
+        return response
+
+    if cert.blob_key:
+        path = get_blob_storage().path(cert.blob_key)
+        if path:
+            response = _accel_response(cert, path)
+            if response is not None:
+                return response
+
+    payload = cert.open_payload()
+    size = _payload_size(cert, payload)
+
+    byte_range = None
+    if request.method in ('GET', 'HEAD') and if_range_matches(request, etag, cert.uploaded_at):
+        byte_range = parse_range(request.headers.get('Range'), size)
+
+    if byte_range == 'unsatisfiable':
+        payload.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(payload, as_attachment=True, filename=cert.filename, content_type=P12_CONTENT_TYPE)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        payload.seek(start)
+        response = FileResponse(RangeFile(payload, end - start + 1), status=206, as_attachment=True,
+                                filename=cert.filename, content_type=P12_CONTENT_TYPE)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    response['Last-Modified'] = http_date(cert.uploaded_at.timestamp())
+    return response
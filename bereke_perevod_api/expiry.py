@@ -0,0 +1,78 @@
+import csv
+import datetime
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import UploadedP12
+
+REPORT_FIELDS = ('id', 'filename', 'subject_cn', 'subject_o', 'serial_number', 'not_after', 'fingerprint_sha256')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Максимальное окно отчёта в днях
+MAX_WITHIN_DAYS = 3650
+
+
+def expiring(within_days, now=None, queryset=None):
+    """
+    Certificates whose not_after falls in [now, now + within_days), soonest first.
+
+    A range scan of the (not_after, id) index; returns values() rows of REPORT_FIELDS.
+    Certificates without metadata (not backfilled yet) have no not_after and are not reported.
+    """
+    now = now or timezone.now()
+    queryset = UploadedP12.objects.all() if queryset is None else queryset
+    return (queryset
+            .filter(not_after__gte=now, not_after__lt=now + datetime.timedelta(days=within_days))
+            .order_by('not_after', 'id')
+            .values(*REPORT_FIELDS))
+
+
+def entered_window(last_id, previous_horizon, horizon, now):
+    """
+    Rows to report in an incremental scan: certificates added after `last_id` that expire before
+    `horizon`, plus older certificates whose not_after moved into [previous_horizon, horizon).
+    Both halves are index range scans (primary key and not_after), not a full table scan.
+    """
+    new_rows = Q(id__gt=last_id, not_after__gte=now, not_after__lt=horizon)
+    if previous_horizon is None:
+        return UploadedP12.objects.filter(new_rows)
+    entered = Q(id__lte=last_id, not_after__gte=max(previous_horizon, now), not_after__lt=horizon)
+    return UploadedP12.objects.filter(new_rows | entered)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(REPORT_FIELDS)
+    yield flush()
+    for row in rows:
+        writer.writerow([
+            row[field].isoformat() if isinstance(row[field], datetime.datetime) else row[field]
+            for field in REPORT_FIELDS
+        ])
+        yield flush()
+
+
+def render_lines(rows, output):
+    """Streams rows as NDJSON or CSV lines (output: 'ndjson' or 'csv')."""
+    return csv_lines(rows) if output == 'csv' else ndjson_lines(rows)
@@ -0,0 +1,74 @@
+import os
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ZipStream:
+    """
+    Write-only, unseekable sink for zipfile: collects written bytes until they are taken.
+
+    zipfile falls back to data descriptors for unseekable files, so entries can be written
+    without knowing their size in advance and the archive never has to be rewound.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def archive_name(cert, used):
+    """Filename inside the archive; duplicates get the certificate id appended."""
+    name = os.path.basename(cert.filename) or f'{cert.pk}.p12'
+    if name in used:
+        stem, ext = os.path.splitext(name)
+        name = f'{stem}-{cert.pk}{ext}'
+    used.add(name)
+    return name
+
+
+def export_queryset(queryset):
+    """Columns needed to write archive entries; payloads of legacy rows come with their chunk."""
+    return queryset.only('id', 'filename', 'uploaded_at', 'blob_key', 'file_data')
+
+
+def zip_certificates(queryset, chunk_size=None):
+    """
+    Yields a ZIP archive of the certificates in `queryset` piece by piece.
+
+    Rows are fetched with iterator(chunk_size) and each payload is copied from the blob storage
+    in READ_CHUNK_SIZE reads, so memory use does not depend on the number or size of files —
+    only the central directory (a few dozen bytes per entry) is kept until the end.
+    .p12 files are already encrypted, so entries are stored without compression.
+    """
+    chunk_size = chunk_size or getattr(settings, 'CERT_EXPORT_CHUNK_SIZE', 100)
+    stream = ZipStream()
+    used = set()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for cert in export_queryset(queryset).iterator(chunk_size=chunk_size):
+            info = zipfile.ZipInfo(archive_name(cert, used),
+                                   date_time=timezone.localtime(cert.uploaded_at).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with archive.open(info, mode='w', force_zip64=True) as entry, cert.open_payload() as payload:
+                while True:
+                    data = payload.read(READ_CHUNK_SIZE)
+                    if not data:
+                        break
+                    entry.write(data)
+                    yield stream.take()
+            yield stream.take()
+    yield stream.take()
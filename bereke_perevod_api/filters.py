@@ -0,0 +1,129 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# Параметры запроса, которые сужают список (ordering и пагинация не влияют на количество)
+FILTER_PARAMS = (
+    'search', 'date', 'date_from', 'date_to',
+    'organization', 'common_name', 'serial', 'fingerprint', 'key_algorithm', 'expires_before', 'expires_after',
+)
+
+# Фильтры-даты в формате YYYY-MM-DD
+DATE_FILTERS = ('date', 'date_from', 'date_to', 'expires_before', 'expires_after')
+
+# Точные фильтры по колонкам сертификата (параметр -> поле)
+EXACT_FILTERS = {
+    'organization': 'subject_o',
+    'common_name': 'subject_cn',
+    'key_algorithm': 'key_algorithm',
+}
+
+# ordering -> сортировка; id добавлен для стабильного порядка при равных значениях
+ORDERINGS = {
+    '-uploaded_at': ('-uploaded_at', '-id'),
+    'uploaded_at': ('uploaded_at', 'id'),
+    'not_after': ('not_after', 'id'),
+    '-not_after': ('-not_after', '-id'),
+    'subject_cn': ('subject_cn', 'id'),
+    '-subject_cn': ('-subject_cn', '-id'),
+}
+DEFAULT_ORDERING = '-uploaded_at'
+
+
+def parse_day(value):
+    """Parses YYYY-MM-DD; returns None for empty or invalid values."""
+    try:
+        return parse_date((value or '').strip())
+    except ValueError:
+        return None
+
+
+def filter_errors(params):
+    """
+    Strictly checks filters given as an object (bulk delete): returns {param: error} for unknown
+    parameters and for values that filter_certificates would silently ignore.
+    """
+    errors = {}
+    for name, value in params.items():
+        if name == 'ordering':
+            continue
+        if name not in FILTER_PARAMS:
+            errors[name] = 'Неизвестный фильтр.'
+        elif not isinstance(value, str) or not value.strip():
+            errors[name] = 'Ожидается непустая строка.'
+        elif name in DATE_FILTERS and parse_day(value) is None:
+            errors[name] = 'Ожидается дата в формате YYYY-MM-DD.'
+        elif name in ('serial', 'fingerprint') and not normalize_hex(value):
+            errors[name] = 'Ожидается шестнадцатеричное значение.'
+    return errors
+
+
+def normalize_hex(value):
+    """Lowercases a hex serial or fingerprint and drops ':' / spaces / a 0x prefix."""
+    value = (value or '').strip().lower().replace(':', '').replace(' ', '')
+    return value[2:] if value.startswith('0x') else value
+
+
+def day_start(day):
+    """Start of the day in the current time zone as an aware datetime."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filter_certificates(queryset, params):
+    """
+    Applies the common certificate list filters from query parameters and orders the result.
+
+    - search: filename search (see UploadedP12QuerySet.search)
+    - date: uploads of one day; date_from / date_to: inclusive range of days
+    - organization, common_name, key_algorithm: exact match on the certificate subject / key
+    - serial, fingerprint: hex, case and ':' insensitive
+    - expires_before / expires_after: not_after earlier than / not earlier than a day
+    - ordering: relevance (rank search matches) or one of ORDERINGS; newest uploads first by default
+
+    Dates become half-open ranges on uploaded_at and not_after, so the (uploaded_at DESC, id DESC)
+    and (not_after, id) indexes serve both the filter and the sort.
+    """
+    search = (params.get('search') or '').strip()
+    ranked = bool(search) and params.get('ordering') == 'relevance'
+
+    day = parse_day(params.get('date'))
+    if day:
+        queryset = queryset.filter(uploaded_at__gte=day_start(day),
+                                   uploaded_at__lt=day_start(day + datetime.timedelta(days=1)))
+
+    date_from = parse_day(params.get('date_from'))
+    if date_from:
+        queryset = queryset.filter(uploaded_at__gte=day_start(date_from))
+
+    date_to = parse_day(params.get('date_to'))
+    if date_to:
+        queryset = queryset.filter(uploaded_at__lt=day_start(date_to + datetime.timedelta(days=1)))
+
+    for param, field in EXACT_FILTERS.items():
+        value = (params.get(param) or '').strip()
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    serial = normalize_hex(params.get('serial'))
+    if serial:
+        queryset = queryset.filter(serial_number=serial.lstrip('0') or '0')
+
+    fingerprint = normalize_hex(params.get('fingerprint'))
+    if fingerprint:
+        queryset = queryset.filter(fingerprint_sha256=fingerprint)
+
+    expires_before = parse_day(params.get('expires_before'))
+    if expires_before:
+        queryset = queryset.filter(not_after__lt=day_start(expires_before))
+
+    expires_after = parse_day(params.get('expires_after'))
+    if expires_after:
+        queryset = queryset.filter(not_after__gte=day_start(expires_after))
+
+    if search:
+        queryset = queryset.search(search, ranked=ranked)
+    if not ranked:
+        ordering = ORDERINGS.get(params.get('ordering'), ORDERINGS[DEFAULT_ORDERING])
+        queryset = queryset.order_by(*ordering)
+    return queryset
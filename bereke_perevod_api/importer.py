@@ -0,0 +1,227 @@
+import csv
+import json
+import os
+import time
+import zipfile
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+
+from . import metrics
+from .certs import parse_p12
+from .issuance import get_batch_backend
+from .models import CollectionVersion, UploadedP12
+from .retention import delete_orphaned_blobs
+from .search import normalize_filename
+
+P12_EXTENSIONS = ('.p12', '.pfx')
+
+
+class P12ImportError(ValueError):
+    pass
+
+
+def load_password_map(path):
+    """Reads {id or filename: password} from a JSON object or a two-column CSV file."""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return parse_password_map(f.read())
+        return {row[0].strip(): row[1] for row in csv.reader(f) if len(row) >= 2}
+
+
+def parse_password_map(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise P12ImportError('Карта паролей должна быть JSON объектом {"имя файла": "пароль"}.')
+    return {str(key): str(value) for key, value in data.items()}
+
+
+def passwords_for(name, password_map, defaults):
+    """Passwords to try for a file: from the map (full name, then basename), defaults, then none."""
+    candidates = [password_map.get(name), password_map.get(os.path.basename(name)), *defaults, '']
+    return list(dict.fromkeys(p for p in candidates if p is not None))
+
+
+def _max_file_size():
+    return getattr(settings, 'CERT_IMPORT_MAX_FILE_SIZE', 1024 * 1024)
+
+
+def iter_zip(file):
+    """Yields (name, bytes or P12ImportError) for .p12/.pfx entries of a ZIP archive, one at a time."""
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(P12_EXTENSIONS):
+                continue
+            if info.file_size > _max_file_size():
+                yield info.filename, P12ImportError('Файл слишком большой для PKCS#12.')
+                continue
+            yield info.filename, archive.read(info)
+
+
+def iter_directory(path):
+    """Yields (relative name, bytes or P12ImportError) for .p12/.pfx files under a directory."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.lower().endswith(P12_EXTENSIONS):
+                continue
+            full_path = os.path.join(root, filename)
+            name = os.path.relpath(full_path, path)
+            if os.path.getsize(full_path) > _max_file_size():
+                yield name, P12ImportError('Файл слишком большой для PKCS#12.')
+                continue
+            with open(full_path, 'rb') as f:
+                yield name, f.read()
+
+
+def iter_path(path):
+    """Sources of a directory, a ZIP archive or a single .p12 file on disk."""
+    if os.path.isdir(path):
+        yield from iter_directory(path)
+    elif zipfile.is_zipfile(path):
+        yield from iter_zip(path)
+    else:
+        with open(path, 'rb') as f:
+            yield os.path.basename(path), f.read()
+
+
+def iter_uploads(uploads):
+    """Sources of uploaded files: ZIP archives are unpacked, anything else is taken as one .p12."""
+    for upload in uploads:
+        if zipfile.is_zipfile(upload):
+            upload.seek(0)
+            try:
+                yield from iter_zip(upload)
+            except zipfile.BadZipFile as exc:
+                yield upload.name, P12ImportError(f'Повреждённый ZIP архив: {exc}')
+        elif upload.size > _max_file_size():
+            upload.seek(0)
+            yield upload.name, P12ImportError('Файл слишком большой для PKCS#12.')
+        else:
+            upload.seek(0)
+            yield upload.name, upload.read()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_p12(sources, password_map=None, passwords=(), chunk_size=None):
+    """
+    Imports existing .p12 files given as (name, bytes) pairs.
+
+    Sources are consumed in chunks: each chunk is parsed in the batch backend (a process pool
+    by default), deduplicated by SHA-256 certificate fingerprint against the database and the
+    files seen so far, then inserted with bulk_create in one short transaction.
+    The unique fingerprint constraint catches certificates inserted by a concurrent import between
+    that check and the insert: the chunk is then retried row by row and such rows are reported
+    as duplicates.
+    Returns a report with counters, throughput, skipped duplicates and per-file errors.
+    """
+    password_map = password_map or {}
+    chunk_size = chunk_size or getattr(settings, 'CERT_BATCH_CHUNK_SIZE', 100)
+    report = {'processed': 0, 'imported': 0, 'duplicates': 0, 'failed': 0, 'skipped': [], 'errors': []}
+    seen = {}
+    started = time.monotonic()
+
+    for chunk in _chunks(sources, chunk_size):
+        _import_chunk(chunk, password_map, passwords, seen, report)
+
+    report['seconds'] = round(time.monotonic() - started, 3)
+    report['files_per_second'] = round(report['processed'] / report['seconds'], 1) if report['seconds'] else None
+    return report
+
+
+def _import_chunk(chunk, password_map, passwords, seen, report):
+    report['processed'] += len(chunk)
+
+    readable = []
+    for name, data in chunk:
+        if isinstance(data, Exception):
+            report['errors'].append({'file': name, 'error': str(data)})
+        else:
+            readable.append((name, data))
+
+    parsed = get_batch_backend().run_many(
+        parse_p12, [(data, passwords_for(name, password_map, passwords)) for name, data in readable]
+    )
+
+    candidates = []
+    for (name, data), (metadata, exc) in zip(readable, parsed):
+        if exc is not None:
+            report['errors'].append({'file': name, 'error': str(getattr(exc, 'detail', None) or exc)})
+        else:
+            candidates.append((name, data, metadata))
+
+    fingerprints = [metadata['fingerprint_sha256'] for _, _, metadata in candidates]
+    existing = dict(UploadedP12.objects.filter(fingerprint_sha256__in=fingerprints)
+                    .values_list('fingerprint_sha256', 'id'))
+
+    instances = []
+    for name, data, metadata in candidates:
+        fingerprint = metadata['fingerprint_sha256']
+        if fingerprint in existing or fingerprint in seen:
+            report['skipped'].append({'file': name, 'reason': 'duplicate',
+                                      'id': existing.get(fingerprint), 'duplicate_of': seen.get(fingerprint)})
+            continue
+        seen[fingerprint] = name
+        filename = os.path.basename(name)
+        instance = UploadedP12(filename=filename, filename_normalized=normalize_filename(filename), **metadata)
+        instance.set_payload(data)
+        instances.append((name, instance))
+
+    if instances:
+        try:
+            with transaction.atomic():
+                UploadedP12.objects.bulk_create([instance for _, instance in instances])
+                # bulk_create не отправляет post_save — версию списка обновляем сами
+                CollectionVersion.bump(CollectionVersion.CERTIFICATES)
+        except IntegrityError:
+            # параллельный импорт успел вставить часть этих сертификатов
+            imported = _insert_one_by_one(instances, report)
+        except DatabaseError as exc:
+            report['errors'].extend({'file': name, 'error': str(exc)} for name, _ in instances)
+            # содержимое уже записано в хранилище при set_payload — без строк оно осиротело
+            delete_orphaned_blobs([instance.blob_key for _, instance in instances])
+            imported = 0
+        else:
+            imported = len(instances)
+        report['imported'] += imported
+        if imported:
+            metrics.CERTIFICATES_CREATED.inc(imported, source='import')
+
+    report['duplicates'] = len(report['skipped'])
+    report['failed'] = len(report['errors'])
+
+
+def _insert_one_by_one(instances, report):
+    """Inserts rows separately after a unique conflict; conflicting rows are reported as duplicates."""
+    imported = 0
+    for name, instance in instances:
+        # откат bulk_create не сбрасывает уже присвоенные первичные ключи
+        instance.pk = None
+        instance._state.adding = True
+        try:
+            with transaction.atomic():
+                instance.save(force_insert=True)
+        except IntegrityError:
+            existing = (UploadedP12.objects.filter(fingerprint_sha256=instance.fingerprint_sha256)
+                        .values_list('id', flat=True).first())
+            report['skipped'].append({'file': name, 'reason': 'duplicate', 'id': existing, 'duplicate_of': None})
+            delete_orphaned_blobs([instance.blob_key])
+        except DatabaseError as exc:
+            report['errors'].append({'file': name, 'error': str(exc)})
+            delete_orphaned_blobs([instance.blob_key])
+        else:
+            imported += 1
+    return imported
@@ -0,0 +1,207 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class IssuanceBusy(APIException):
+    """All issuance slots are taken; the client should retry after `wait` seconds."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервис выпуска сертификатов перегружен, повторите запрос позже.'
+    default_code = 'issuance_busy'
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        # DRF exception handler turns `wait` into the Retry-After header
+        self.wait = wait
+
+
+class IssuanceTimeout(APIException):
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = 'Превышено время ожидания выпуска сертификата.'
+    default_code = 'issuance_timeout'
+
+
+class InlineBackend:
+    """Runs jobs in the calling thread."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def run(self, fn, *args, timeout=None):
+        return fn(*args)
+
+    def run_many(self, fn, items):
+        results = []
+        for item in items:
+            try:
+                results.append((fn(item), None))
+            except Exception as exc:
+                results.append((None, exc))
+        return results
+
+    def stats(self):
+        return {'backend': 'inline'}
+
+
+class ProcessPoolBackend:
+    """
+    Runs jobs in a shared ProcessPoolExecutor.
+
+    At most `max_pending` jobs (running plus queued) are accepted at a time; beyond that
+    `submit()` raises IssuanceBusy instead of growing the executor queue without bound.
+    A job that exceeds its timeout keeps its slot until the worker actually finishes it.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, timeout=30, retry_after=5):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending or self.max_workers * 2
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: воркеры не наследуют потоки и пул ключей родительского процесса
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def submit(self, fn, *args, block=False):
+        acquired = self._slots.acquire(timeout=self.timeout) if block else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise IssuanceBusy(wait=self.retry_after)
+        with self._lock:
+            self._pending += 1
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            self._release(None)
+            raise IssuanceBusy(wait=self.retry_after)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn, *args, timeout=None):
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise IssuanceTimeout()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise IssuanceBusy(wait=self.retry_after)
+
+    def run_many(self, fn, items):
+        """
+        Runs `fn` over `items` across the worker processes and returns (result, exception) pairs in order.
+
+        Unlike `submit()`, waits for a free slot instead of rejecting, so a batch fills the pool
+        without exceeding `max_pending`.
+        """
+        futures = []
+        for item in items:
+            try:
+                futures.append(self.submit(fn, item, block=True))
+            except Exception as exc:
+                futures.append(exc)
+        results = []
+        for future in futures:
+            if isinstance(future, Exception):
+                results.append((None, future))
+                continue
+            try:
+                results.append((future.result(timeout=self.timeout), None))
+            except FutureTimeoutError:
+                future.cancel()
+                results.append((None, IssuanceTimeout()))
+            except Exception as exc:
+                results.append((None, exc))
+        return results
+
+    def stats(self):
+        return {
+            'backend': 'process',
+            'workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': self._pending,
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_backend = None
+_batch_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name=None):
+    if (name or getattr(settings, 'CERT_ISSUANCE_BACKEND', 'inline')) == 'process':
+        return ProcessPoolBackend(
+            max_workers=getattr(settings, 'CERT_ISSUANCE_WORKERS', None),
+            max_pending=getattr(settings, 'CERT_ISSUANCE_MAX_PENDING', None),
+            timeout=getattr(settings, 'CERT_ISSUANCE_TIMEOUT', 30),
+            retry_after=getattr(settings, 'CERT_ISSUANCE_RETRY_AFTER', 5),
+        )
+    return InlineBackend()
+
+
+def get_issuance_backend():
+    """Returns the process-wide backend selected by CERT_ISSUANCE_BACKEND ('inline' or 'process')."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def get_batch_backend():
+    """
+    Returns the backend used for batch issuance.
+
+    Batches always spread over the worker processes unless CERT_BATCH_BACKEND is 'inline';
+    when the main backend is already a process pool, it is shared.
+    """
+    global _batch_backend
+    if getattr(settings, 'CERT_BATCH_BACKEND', 'process') != 'process':
+        return InlineBackend()
+    backend = get_issuance_backend()
+    if isinstance(backend, ProcessPoolBackend):
+        return backend
+    if _batch_backend is None:
+        with _backend_lock:
+            if _batch_backend is None:
+                _batch_backend = create_backend('process')
+    return _batch_backend
@@ -0,0 +1,217 @@
+import base64
+import datetime
+import hashlib
+import logging
+import os
+import sys
+import threading
+
+from cryptography.fernet import Fernet
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .issuance import IssuanceBusy
+from .models import IssuanceJob
+from .retention import delete_orphaned_blobs
+
+logger = logging.getLogger(__name__)
+
+SECRET_FIELDS = ('password', 'password2')
+
+
+def _fernet():
+    key = hashlib.sha256(('bereke-issuance-job:' + settings.SECRET_KEY).encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def enqueue(validated_data, user=None):
+    """Stores an issuance job for validated CertCreateSerializer data and wakes the worker."""
+    spec = {k: v for k, v in validated_data.items() if k not in SECRET_FIELDS}
+    job = IssuanceJob.objects.create(
+        spec=spec,
+        secret=_fernet().encrypt(validated_data['password'].encode()),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if getattr(settings, 'CERT_JOBS_INPROCESS_WORKER', False):
+        transaction.on_commit(lambda: get_worker().wake())
+    return job
+
+
+def claim_next():
+    """Atomically moves the oldest pending job to 'running'; returns None when the queue is empty."""
+    while True:
+        job_id = (IssuanceJob.objects.filter(status=IssuanceJob.STATUS_PENDING)
+                  .order_by('id').values_list('id', flat=True).first())
+        if job_id is None:
+            return None
+        claimed = IssuanceJob.objects.filter(pk=job_id, status=IssuanceJob.STATUS_PENDING).update(
+            status=IssuanceJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            # другой воркер мог забрать задачу раньше — тогда берём следующую
+            return IssuanceJob.objects.get(pk=job_id)
+
+
+def run_job(job):
+    """Builds and stores the certificate of a claimed job and records the outcome."""
+    from .serializers import CertCreateSerializer
+
+    cert = None
+    try:
+        # расшифровка внутри try: после смены SECRET_KEY (InvalidToken) задача падает, а не висит в running
+        password = _fernet().decrypt(bytes(job.secret)).decode()
+        spec = dict(job.spec, password=password, password2=password)
+        # ключ, подпись и запись blob — вне транзакции: с transaction_mode IMMEDIATE она держит
+        # блокировку записи SQLite, и остальные писатели ждали бы всю сборку .p12
+        serializer = CertCreateSerializer()
+        cert = serializer.build(spec)
+        with transaction.atomic():
+            serializer.store(cert)
+            job.status = IssuanceJob.STATUS_DONE
+            job.result = cert
+            job.secret = None
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'result', 'secret', 'finished_at'])
+    except IssuanceBusy:
+        # бэкенд перегружен — вернём задачу в очередь
+        IssuanceJob.objects.filter(pk=job.pk).update(status=IssuanceJob.STATUS_PENDING, started_at=None)
+        raise
+    except Exception as exc:
+        logger.exception("Issuance job %s failed", job.pk)
+        if cert is not None and cert.pk is None:
+            delete_orphaned_blobs([cert.blob_key])
+        job.status = IssuanceJob.STATUS_FAILED
+        job.error = str(exc) or exc.__class__.__name__
+        job.secret = None
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'secret', 'finished_at'])
+    return job
+
+
+def requeue_stale(timeout, max_attempts=None):
+    """
+    Returns to the queue jobs stuck in 'running' longer than `timeout` seconds (crashed worker).
+
+    A job that was already claimed `max_attempts` times (CERT_JOBS_MAX_ATTEMPTS) is marked failed
+    instead, so a job that kills its worker is not retried forever.
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'CERT_JOBS_MAX_ATTEMPTS', 3)
+    now = timezone.now()
+    stale = IssuanceJob.objects.filter(status=IssuanceJob.STATUS_RUNNING,
+                                       started_at__lt=now - datetime.timedelta(seconds=timeout))
+    stale.filter(attempts__gte=max_attempts).update(
+        status=IssuanceJob.STATUS_FAILED, error='Превышено число попыток выпуска.', secret=None, finished_at=now
+    )
+    return stale.filter(attempts__lt=max_attempts).update(status=IssuanceJob.STATUS_PENDING, started_at=None)
+
+
+def run_pending(limit=None):
+    """
+    Processes pending jobs until the queue is empty (or `limit` jobs are done). Returns the count.
+
+    Stops early when the issuance backend is busy: the job goes back to the queue and the caller
+    (JobWorker, run_issuance_worker) retries on its next poll instead of re-claiming it in a loop.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        try:
+            run_job(job)
+        except IssuanceBusy:
+            break
+        processed += 1
+    return processed
+
+
+class JobWorker:
+    """
+    Daemon thread that processes issuance jobs inside the web process.
+
+    It wakes up immediately when a job is enqueued in the same process and otherwise polls
+    the job table every `poll_interval` seconds, so jobs enqueued by other processes are picked up too.
+    """
+
+    def __init__(self, poll_interval=2.0, stale_timeout=300):
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Starts the thread now, and again in children forked from this process (gunicorn --preload)."""
+        self._ensure_started()
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def wake(self):
+        self._ensure_started()
+        self._wakeup.set()
+
+    def _restart_in_child(self):
+        # поток родителя не переживает fork: в дочернем процессе нужен свой
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='issuance-jobs', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            close_old_connections()
+            try:
+                requeue_stale(self.stale_timeout)
+                run_pending()
+            except Exception:
+                logger.exception("Issuance job worker iteration failed")
+            finally:
+                close_old_connections()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = JobWorker(
+                    poll_interval=getattr(settings, 'CERT_JOBS_POLL_INTERVAL', 2.0),
+                    stale_timeout=getattr(settings, 'CERT_JOBS_STALE_TIMEOUT', 300),
+                )
+    return _worker
+
+
+def should_start_worker(argv=None):
+    """
+    Whether this process runs the in-process job worker (CERT_JOBS_INPROCESS_WORKER): web servers
+    (gunicorn, `runserver` in its serving process) do, other management commands and test runs do not.
+    """
+    if not getattr(settings, 'CERT_JOBS_INPROCESS_WORKER', False):
+        return False
+    argv = sys.argv if argv is None else argv
+    program = os.path.basename(argv[0]) if argv else ''
+    if program.startswith(('pytest', 'py.test')):
+        return False
+    if program in ('manage.py', 'django-admin', '__main__.py'):
+        command = argv[1] if len(argv) > 1 else ''
+        # runserver с автоперезагрузкой: задачи выполняет только обслуживающий дочерний процесс
+        return command == 'runserver' and (os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv)
+    return True
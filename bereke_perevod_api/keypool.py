@@ -0,0 +1,143 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def generate_key(key_size=2048):
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size,
+        backend=default_backend()
+    )
+
+
+class KeyPool:
+    """
+    Bounded pool of pre-generated RSA private keys.
+
+    A daemon thread keeps the pool filled up to `target_size` keys. Callers take a key with
+    `acquire()`; when the pool is empty the key is generated inline, so a request never waits
+    for the refill thread. A pool with `target_size=0` is disabled and always generates inline.
+
+    Keys are never shared between processes: if the pool is used after a fork, the inherited
+    keys are dropped and the refill thread is restarted in the child.
+    """
+
+    def __init__(self, target_size, key_size=2048, idle_timeout=5.0):
+        self.target_size = max(int(target_size), 0)
+        self.key_size = key_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._keys = queue.Queue(maxsize=self.target_size or 1)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+
+    def acquire(self):
+        """Returns a fresh private key, taking it from the pool when one is available."""
+        self._ensure_worker()
+        try:
+            key = self._keys.get_nowait()
+            self.hits += 1
+        except queue.Empty:
+            key = generate_key(self.key_size)
+            self.misses += 1
+        self._wakeup.set()
+        return key
+
+    def fill(self, count=None):
+        """Synchronously tops the pool up (to `target_size` or by `count` keys)."""
+        self._ensure_worker(start=False)
+        if count is None:
+            count = self.target_size - self._keys.qsize()
+        for _ in range(max(count, 0)):
+            if not self._put(generate_key(self.key_size)):
+                break
+
+    def stats(self):
+        return {
+            'target_size': self.target_size,
+            'size': self._keys.qsize() if self.target_size else 0,
+            'key_size': self.key_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'generated': self.generated,
+            'worker_alive': bool(self._thread and self._thread.is_alive()),
+        }
+
+    def _put(self, key):
+        try:
+            self._keys.put_nowait(key)
+        except queue.Full:
+            return False
+        self.generated += 1
+        return True
+
+    def _ensure_worker(self, start=True):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+        if not start or not self.target_size:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='rsa-key-pool', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                while not self._keys.full():
+                    if not self._put(generate_key(self.key_size)):
+                        break
+            except Exception:
+                logger.exception("RSA key pool refill failed")
+            self._wakeup.wait(self.idle_timeout)
+            self._wakeup.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_key_pool():
+    """Returns the process-wide key pool configured by CERT_KEY_POOL_SIZE / CERT_KEY_SIZE."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = KeyPool(
+                    target_size=getattr(settings, 'CERT_KEY_POOL_SIZE', 0),
+                    key_size=getattr(settings, 'CERT_KEY_SIZE', 2048),
+                )
+    return _pool
+
+
+def acquire_key():
+    """
+    Returns a private key for one certificate.
+
+    The web process takes it from its key pool. Worker processes of the issuance backend generate
+    it inline: a pool there would start one more refill thread per worker, pre-generating
+    CERT_KEY_POOL_SIZE keys that compete with the certificates the worker is building.
+    """
+    if multiprocessing.parent_process() is not None:
+        return generate_key(getattr(settings, 'CERT_KEY_SIZE', 2048))
+    return get_key_pool().acquire()
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bereke_perevod_api.certs import read_p12_metadata
+from bereke_perevod_api.importer import P12ImportError, load_password_map
+from bereke_perevod_api.models import CollectionVersion, UploadedP12
+
+
+class Command(BaseCommand):
+    help = ("Fills the X.509 metadata columns (serial, subject, validity, key, fingerprint) of certificates "
+            "issued before they existed. Payloads are decrypted with the passwords provided.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--passwords',
+                            help='JSON object or CSV (key,password) mapping certificate id or filename to its password.')
+        parser.add_argument('--password', action='append', default=[],
+                            help='Password to try for every certificate (can be repeated).')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of payloads loaded into memory at a time.')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after processing this many rows.')
+
+    def passwords_for(self, row, password_map, defaults):
+        candidates = [password_map.get(str(row.pk)), password_map.get(row.filename)]
+        return [p for p in candidates if p is not None] + defaults
+
+    def handle(self, *args, **options):
+        try:
+            password_map = load_password_map(options['passwords']) if options['passwords'] else {}
+        except P12ImportError as exc:
+            raise CommandError(str(exc))
+        defaults = options['password']
+        if not password_map and not defaults:
+            raise CommandError('Provide --passwords and/or --password')
+
+        batch_size = options['batch_size']
+        limit = options['limit']
+        missing = UploadedP12.objects.filter(fingerprint_sha256='').order_by('id')
+
+        processed = updated = 0
+        failed = []
+        duplicates = []
+        last_id = 0
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            batch = list(missing.filter(id__gt=last_id).only('id', 'filename', 'file_data', 'blob_key')[:size])
+            if not batch:
+                break
+
+            rows = []
+            for row in batch:
+                for password in self.passwords_for(row, password_map, defaults):
+                    try:
+                        metadata = read_p12_metadata(row.read_payload(), password)
+                    except (ValueError, TypeError):
+                        continue
+                    for field, value in metadata.items():
+                        setattr(row, field, value)
+                    rows.append(row)
+                    break
+                else:
+                    failed.append(row.pk)
+
+            # копия уже учтённого сертификата: отпечаток уникален, запись остаётся без метаданных
+            taken = set(UploadedP12.objects.filter(fingerprint_sha256__in=[row.fingerprint_sha256 for row in rows])
+                        .values_list('fingerprint_sha256', flat=True))
+            unique_rows = []
+            for row in rows:
+                if row.fingerprint_sha256 in taken:
+                    duplicates.append(row.pk)
+                else:
+                    taken.add(row.fingerprint_sha256)
+                    unique_rows.append(row)
+            rows = unique_rows
+
+            if rows:
+                with transaction.atomic():
+                    UploadedP12.objects.bulk_update(rows, list(UploadedP12.CERTIFICATE_FIELDS))
+                    # bulk_update не отправляет post_save — версию списка обновляем сами
+                    CollectionVersion.bump(CollectionVersion.CERTIFICATES)
+
+            processed += len(batch)
+            updated += len(rows)
+            last_id = batch[-1].pk
+            self.stdout.write(f"Processed {processed} certificate(s), last id {last_id}")
+
+        if failed:
+            self.stderr.write(f"Could not decrypt {len(failed)} certificate(s): ids {', '.join(map(str, failed[:50]))}"
+                              + (' ...' if len(failed) > 50 else ''))
+        if duplicates:
+            self.stderr.write(f"Skipped {len(duplicates)} duplicate(s) of stored certificates: ids "
+                              f"{', '.join(map(str, duplicates[:50]))}" + (' ...' if len(duplicates) > 50 else ''))
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} of {processed} certificate(s) backfilled"))
@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from bereke_perevod_api.sqlite import PRODUCTION_PRAGMAS, pragma_statements
+
+# Профили сравнения: как сейчас (новое соединение на запрос, настройки SQLite по умолчанию)
+# и DB_PROFILE=production из config/settings.py (постоянное соединение, WAL и прагмы)
+PROFILES = {
+    'default': {'persistent': False, 'immediate': False, 'pragmas': {}},
+    'production': {'persistent': True, 'immediate': True, 'pragmas': PRODUCTION_PRAGMAS},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cert (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename VARCHAR(255) NOT NULL,
+    payload BLOB,
+    uploaded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cert_uploaded_idx ON cert (uploaded_at DESC, id DESC);
+"""
+
+
+def _connect(path, profile):
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for statement in pragma_statements(profile['pragmas']):
+        connection.execute(statement)
+    return connection
+
+
+def _worker(path, profile_name, seconds, write_ratio, seed, results):
+    profile = PROFILES[profile_name]
+    rng = random.Random(seed)
+    connection = _connect(path, profile) if profile['persistent'] else None
+    latencies, writes, errors = [], 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        conn = connection or _connect(path, profile)
+        try:
+            # «Запрос»: страница списка и, с вероятностью write_ratio, вставка сертификата
+            conn.execute('SELECT id, filename, uploaded_at FROM cert ORDER BY uploaded_at DESC, id DESC LIMIT 5').fetchall()
+            if rng.random() < write_ratio:
+                conn.execute('BEGIN IMMEDIATE' if profile['immediate'] else 'BEGIN')
+                conn.execute('SELECT COUNT(*) FROM cert WHERE uploaded_at > ?', (time.time() - 60,)).fetchone()
+                conn.execute('INSERT INTO cert (filename, payload, uploaded_at) VALUES (?, ?, ?)',
+                             (f'bench_{seed}.p12', os.urandom(2048), time.time()))
+                conn.execute('COMMIT')
+                writes += 1
+            latencies.append(time.monotonic() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+        finally:
+            if connection is None:
+                conn.close()
+    results.put((len(latencies), writes, errors, latencies))
+
+
+class Command(BaseCommand):
+    help = ("Concurrency benchmark of SQLite settings: several processes (like gunicorn workers) run "
+            "list reads and certificate inserts against a temporary database with the current default "
+            "configuration and with the DB_PROFILE=production profile.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent processes (default: 4).')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration per profile (default: 5).')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Share of requests that also insert a row (default: 0.2).')
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                            help='Profile to run (default: all).')
+
+    def run_profile(self, name, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            setup = _connect(path, PROFILES[name])
+            setup.executescript(SCHEMA)
+            setup.close()
+
+            context = multiprocessing.get_context('spawn')
+            results = context.Queue()
+            workers = [
+                context.Process(target=_worker, args=(path, name, options['seconds'], options['write_ratio'], i, results))
+                for i in range(options['workers'])
+            ]
+            for worker in workers:
+                worker.start()
+            collected = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+
+        requests = sum(r[0] for r in collected)
+        latencies = sorted(latency for r in collected for latency in r[3])
+        return {
+            'requests_per_second': requests / options['seconds'],
+            'writes_per_second': sum(r[1] for r in collected) / options['seconds'],
+            'errors': sum(r[2] for r in collected),
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        }
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'profile':<12}{'req/s':>10}{'writes/s':>10}{'locked':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        for name in options['profile'] or sorted(PROFILES):
+            result = self.run_profile(name, options)
+            self.stdout.write(
+                f"{name:<12}{result['requests_per_second']:>10.1f}{result['writes_per_second']:>10.1f}"
+                f"{result['errors']:>8}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            )
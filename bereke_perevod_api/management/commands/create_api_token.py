@@ -0,0 +1,34 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bereke_perevod_api.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "Issues an API token for a user and prints the key (it is not stored and cannot be shown again)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help='Description of the client using the token.')
+        parser.add_argument('--days', type=int, default=None,
+                            help='Expire the token after this many days (default: never).')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        expires_at = None
+        if options['days'] is not None:
+            if options['days'] <= 0:
+                raise CommandError('--days must be positive')
+            expires_at = timezone.now() + datetime.timedelta(days=options['days'])
+
+        token, key = ApiToken.issue(user, name=options['name'], expires_at=expires_at)
+        self.stderr.write(f"Token {token.prefix}… issued for {user}"
+                          + (f", expires {expires_at:%Y-%m-%d %H:%M}" if expires_at else ''))
+        self.stdout.write(key)
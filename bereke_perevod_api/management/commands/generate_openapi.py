@@ -0,0 +1,27 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bereke_perevod_api.schema import render_schema
+
+
+class Command(BaseCommand):
+    help = ("Writes the OpenAPI document as openapi.json / openapi.yaml with .gz copies, "
+            "to be collected by collectstatic and served by whitenoise.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=os.path.join(settings.BASE_DIR, 'config', 'static', 'schema'),
+                            help='Directory for the generated files (default: config/static/schema).')
+
+    def handle(self, *args, **options):
+        os.makedirs(options['output'], exist_ok=True)
+        for fmt, body in render_schema().items():
+            path = os.path.join(options['output'], f'openapi.{fmt}')
+            with open(path, 'wb') as f:
+                f.write(body)
+            # whitenoise отдаёт готовый .gz рядом с файлом клиентам с Accept-Encoding: gzip
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(body, compresslevel=9, mtime=0))
+            self.stdout.write(f"{path} ({len(body)} bytes)")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bereke_perevod_api.importer import P12ImportError, import_p12, iter_path, load_password_map
+
+
+class Command(BaseCommand):
+    help = ("Imports existing .p12/.pfx files from directories or ZIP archives: parses them in the batch "
+            "backend, skips certificates already stored (same SHA-256 fingerprint) and inserts the rest in batches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Directories, ZIP archives or .p12 files.')
+        parser.add_argument('--passwords',
+                            help='JSON object or CSV (filename,password) mapping file names to passwords.')
+        parser.add_argument('--password', action='append', default=[],
+                            help='Password to try for every file (can be repeated).')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Files parsed and inserted per transaction (default: CERT_BATCH_CHUNK_SIZE).')
+
+    def handle(self, *args, **options):
+        try:
+            password_map = load_password_map(options['passwords']) if options['passwords'] else {}
+        except (OSError, P12ImportError) as exc:
+            raise CommandError(str(exc))
+
+        def sources():
+            for path in options['paths']:
+                try:
+                    yield from iter_path(path)
+                except (OSError, ValueError) as exc:
+                    yield path, P12ImportError(str(exc))
+
+        report = import_p12(sources(), password_map=password_map, passwords=options['password'],
+                            chunk_size=options['chunk_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f"{error['file']}: {error['error']}")
+        for skipped in report['skipped']:
+            self.stdout.write(f"{skipped['file']}: duplicate of "
+                              f"{'id ' + str(skipped['id']) if skipped['id'] else skipped['duplicate_of']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {report['processed']} file(s) in {report['seconds']}s "
+            f"({report['files_per_second'] or 0} files/s): {report['imported']} imported, "
+            f"{report['duplicates']} duplicate(s), {report['failed']} failed"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bereke_perevod_api.models import UploadedP12
+
+
+class Command(BaseCommand):
+    help = "Moves .p12 payloads stored in UploadedP12.file_data to the blob storage in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of payloads loaded into memory at a time.')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after migrating this many rows.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        limit = options['limit']
+        legacy = UploadedP12.objects.filter(blob_key='', file_data__isnull=False).order_by('id')
+
+        migrated = 0
+        last_id = 0
+        while limit is None or migrated < limit:
+            size = batch_size if limit is None else min(batch_size, limit - migrated)
+            # Ключи пачки выбираются без содержимого, само содержимое — только для этой пачки
+            ids = list(legacy.filter(id__gt=last_id).values_list('id', flat=True)[:size])
+            if not ids:
+                break
+
+            rows = []
+            for row in UploadedP12.objects.filter(id__in=ids).only('id', 'file_data').order_by('id'):
+                row.set_payload(bytes(row.file_data))
+                rows.append(row)
+
+            with transaction.atomic():
+                UploadedP12.objects.bulk_update(rows, ['blob_key', 'size', 'sha256', 'file_data'])
+
+            migrated += len(rows)
+            last_id = ids[-1]
+            self.stdout.write(f"Migrated {migrated} payload(s), last id {last_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {migrated} payload(s) moved to the blob storage"))
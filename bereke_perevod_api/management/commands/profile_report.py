@@ -0,0 +1,88 @@
+import io
+import os
+import pstats
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bereke_perevod_api.profiling import profile_dir, read_records
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction + 0.5) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ("Summarizes the records of the request profiler (PROFILING_ENABLED): routes by total wall time, "
+            "repeated query patterns (N+1) and the slowest requests with a cProfile dump. "
+            "With --profile prints the top functions of one dump.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Profiler directory (default: PROFILING_DIR).')
+        parser.add_argument('--top', type=int, default=10, help='Rows per section (default: 10).')
+        parser.add_argument('--route', help='Only requests of this route (URL name).')
+        parser.add_argument('--profile', help='Print the top functions of this .prof file instead.')
+        parser.add_argument('--sort', choices=['cumulative', 'tottime', 'calls'], default='cumulative',
+                            help='Sort order of --profile (default: cumulative).')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or profile_dir()
+        if options['profile']:
+            return self.print_profile(directory, options['profile'], options['sort'], options['top'])
+
+        records = [record for record in read_records(directory)
+                   if not options['route'] or record['route'] == options['route']]
+        if not records:
+            self.stdout.write(f'No profiler records in {directory}.')
+            return
+        top = options['top']
+
+        by_route = {}
+        for record in records:
+            by_route.setdefault(record['route'], []).append(record)
+        routes = sorted(by_route.items(), key=lambda item: -sum(r['wall_ms'] for r in item[1]))
+
+        self.stdout.write(f'{len(records)} requests, {len(by_route)} routes\n')
+        self.stdout.write('Routes by total wall time')
+        self.stdout.write(f"{'route':<28}{'reqs':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+                          f"{'cpu ms':>9}{'queries':>9}{'max q':>7}{'dup q':>7}")
+        for route, items in routes[:top]:
+            walls = [r['wall_ms'] for r in items]
+            self.stdout.write(
+                f'{route[:27]:<28}{len(items):>7}{statistics.median(walls):>10.1f}{_percentile(walls, 0.95):>10.1f}'
+                f"{max(walls):>10.1f}{statistics.mean(r['cpu_ms'] for r in items):>9.1f}"
+                f"{statistics.mean(r['queries'] for r in items):>9.1f}{max(r['queries'] for r in items):>7}"
+                f"{statistics.mean(r['duplicate_queries'] for r in items):>7.1f}"
+            )
+
+        patterns = {}
+        for record in records:
+            for duplicate in record['duplicates']:
+                entry = patterns.setdefault(duplicate['sql'], {'requests': 0, 'extra': 0, 'max': 0, 'routes': set()})
+                entry['requests'] += 1
+                entry['extra'] += duplicate['count'] - 1
+                entry['max'] = max(entry['max'], duplicate['count'])
+                entry['routes'].add(record['route'])
+        if patterns:
+            self.stdout.write('\nRepeated query patterns (possible N+1)')
+            for sql, entry in sorted(patterns.items(), key=lambda item: -item[1]['extra'])[:top]:
+                self.stdout.write(
+                    f"{entry['extra']:>7} extra in {entry['requests']} requests (max {entry['max']}/request) "
+                    f"[{', '.join(sorted(entry['routes']))}]\n        {sql[:200]}"
+                )
+
+        profiled = sorted((r for r in records if r.get('profile')), key=lambda r: -r['wall_ms'])
+        if profiled:
+            self.stdout.write('\nSlowest profiled requests')
+            for record in profiled[:top]:
+                self.stdout.write(f"{record['wall_ms']:>10.1f} ms  {record['method']} {record['path']}  "
+                                  f"{record['profile']}")
+
+    def print_profile(self, directory, name, sort, top):
+        path = name if os.path.exists(name) else os.path.join(directory, name)
+        if not os.path.exists(path):
+            raise CommandError(f'Profile not found: {name}')
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(out.getvalue())
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bereke_perevod_api import retention
+
+
+class Command(BaseCommand):
+    help = ("Retention policy: deletes certificates uploaded more than N days ago in short batched "
+            "transactions, removes their orphaned blobs and runs an incremental VACUUM on SQLite.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, required=True, metavar='DAYS',
+                            help='Delete certificates uploaded more than DAYS days ago.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows deleted per transaction (default: CERT_DELETE_BATCH_SIZE).')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to let other writers through.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the certificates that would be deleted.')
+        parser.add_argument('--no-vacuum', action='store_true',
+                            help='Skip PRAGMA incremental_vacuum after deleting.')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Switch the SQLite database to auto_vacuum=INCREMENTAL first '
+                                 '(one-time full VACUUM that locks the database).')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1:
+            raise CommandError('--older-than must be at least 1 day')
+
+        if options['enable_incremental_vacuum'] and not options['dry_run']:
+            if retention.enable_incremental_vacuum():
+                self.stdout.write("SQLite auto_vacuum switched to INCREMENTAL")
+
+        queryset = retention.expired_retention(options['older_than'])
+        deleted = retention.delete_in_batches(queryset, batch_size=options['batch_size'],
+                                              pause=options['pause'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{deleted} certificate(s) would be deleted")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} certificate(s) uploaded more than {options['older_than']} day(s) ago"
+        ))
+
+        if deleted and not options['no_vacuum']:
+            if retention.incremental_vacuum():
+                self.stdout.write("Incremental VACUUM done")
+            else:
+                self.stdout.write("Incremental VACUUM skipped (database is not SQLite with auto_vacuum=INCREMENTAL)")
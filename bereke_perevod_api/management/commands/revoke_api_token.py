@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bereke_perevod_api.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "Revokes API tokens by key prefix, or all tokens of a user with --user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('prefix', nargs='?', help='First characters of the token key.')
+        parser.add_argument('--user', help='Revoke every active token of this username.')
+
+    def handle(self, *args, **options):
+        if not options['prefix'] and not options['user']:
+            raise CommandError('Specify a token prefix or --user')
+
+        tokens = ApiToken.objects.filter(revoked_at__isnull=True)
+        if options['prefix']:
+            tokens = tokens.filter(prefix=options['prefix'][:ApiToken.PREFIX_LENGTH])
+        if options['user']:
+            tokens = tokens.filter(user__username=options['user'])
+
+        revoked = 0
+        for token in tokens:
+            token.revoke()
+            revoked += 1
+        if not revoked:
+            raise CommandError('No active tokens matched')
+        self.stdout.write(f"Revoked {revoked} token(s)")
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bereke_perevod_api import jobs
+
+
+class Command(BaseCommand):
+    help = "Processes background certificate issuance jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the jobs that are currently pending and exit.')
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'CERT_JOBS_POLL_INTERVAL', 2.0),
+                            help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        stale_timeout = getattr(settings, 'CERT_JOBS_STALE_TIMEOUT', 300)
+        while True:
+            close_old_connections()
+            jobs.requeue_stale(stale_timeout)
+            processed = jobs.run_pending()
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s)")
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
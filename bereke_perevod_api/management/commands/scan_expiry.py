@@ -0,0 +1,68 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from bereke_perevod_api import expiry
+from bereke_perevod_api.models import ScanState, UploadedP12
+
+
+class Command(BaseCommand):
+    help = ("Reports certificates that entered the expiry window since the previous run. "
+            "Keeps a high-water mark (last examined id and expiry horizon) in ScanState, so each run "
+            "only examines new certificates and the newly covered range of expiry dates. "
+            "Run with --reset after backfill_cert_metadata to rescan older certificates.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--within', type=int, default=30,
+                            help='Expiry window in days from now (default: 30).')
+        parser.add_argument('--output', choices=sorted(expiry.CONTENT_TYPES), default='ndjson',
+                            help='Output format (default: ndjson).')
+        parser.add_argument('--file', help='Write the report to this file instead of stdout.')
+        parser.add_argument('--state', default='scan_expiry',
+                            help='Name of the ScanState row (separate schedules can keep separate marks).')
+        parser.add_argument('--reset', action='store_true',
+                            help='Forget the high-water mark and report the whole window.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print the report without advancing the high-water mark.')
+
+    def handle(self, *args, **options):
+        within = options['within']
+        if not 1 <= within <= expiry.MAX_WITHIN_DAYS:
+            raise CommandError(f'--within must be between 1 and {expiry.MAX_WITHIN_DAYS}')
+
+        now = timezone.now()
+        horizon = now + datetime.timedelta(days=within)
+        state, _ = ScanState.objects.get_or_create(name=options['state'])
+        if options['reset']:
+            state.last_id, state.horizon = 0, None
+
+        # Верхняя граница id фиксируется до выборки: строки, добавленные во время отчёта, попадут в следующий запуск
+        max_id = UploadedP12.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        rows = (expiry.entered_window(state.last_id, state.horizon, horizon, now)
+                .filter(id__lte=max_id)
+                .order_by('not_after', 'id')
+                .values(*expiry.REPORT_FIELDS)
+                .iterator(chunk_size=500))
+
+        count = 0
+        stream = open(options['file'], 'w', encoding='utf-8', newline='') if options['file'] else self.stdout
+        try:
+            for line in expiry.render_lines(rows, options['output']):
+                stream.write(line)
+                count += 1
+        finally:
+            if options['file']:
+                stream.close()
+        if options['output'] == 'csv':
+            count -= 1  # строка заголовка
+
+        message = f"{count} certificate(s) entered the {within}-day expiry window"
+        if options['dry_run']:
+            self.stderr.write(message + " (dry run, high-water mark unchanged)")
+            return
+        state.last_id = max(state.last_id, max_id)
+        state.horizon = max(state.horizon, horizon) if state.horizon else horizon
+        state.save()
+        self.stderr.write(f"{message}; high-water mark: id {state.last_id}, horizon {state.horizon:%Y-%m-%d %H:%M}")
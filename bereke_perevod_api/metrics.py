@@ -0,0 +1,404 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Границы корзин гистограмм в секундах
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Файл процесса: 8 байт — занятый размер, затем записи (длина ключа, ключ, выравнивание до 8, double)
+_USED = struct.Struct('<Q')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+
+
+def _entry_offsets(key_length):
+    """Returns (value offset, entry size) of an entry whose key has `key_length` bytes."""
+    value_offset = _KEY_LENGTH.size + key_length
+    value_offset += -value_offset % 8
+    return value_offset, value_offset + _VALUE.size
+
+
+def _read_entries(buffer, used):
+    position = _USED.size
+    while position < used:
+        (key_length,) = _KEY_LENGTH.unpack_from(buffer, position)
+        value_offset, size = _entry_offsets(key_length)
+        key = bytes(buffer[position + _KEY_LENGTH.size:position + _KEY_LENGTH.size + key_length]).decode()
+        yield key, position + value_offset, _VALUE.unpack_from(buffer, position + value_offset)[0]
+        position += size
+
+
+class MmapStore:
+    """
+    Samples of one process in a memory-mapped file, summed with the files of other processes on scrape.
+
+    Only the owning process writes the file, so a thread lock is enough. A new entry is written
+    before the used size in the header is advanced, and values are aligned 8-byte doubles, so a
+    concurrent reader never sees a partial entry.
+    """
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        capacity = max(os.fstat(self._file.fileno()).st_size, self.initial_size)
+        self._map(capacity)
+        self._used = _USED.unpack_from(self._mmap, 0)[0] or _USED.size
+        _USED.pack_into(self._mmap, 0, self._used)
+        self._positions = {key: position for key, position, _ in _read_entries(self._mmap, self._used)}
+
+    def _map(self, capacity):
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._mmap = mmap.mmap(self._file.fileno(), capacity)
+
+    def _position(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        value_offset, size = _entry_offsets(len(encoded))
+        if self._used + size > self._capacity:
+            self._mmap.close()
+            self._map(max(self._capacity * 2, self._used + size))
+        _KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._mmap, self._used + value_offset, 0.0)
+        position = self._positions[key] = self._used + value_offset
+        self._used += size
+        _USED.pack_into(self._mmap, 0, self._used)
+        return position
+
+    def add(self, key, amount):
+        with self._lock:
+            position = self._position(key)
+            _VALUE.pack_into(self._mmap, position, _VALUE.unpack_from(self._mmap, position)[0] + amount)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    @staticmethod
+    def read(path):
+        """Returns {key: value} of a store file written by any process."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < _USED.size:
+            return {}
+        used = min(_USED.unpack_from(data, 0)[0], len(data))
+        return {key: value for key, _, value in _read_entries(data, used)}
+
+
+class MemoryStore:
+    """Per-process samples, used when METRICS_DIR is not set (a single process, tests)."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def close(self):
+        pass
+
+
+# Хранилища текущего процесса: 'sum' — счётчики и гистограммы, 'live' — gauge, которые
+# учитываются только для живых процессов (запросы в работе)
+_stores = {}
+_stores_pid = None
+_stores_lock = threading.Lock()
+
+
+def _store(mode):
+    global _stores_pid
+    pid = os.getpid()
+    store = _stores.get(mode) if _stores_pid == pid else None
+    if store is not None:
+        return store
+    with _stores_lock:
+        if _stores_pid != pid:
+            # после fork файлы родителя не наследуются: у каждого воркера свои
+            _stores.clear()
+            _stores_pid = pid
+        if mode not in _stores:
+            directory = getattr(settings, 'METRICS_DIR', '')
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                _stores[mode] = MmapStore(os.path.join(directory, f'{mode}_{pid}.db'))
+            else:
+                _stores[mode] = MemoryStore()
+        return _stores[mode]
+
+
+@receiver(setting_changed)
+def _reset_stores(setting, **kwargs):
+    if setting == 'METRICS_DIR':
+        with _stores_lock:
+            for store in _stores.values():
+                store.close()
+            _stores.clear()
+
+
+def _sample_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False, separators=(',', ':'))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Returns {sample key: value} summed over all processes (or this process without METRICS_DIR)."""
+    directory = getattr(settings, 'METRICS_DIR', '')
+    if not directory:
+        totals = {}
+        for store in list(_stores.values()) if _stores_pid == os.getpid() else []:
+            for key, value in store.values().items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    totals = {}
+    for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        mode, _, rest = filename.partition('_')
+        pid = rest.removesuffix('.db')
+        if not filename.endswith('.db') or not pid.isdigit():
+            continue
+        if mode == 'live' and not _pid_alive(int(pid)):
+            continue
+        try:
+            values = MmapStore.read(os.path.join(directory, filename))
+        except FileNotFoundError:
+            continue
+        for key, value in values.items():
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+class Metric:
+    kind = None
+    mode = 'sum'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        REGISTRY[name] = self
+
+    def _add(self, name, amount, labels):
+        _store(self.mode).add(_sample_key(name, labels), amount)
+
+    def sample_names(self):
+        return (self.name,)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self._add(self.name, amount, labels)
+
+
+class Gauge(Metric):
+    """Gauge summed over live processes, e.g. requests in flight."""
+    kind = 'gauge'
+    mode = 'live'
+
+    def add(self, amount, **labels):
+        self._add(self.name, amount, labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        # корзины хранятся уже накопительными: наблюдение увеличивает все корзины с le >= value
+        for bound in self.buckets:
+            if value <= bound:
+                self._add(f'{self.name}_bucket', 1, {**labels, 'le': _format_float(bound)})
+        self._add(f'{self.name}_bucket', 1, {**labels, 'le': '+Inf'})
+        self._add(f'{self.name}_sum', value, labels)
+        self._add(f'{self.name}_count', 1, labels)
+
+    def sample_names(self):
+        return (f'{self.name}_bucket', f'{self.name}_sum', f'{self.name}_count')
+
+    def snapshot(self, label):
+        """
+        Series of the histogram grouped by the value of `label` (other labels are summed), over all
+        processes like render(): {value: {'buckets': [(bound, cumulative count), ...], 'count', 'sum'}}.
+        """
+        series = {}
+        for key, value in collect().items():
+            name, labels = json.loads(key)
+            if name not in self.sample_names():
+                continue
+            labels = dict(labels)
+            data = series.setdefault(labels.get(label, ''), {'buckets': {}, 'count': 0, 'sum': 0.0})
+            if name == f'{self.name}_bucket':
+                data['buckets'][labels['le']] = data['buckets'].get(labels['le'], 0) + int(value)
+            elif name == f'{self.name}_count':
+                data['count'] += int(value)
+            else:
+                data['sum'] += value
+        for data in series.values():
+            counts = data['buckets']
+            data['buckets'] = [(bound, counts.get(_format_float(bound), 0)) for bound in (*self.buckets, float('inf'))]
+        return series
+
+    def empty_buckets(self, samples):
+        """
+        Zero buckets of the label sets in `samples` ({sample name: [(labels, value)]}) that no
+        observation has reached yet: observe() stores only the buckets it increments, while
+        Prometheus expects every bucket of a series (histogram_quantile needs the full set).
+        """
+        present = {tuple(map(tuple, labels)) for labels, _ in samples.get(f'{self.name}_bucket', [])}
+        missing = []
+        for labels, _ in samples.get(f'{self.name}_count', []):
+            for bound in self.buckets:
+                bucket = sorted([*map(tuple, labels), ('le', _format_float(bound))])
+                if tuple(bucket) not in present:
+                    missing.append(([list(item) for item in bucket], 0.0))
+        return missing
+
+
+REGISTRY = {}
+
+HTTP_REQUESTS = Counter('bereke_http_requests_total', 'HTTP requests by route, method and status code.')
+HTTP_REQUEST_DURATION = Histogram('bereke_http_request_duration_seconds', 'HTTP request latency by route.')
+HTTP_REQUESTS_IN_FLIGHT = Gauge('bereke_http_requests_in_flight', 'HTTP requests being processed.')
+DB_QUERIES = Counter('bereke_db_queries_total', 'Database queries executed by requests, by route.')
+DB_QUERY_SECONDS = Counter('bereke_db_query_seconds_total', 'Time spent in database queries, by route.')
+DB_QUERIES_PER_REQUEST = Histogram('bereke_db_queries_per_request', 'Database queries per request, by route.',
+                                   buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200))
+DOWNLOAD_BYTES = Counter('bereke_download_bytes_total', 'Bytes of streamed responses (downloads, exports), by route.')
+CERTIFICATES_CREATED = Counter('bereke_certificates_created_total', 'Certificates stored, by source.')
+ISSUANCE_STAGE_DURATION = Histogram('bereke_issuance_stage_seconds', 'Certificate issuance latency by stage.')
+
+
+def _format_float(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render():
+    """Text exposition format (0.0.4) of all registered metrics."""
+    samples = {}
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        rows = []
+        if metric.kind == 'histogram':
+            samples.setdefault(f'{metric.name}_bucket', []).extend(metric.empty_buckets(samples))
+        for order, name in enumerate(metric.sample_names()):
+            for labels, value in samples.get(name, []):
+                le = dict(labels).get('le')
+                group = [item for item in labels if item[0] != 'le']
+                bound = float('inf') if le == '+Inf' else float(le) if le is not None else 0.0
+                rows.append(((group, order, bound), name, labels, value))
+        for _, name, labels, value in sorted(rows, key=lambda row: row[0]):
+            label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+            value_text = str(int(value)) if value.is_integer() else repr(value)
+            lines.append(f'{name}{{{label_text}}} {value_text}' if label_text else f'{name} {value_text}')
+    return '\n'.join(lines) + '\n'
+
+
+def _count_bytes(content, route):
+    sent = 0
+    try:
+        for chunk in content:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        DOWNLOAD_BYTES.inc(sent, route=route)
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request metrics: count, latency, requests in flight, database queries and
+    their time, and bytes of streamed responses. Routes are URL names (`files`, `file-download`, ...),
+    so paths with ids do not create new series.
+
+    Latency and queries cover the view up to the returned response; the body of a streamed response
+    is only counted in bereke_download_bytes_total.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        queries = {'count': 0, 'seconds': 0.0}
+
+        def record_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries['count'] += 1
+                queries['seconds'] += time.perf_counter() - started
+
+        HTTP_REQUESTS_IN_FLIGHT.add(1)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.add(-1)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else '') or 'unmatched'
+        HTTP_REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+        HTTP_REQUEST_DURATION.observe(elapsed, route=route)
+        DB_QUERIES.inc(queries['count'], route=route)
+        DB_QUERY_SECONDS.inc(queries['seconds'], route=route)
+        DB_QUERIES_PER_REQUEST.observe(queries['count'], route=route)
+
+        if response.streaming and request.method != 'HEAD':
+            if response.has_header('Content-Length'):
+                # FileResponse отдаётся через wsgi.file_wrapper (sendfile) — тело не оборачиваем
+                DOWNLOAD_BYTES.inc(int(response['Content-Length']), route=route)
+            else:
+                response.streaming_content = _count_bytes(response.streaming_content, route)
+        return response
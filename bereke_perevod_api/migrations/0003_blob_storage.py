@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bereke_perevod_api', '0002_issuancejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedp12',
+            name='blob_key',
+            field=models.CharField(blank=True, db_index=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='uploadedp12',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadedp12',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='uploadedp12',
+            name='file_data',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:34
+
+import re
+
+from django.db import migrations, models
+
+from bereke_perevod_api.search import drop_search_index, install_search_index
+
+
+def normalize_filenames(apps, schema_editor):
+    UploadedP12 = apps.get_model('bereke_perevod_api', 'UploadedP12')
+    rows = []
+    for row in UploadedP12.objects.only('id', 'filename').iterator(chunk_size=1000):
+        row.filename_normalized = re.sub(r'[-_.\s]+', ' ', row.filename).strip().lower()
+        rows.append(row)
+        if len(rows) >= 1000:
+            UploadedP12.objects.bulk_update(rows, ['filename_normalized'])
+            rows = []
+    if rows:
+        UploadedP12.objects.bulk_update(rows, ['filename_normalized'])
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def remove_search_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bereke_perevod_api', '0004_collectionversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedp12',
+            name='filename_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(normalize_filenames, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bereke_perevod_api', '0005_filename_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedp12',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='uploadedp12_uploaded_id_idx'),
+        ),
+    ]
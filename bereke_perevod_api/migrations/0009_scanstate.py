@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bereke_perevod_api', '0008_certificate_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanState',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('last_id', models.PositiveBigIntegerField(default=0)),
+                ('horizon', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Состояние сканирования',
+                'verbose_name_plural': 'Состояния сканирования',
+            },
+        ),
+    ]
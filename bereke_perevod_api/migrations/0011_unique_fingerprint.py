@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def clear_duplicate_fingerprints(apps, schema_editor):
+    # Повторы, импортированные до ограничения, остаются, но без отпечатка: первая запись сохраняет его
+    UploadedP12 = apps.get_model('bereke_perevod_api', 'UploadedP12')
+    duplicates = (UploadedP12.objects.exclude(fingerprint_sha256='').values('fingerprint_sha256')
+                  .annotate(count=models.Count('id'), first_id=models.Min('id')).filter(count__gt=1))
+    for row in duplicates.iterator():
+        UploadedP12.objects.filter(fingerprint_sha256=row['fingerprint_sha256']).exclude(
+            id=row['first_id']).update(fingerprint_sha256='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bereke_perevod_api', '0010_payloadblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='uploadedp12',
+            constraint=models.UniqueConstraint(condition=models.Q(('fingerprint_sha256', ''), _negated=True),
+                                               fields=('fingerprint_sha256',),
+                                               name='uploadedp12_unique_fingerprint'),
+        ),
+    ]
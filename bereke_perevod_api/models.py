@@ -1,13 +1,272 @@
-from django.db import models
+import hashlib
+import io
+import secrets
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import search
+from .storage import get_blob_storage
+
+
+class UploadedP12QuerySet(models.QuerySet):
+    def metadata(self):
+        """Certificate rows without the .p12 payload — for listings, details and deletes."""
+        return self.defer('file_data')
+
+    def search(self, term, ranked=False):
+        """Indexed filename search, tolerant to -, _, . and spaces (see search.search)."""
+        return search.search(self, term, ranked=ranked)
+
 
 class UploadedP12(models.Model):
     filename = models.CharField(max_length=255)
-    file_data = models.BinaryField()  # содержимое псевдо-p12 файла
+    # Имя файла в нижнем регистре с заменой -, _, . на пробелы — по нему работает поисковый индекс
+    filename_normalized = models.CharField(max_length=255, blank=True, editable=False)
+    # Содержимое .p12 хранится в blob-хранилище (CERT_BLOB_STORAGE); file_data остаётся только
+    # у старых записей, пока их не перенесёт `manage.py migrate_blobs`
+    file_data = models.BinaryField(null=True, blank=True)
+    blob_key = models.CharField(max_length=128, blank=True, db_index=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Поля X.509 сертификата, извлечённые при выпуске (certs.certificate_metadata), — чтобы
+    # фильтровать и сортировать без расшифровки .p12. Старые записи заполняет backfill_cert_metadata
+    serial_number = models.CharField(max_length=64, blank=True, db_index=True)
+    subject_cn = models.CharField(max_length=255, blank=True, db_index=True)
+    subject_o = models.CharField(max_length=255, blank=True, db_index=True)
+    subject_ou = models.CharField(max_length=255, blank=True)
+    subject_l = models.CharField(max_length=255, blank=True)
+    subject_st = models.CharField(max_length=255, blank=True)
+    subject_c = models.CharField(max_length=2, blank=True)
+    not_before = models.DateTimeField(null=True, blank=True)
+    not_after = models.DateTimeField(null=True, blank=True)
+    key_algorithm = models.CharField(max_length=16, blank=True)
+    key_size = models.PositiveIntegerField(null=True, blank=True)
+    fingerprint_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+
+    CERTIFICATE_FIELDS = (
+        'serial_number', 'subject_cn', 'subject_o', 'subject_ou', 'subject_l', 'subject_st', 'subject_c',
+        'not_before', 'not_after', 'key_algorithm', 'key_size', 'fingerprint_sha256',
+    )
+
+    objects = UploadedP12QuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Сертификат'
         verbose_name_plural = 'Сертификаты'
+        indexes = [
+            # Фильтры по дате (полуоткрытые диапазоны) и сортировка -uploaded_at, -id
+            models.Index(fields=['-uploaded_at', '-id'], name='uploadedp12_uploaded_id_idx'),
+            # Фильтр и сортировка по сроку действия (expires_before/expires_after, ordering=not_after)
+            models.Index(fields=['not_after', 'id'], name='uploadedp12_not_after_id_idx'),
+        ]
+        constraints = [
+            # Один сертификат — одна запись, в том числе при параллельных импортах; пустой отпечаток —
+            # старые записи, ещё не прошедшие backfill_cert_metadata
+            models.UniqueConstraint(fields=['fingerprint_sha256'], condition=~models.Q(fingerprint_sha256=''),
+                                    name='uploadedp12_unique_fingerprint'),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    def save(self, *args, **kwargs):
+        self.filename_normalized = search.normalize_filename(self.filename)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'filename' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'filename_normalized'}
+        # file_data проверяется через __dict__, чтобы не подгружать отложенное поле
+        if self.__dict__.get('file_data') is not None and not self.blob_key:
+            self.set_payload(bytes(self.file_data))
+        super().save(*args, **kwargs)
+
+    def set_payload(self, data):
+        """Writes the payload to the blob storage and keeps only its key, size and digest."""
+        self.blob_key = get_blob_storage().save(data)
+        self.size = len(data)
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.file_data = None
+
+    def open_payload(self):
+        """Returns a binary file object with the .p12 payload."""
+        if self.blob_key:
+            return get_blob_storage().open(self.blob_key)
+        return io.BytesIO(bytes(self.file_data or b''))
+
+    def read_payload(self):
+        with self.open_payload() as payload:
+            return payload.read()
+
+
+class PayloadBlob(models.Model):
+    """
+    Payload row of DatabaseBlobStorage (bytea on PostgreSQL, BLOB on SQLite).
+
+    Lets several application hosts share payloads through the database instead of a local
+    directory; content-addressed by SHA-256 like LocalBlobStorage.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Содержимое сертификата'
+        verbose_name_plural = 'Содержимое сертификатов'
+
+    def __str__(self):
+        return self.key
+
+
+class IssuanceJob(models.Model):
+    """
+    Background certificate issuance job.
+
+    `spec` holds the validated CertCreateSerializer data without passwords; the certificate
+    password is kept encrypted in `secret` only until the job finishes.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    spec = models.JSONField()
+    secret = models.BinaryField(null=True, editable=False)
+    result = models.ForeignKey(UploadedP12, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL,
+                                   related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Задача выпуска'
+        verbose_name_plural = 'Задачи выпуска'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='issuancejob_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.pk} {self.spec.get("filename", "")} ({self.status})'
+
+
+class CollectionVersion(models.Model):
+    """
+    Version counter of a collection, bumped on every create/update/delete.
+
+    Used as a cheap validator (ETag/Last-Modified) of listings: one primary-key lookup
+    instead of querying and serializing the collection.
+    """
+    CERTIFICATES = 'certificates'
+
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Версия коллекции'
+        verbose_name_plural = 'Версии коллекций'
+
+    def __str__(self):
+        return f'{self.name} v{self.version}'
+
+    @classmethod
+    def bump(cls, name):
+        now = timezone.now()
+        if cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, version=1, updated_at=now)
+        except IntegrityError:
+            # строку только что создал параллельный запрос
+            cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+
+    @classmethod
+    def current(cls, name):
+        """Returns (version, updated_at); (0, None) for a collection that was never changed."""
+        row = cls.objects.filter(name=name).values_list('version', 'updated_at').first()
+        return row or (0, None)
+
+
+class ApiToken(models.Model):
+    """
+    API token for scripted clients (`Authorization: Token <key>`).
+
+    Only the SHA-256 digest of the key is stored: tokens are random 256-bit strings, so a fast
+    digest is enough and authentication does not pay for PBKDF2 like BasicAuthentication does.
+    `prefix` (the first characters of the key) identifies a token in the admin and in commands.
+    """
+    PREFIX_LENGTH = 8
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    prefix = models.CharField(max_length=PREFIX_LENGTH, db_index=True, editable=False)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'API-токен'
+        verbose_name_plural = 'API-токены'
+
+    def __str__(self):
+        return f'{self.prefix}… ({self.user})'
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, name='', expires_at=None):
+        """Creates a token and returns (token, key); the key is shown once and never stored."""
+        key = secrets.token_urlsafe(32)
+        token = cls.objects.create(user=user, name=name, prefix=key[:cls.PREFIX_LENGTH],
+                                   key_hash=cls.hash_key(key), expires_at=expires_at)
+        return token, key
+
+    def revoke(self):
+        self.revoked_at = timezone.now()
+        self.save(update_fields=['revoked_at'])
+
+    @property
+    def is_valid(self):
+        if self.revoked_at is not None:
+            return False
+        return self.expires_at is None or self.expires_at > timezone.now()
+
+
+class ScanState(models.Model):
+    """
+    High-water mark of an incremental scan (e.g. `manage.py scan_expiry`).
+
+    `last_id` is the largest UploadedP12 id already examined and `horizon` the upper bound of
+    not_after covered by the previous run, so the next run only looks at newer rows and at the
+    slice of expiry dates that entered the window since then.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    horizon = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Состояние сканирования'
+        verbose_name_plural = 'Состояния сканирования'
 
     def __str__(self):
-        return self.filename
\ No newline at end of file
+        return f'{self.name} (id > {self.last_id})'
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import DEFAULT_ORDERING, ORDERINGS
+from .models import CollectionVersion
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, obj):
+    payload = json.dumps([direction, obj.uploaded_at.isoformat(), obj.pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, uploaded_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        uploaded_at = parse_datetime(uploaded_at)
+        if direction not in ('n', 'p') or uploaded_at is None or not isinstance(pk, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    return direction, uploaded_at, pk
+
+
+def keyset_page(queryset, token, page_size):
+    """
+    Returns (rows, next_token, previous_token) of a newest-first page keyed on (uploaded_at, id).
+
+    Each page is one indexed range scan of page_size + 1 rows, so page N costs the same as page 1:
+    no COUNT(*) and no OFFSET. Tokens are opaque and None when there is no page in that direction.
+    """
+    queryset = queryset.order_by('-uploaded_at', '-id')
+    direction = 'n'
+    if token:
+        direction, uploaded_at, pk = decode_cursor(token)
+        if direction == 'n':
+            queryset = queryset.filter(Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=pk))
+        else:
+            queryset = queryset.filter(
+                Q(uploaded_at__gt=uploaded_at) | Q(uploaded_at=uploaded_at, id__gt=pk)
+            ).order_by('uploaded_at', 'id')
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'p':
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+    if direction == 'n':
+        next_token = encode_cursor('n', rows[-1]) if has_more else None
+        previous_token = encode_cursor('p', rows[0]) if token else None
+    else:
+        next_token = encode_cursor('n', rows[-1])
+        previous_token = encode_cursor('p', rows[0]) if has_more else None
+    return rows, next_token, previous_token
+
+
+def wants_cursor_pagination(params):
+    """
+    Keyset pagination is opt-in: ?pagination=cursor or a ?cursor= token. It follows the default
+    newest-first order, so other orderings (relevance, not_after, ...) keep page numbers.
+    """
+    if params.get('ordering') in ORDERINGS and params.get('ordering') != DEFAULT_ORDERING:
+        return False
+    if params.get('ordering') == 'relevance' and params.get('search'):
+        return False
+    return params.get('pagination') == 'cursor' or bool(params.get('cursor'))
+
+
+class KeysetPagination:
+    """DRF-style paginator around keyset_page: responds with next/previous links and results, without count."""
+    cursor_query_param = 'cursor'
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or settings.REST_FRAMEWORK['PAGE_SIZE']
+        self.next_token = None
+        self.previous_token = None
+        self.request = None
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        try:
+            rows, self.next_token, self.previous_token = keyset_page(
+                queryset, request.query_params.get(self.cursor_query_param), self.page_size
+            )
+        except InvalidCursor:
+            raise NotFound('Неверный курсор.')
+        return rows
+
+    def _link(self, token):
+        if token is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        url = replace_query_param(url, 'pagination', 'cursor')
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.next_token),
+            'previous': self._link(self.previous_token),
+            'results': data,
+        })
+
+
+def approximate_count(queryset, params, filtered):
+    """
+    Returns (count, approximate) for a filtered certificate list, cached per collection version.
+
+    An unfiltered count on PostgreSQL uses the planner estimate (pg_class.reltuples) instead of COUNT(*);
+    everything else is an exact COUNT(*) cached until the collection changes or the cache entry expires.
+    """
+    version, _ = CollectionVersion.current(CollectionVersion.CERTIFICATES)
+    key_source = json.dumps([version, sorted((k, v) for k, v in params.items() if k in filtered)])
+    key = 'certificates-count:' + hashlib.sha256(key_source.encode()).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    result = None
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not any(params.get(k) for k in filtered):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            result = (row[0], True)
+    if result is None:
+        result = (queryset.count(), False)
+
+    cache.set(key, result, getattr(settings, 'CERT_COUNT_CACHE_TIMEOUT', 60))
+    return result
@@ -0,0 +1,144 @@
+import cProfile
+import datetime
+import glob
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров IN (%s, %s, ...) разной длины — один и тот же шаблон запроса
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Сколько повторяющихся шаблонов сохранять в записи запроса
+TOP_DUPLICATES = 5
+
+
+def normalize_sql(sql):
+    """Query pattern: parameters are already placeholders, IN lists are collapsed to `IN (...)`."""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+def profile_dir():
+    return getattr(settings, 'PROFILING_DIR', '') or os.path.join(settings.BASE_DIR, 'var', 'profiles')
+
+
+def read_records(directory=None):
+    """Yields the request records written by ProfilingMiddleware (requests-<pid>.ndjson files)."""
+    for path in sorted(glob.glob(os.path.join(directory or profile_dir(), 'requests-*.ndjson'))):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # строка, которую воркер не успел дописать
+                    continue
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, their time and repeats of each query pattern."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.patterns = Counter()
+        self.exact = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.patterns[normalize_sql(sql)] += 1
+            try:
+                self.exact[(sql, repr(params))] += 1
+            except Exception:
+                pass
+
+    def duplicates(self):
+        """Repeated patterns as [(pattern, count)], most repeated first — the N+1 signature."""
+        return [(pattern, count) for pattern, count in self.patterns.most_common() if count > 1]
+
+    def identical(self):
+        """Number of executions that repeated an earlier query with the same parameters."""
+        return sum(count - 1 for count in self.exact.values())
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in request profiler (PROFILING_ENABLED).
+
+    For every request appends one JSON line to PROFILING_DIR/requests-<pid>.ndjson: route, status,
+    wall and CPU time, query count and time, repeated query patterns (N+1) and identical queries.
+    A PROFILING_SAMPLE_RATE share of requests runs under cProfile; when such a request takes longer
+    than PROFILING_SLOW_MS its stats are dumped to a .prof file next to the records
+    (`python -m pstats <file>`, `manage.py profile_report --profile <file>`).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = profile_dir()
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_MS', 500)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.1)
+        self.duplicate_threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 5)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile() if random.random() < self.sample_rate else None
+
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            if profiler is not None:
+                profiler.enable()
+                stack.callback(profiler.disable)
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+        cpu_ms = (time.thread_time() - cpu_started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else '') or 'unmatched'
+        duplicates = recorder.duplicates()
+        record = {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 3),
+            'cpu_ms': round(cpu_ms, 3),
+            'queries': recorder.count,
+            'query_ms': round(recorder.seconds * 1000, 3),
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'identical_queries': recorder.identical(),
+            'duplicates': [{'sql': pattern, 'count': count} for pattern, count in duplicates[:TOP_DUPLICATES]],
+            'profile': None,
+        }
+
+        if profiler is not None and wall_ms >= self.slow_ms:
+            name = '{}-{}-{}.prof'.format(re.sub(r'[^\w.-]', '_', route), int(time.time() * 1000), os.getpid())
+            profiler.dump_stats(os.path.join(self.directory, name))
+            record['profile'] = name
+        if duplicates and duplicates[0][1] >= self.duplicate_threshold:
+            logger.warning('%s %s: query repeated %d times (possible N+1): %s',
+                           request.method, request.path, duplicates[0][1], duplicates[0][0])
+
+        with open(os.path.join(self.directory, f'requests-{os.getpid()}.ndjson'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return response
@@ -0,0 +1,102 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import CollectionVersion, UploadedP12
+from .signals import bulk_operation
+from .storage import get_blob_storage
+
+
+def delete_orphaned_blobs(keys, using='default', saved_before=None):
+    """
+    Deletes the blobs among `keys` that no remaining certificate references.
+
+    Blobs saved again at or after `saved_before` (a UNIX timestamp) are kept, see BlobStorage.delete.
+    """
+    keys = {key for key in keys if key}
+    if not keys:
+        return 0
+    referenced = set(UploadedP12.objects.using(using).filter(blob_key__in=keys).values_list('blob_key', flat=True))
+    storage = get_blob_storage()
+    for key in keys - referenced:
+        storage.delete(key, saved_before=saved_before)
+    return len(keys - referenced)
+
+
+def delete_in_batches(queryset, batch_size=None, pause=0.0, dry_run=False):
+    """
+    Deletes the certificates of `queryset` in batches of `batch_size` rows and returns the count.
+
+    Each batch is its own short transaction, so the SQLite write lock is released between
+    batches (optionally for `pause` seconds) and other requests can write in between.
+    Per-row receivers are silenced: the collection version is bumped once per batch and
+    orphaned blobs are removed once the batch has committed.
+    """
+    batch_size = batch_size or getattr(settings, 'CERT_DELETE_BATCH_SIZE', 500)
+    using = queryset.db
+    queryset = queryset.order_by('id')
+
+    deleted = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list('id', 'blob_key')[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        if dry_run:
+            deleted += len(rows)
+            continue
+
+        ids = [pk for pk, _ in rows]
+        keys = [key for _, key in rows]
+        started = time.time()
+        with bulk_operation(), transaction.atomic(using=using):
+            # only(): коллектору удаления нужны только id и blob_key, а не содержимое старых записей
+            _, per_model = UploadedP12.objects.using(using).filter(id__in=ids).only('id', 'blob_key').delete()
+            count = per_model.get(UploadedP12._meta.label, 0)
+            CollectionVersion.bump(CollectionVersion.CERTIFICATES)
+            transaction.on_commit(lambda keys=keys, started=started: delete_orphaned_blobs(keys, using, started),
+                                  using=using)
+        deleted += count
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def expired_retention(days, now=None):
+    """Certificates uploaded more than `days` days ago."""
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=days)
+    return UploadedP12.objects.filter(uploaded_at__lt=cutoff)
+
+
+def incremental_vacuum(using='default', pages=None):
+    """
+    Returns free SQLite pages to the filesystem without a blocking full VACUUM.
+
+    Works only when the database uses auto_vacuum=INCREMENTAL (see enable_incremental_vacuum);
+    returns False for other databases or modes. PostgreSQL relies on autovacuum.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:
+            return False
+        cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})' if pages else 'PRAGMA incremental_vacuum')
+        cursor.fetchall()
+    return True
+
+
+def enable_incremental_vacuum(using='default'):
+    """One-time switch of an SQLite database to auto_vacuum=INCREMENTAL (runs a full, blocking VACUUM)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+    return True
@@ -0,0 +1,103 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import connections
+
+# Реплика, выбранная для текущего запроса (None — читать с primary), и признак записи в запросе
+_read_alias = contextvars.ContextVar('bereke_read_alias', default=None)
+_wrote = contextvars.ContextVar('bereke_wrote', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'db_primary'
+
+
+def replica_reads(view):
+    """Marks a function view as read-only: its safe-method requests may read from a replica."""
+    view.use_replica = True
+    return view
+
+
+def _uses_replica(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'use_replica', False) or getattr(view_class, 'use_replica', False)
+
+
+class ReplicaRouter:
+    """
+    Sends reads of replica-enabled requests to one of DATABASE_REPLICAS, everything else to 'default'.
+
+    Only requests routed by ReplicaRoutingMiddleware read from a replica; management commands,
+    background workers and reads inside a transaction on the primary always use 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections['default'].in_atomic_block:
+            return 'default'
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии primary, объекты из разных алиасов указывают на одни и те же строки
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes reads of read-only views (`use_replica = True` on the class or `@replica_reads`) to a replica.
+
+    Safe-method requests pick one replica for the whole request, so COUNT and page queries see the
+    same snapshot. A request that wrote to the database sets a short-lived cookie
+    (DATABASE_STICKY_SECONDS); while it is present the client reads from the primary and sees its
+    own creates and deletes despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrote_token = _wrote.set(False)
+        request._replica_alias = None
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(wrote_token)
+            token = getattr(request, '_replica_token', None)
+            if token is not None:
+                _read_alias.reset(token)
+
+        # FileResponse читает файл, а не базу; замена streaming_content сбросила бы file_to_stream
+        # и отключила бы отдачу через wsgi.file_wrapper (sendfile)
+        if (request._replica_alias and response.streaming
+                and getattr(response, 'file_to_stream', None) is None):
+            response.streaming_content = self._route_stream(response.streaming_content, request._replica_alias)
+        if wrote:
+            response.set_cookie(STICKY_COOKIE, '1', max_age=getattr(settings, 'DATABASE_STICKY_SECONDS', 5),
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if (not replicas or request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES
+                or not _uses_replica(view_func)):
+            return None
+        request._replica_alias = random.choice(replicas)
+        request._replica_token = _read_alias.set(request._replica_alias)
+        return None
+
+    @staticmethod
+    def _route_stream(content, alias):
+        # Потоковые ответы (экспорт, отчёт) читают строки уже после выхода из middleware
+        token = _read_alias.set(alias)
+        try:
+            yield from content
+        finally:
+            _read_alias.reset(token)
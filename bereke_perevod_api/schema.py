@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Certificate API",
+    default_version='v1',
+    description="API for managing .p12 certificates: upload, list, download, delete",
+    contact=openapi.Contact(email="support@example.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+CONTENT_TYPES = {
+    'json': 'application/json; charset=utf-8',
+    'yaml': 'application/yaml; charset=utf-8',
+}
+
+
+@dataclass(frozen=True)
+class SchemaDocument:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+_documents = None
+_documents_lock = threading.Lock()
+
+
+def generate_schema():
+    """Builds the public OpenAPI document without a request, so it does not depend on the host or user."""
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(API_INFO)
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema():
+    """Returns {'json': bytes, 'yaml': bytes} of the generated document."""
+    schema = generate_schema()
+    return {
+        'json': OpenAPICodecJson(validators=[]).encode(schema),
+        'yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def get_schema_documents():
+    """
+    Generated documents by format, built once per process.
+
+    drf_yasg introspects every view and its swagger_auto_schema on each generation; the schema
+    only changes with a deploy, so it is rendered on first use and then served from memory.
+    """
+    global _documents
+    if _documents is None:
+        with _documents_lock:
+            if _documents is None:
+                _documents = {
+                    fmt: SchemaDocument(body, gzip.compress(body, mtime=0), hashlib.sha256(body).hexdigest()[:32])
+                    for fmt, body in render_schema().items()
+                }
+    return _documents
+
+
+def reset_schema_documents():
+    global _documents
+    _documents = None
+
+
+def _document(fmt):
+    fmt = (fmt or '').lstrip('.')
+    if fmt not in CONTENT_TYPES:
+        raise Http404
+    return get_schema_documents()[fmt]
+
+
+def _accepts_gzip(request):
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+def _etag(request, format):
+    # у gzip-представления свой ETag: сильный валидатор обязан различать байты ответа
+    etag = _document(format).etag
+    return f'{etag}-gzip' if _accepts_gzip(request) else etag
+
+
+@condition(etag_func=_etag)
+def cached_schema(request, format):
+    """Serves the in-memory OpenAPI document (gzip when accepted) with an ETag per representation."""
+    fmt = format.lstrip('.')
+    document = _document(fmt)
+    if _accepts_gzip(request):
+        response = HttpResponse(document.gzipped, content_type=CONTENT_TYPES[fmt])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(document.body, content_type=CONTENT_TYPES[fmt])
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, max_age=300)
+    return response
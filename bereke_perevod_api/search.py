@@ -0,0 +1,132 @@
+import re
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+
+TABLE = 'bereke_perevod_api_uploadedp12'
+FTS_TABLE = 'bereke_perevod_api_uploadedp12_fts'
+TRGM_INDEX = 'uploadedp12_filename_trgm_idx'
+
+# FTS5 trigram tokenizer indexes only terms of at least 3 characters
+FTS_MIN_LENGTH = 3
+
+_fts_available = {}
+
+
+def normalize_filename(value):
+    """Lowercases a filename or search term and collapses -, _, . and whitespace into single spaces."""
+    return re.sub(r'[-_.\s]+', ' ', value or '').strip().lower()
+
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, filename_normalized) VALUES (new.id, new.filename_normalized);
+    END""",
+    f'{FTS_TABLE}_ad': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename_normalized)
+        VALUES ('delete', old.id, old.filename_normalized);
+    END""",
+    f'{FTS_TABLE}_au': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF filename_normalized ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename_normalized)
+        VALUES ('delete', old.id, old.filename_normalized);
+        INSERT INTO {FTS_TABLE}(rowid, filename_normalized) VALUES (new.id, new.filename_normalized);
+    END""",
+}
+
+
+def install_search_index(connection):
+    """
+    Creates the filename search index if it is missing: an FTS5 trigram table kept in sync by
+    triggers on SQLite, a pg_trgm GIN index on PostgreSQL.
+
+    Idempotent. SQLite drops triggers when a migration rebuilds the table, so this also runs
+    after every `migrate` (post_migrate) and rebuilds the FTS content when triggers were missing.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON {TABLE} USING gin (filename_normalized gin_trgm_ops)"
+            )
+        return
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        if TABLE not in existing:
+            return
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, TABLE)}
+        if 'filename_normalized' not in columns:
+            return
+        if FTS_TABLE not in existing:
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"filename_normalized, content='{TABLE}', content_rowid='id', tokenize='trigram')"
+                )
+            except Exception:
+                # SQLite без FTS5 или старше 3.34 (нет trigram) — поиск работает через LIKE
+                _fts_available.pop(connection.alias, None)
+                return
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing or FTS_TABLE not in existing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_available[connection.alias] = True
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+    _fts_available.pop(connection.alias, None)
+
+
+def sqlite_fts_available(using):
+    """Whether the FTS5 trigram index of filenames exists in this SQLite database (cached per alias)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    if using not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available[using] = cursor.fetchone() is not None
+    return _fts_available[using]
+
+
+def search(queryset, term, ranked=False):
+    """
+    Filters certificates whose normalized filename contains the normalized `term`.
+
+    On SQLite the match goes through the FTS5 trigram index; on PostgreSQL the LIKE predicate
+    is served by the pg_trgm GIN index. With `ranked=True` results are ordered by match quality:
+    filename prefix first, then word prefix, then any substring.
+    """
+    normalized = normalize_filename(term)
+    if not normalized:
+        return queryset
+
+    if len(normalized) >= FTS_MIN_LENGTH and sqlite_fts_available(queryset.db):
+        phrase = '"%s"' % normalized.replace('"', '""')
+        queryset = queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [phrase]
+        ))
+    else:
+        queryset = queryset.filter(filename_normalized__contains=normalized)
+
+    if ranked:
+        queryset = queryset.annotate(search_rank=Case(
+            When(filename_normalized__startswith=normalized, then=Value(0)),
+            When(filename_normalized__contains=' ' + normalized, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )).order_by('search_rank', '-uploaded_at', '-id')
+    return queryset
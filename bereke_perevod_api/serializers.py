@@ -1,15 +1,14 @@
-from cryptography import x509
-from cryptography.x509.oid import NameOID
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives.serialization import pkcs12
-from cryptography.hazmat.backends import default_backend
-import datetime
+import time
 
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
-from .models import UploadedP12
+from . import metrics
+from .certs import build_p12_timed
+from .issuance import get_issuance_backend
+from .models import IssuanceJob, UploadedP12
+from .search import normalize_filename
+from .timing import StageTimer
 
 
 class CertCreateSerializer(serializers.Serializer):
@@ -58,49 +57,44 @@ class CertCreateSerializer(serializers.Serializer):
         return data
 
     def create(self, validated_data):
-        # Генерация ключа
-        key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
-        )
-
-        # Данные владельца
-        subject = issuer = x509.Name([
-            x509.NameAttribute(NameOID.COUNTRY_NAME, validated_data['country_code']),
-            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, validated_data['region']),
-            x509.NameAttribute(NameOID.LOCALITY_NAME, validated_data['city']),
-            x509.NameAttribute(NameOID.ORGANIZATION_NAME, validated_data['organization']),
-            x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, validated_data['department']),
-            x509.NameAttribute(NameOID.COMMON_NAME, validated_data['full_name']),
-        ])
-
-        expiration_days = validated_data['expiration']
-        cert = (
-            x509.CertificateBuilder()
-            .subject_name(subject)
-            .issuer_name(issuer)
-            .public_key(key.public_key())
-            .serial_number(x509.random_serial_number())
-            .not_valid_before(datetime.datetime.utcnow())
-            .not_valid_after(datetime.datetime.utcnow() + datetime.timedelta(days=expiration_days))
-            .sign(private_key=key, algorithm=hashes.SHA256(), backend=default_backend())
-        )
-
-        # Сборка PKCS#12 (.p12)
-        p12_data = pkcs12.serialize_key_and_certificates(
-            name=validated_data['full_name'].encode(),
-            key=key,
-            cert=cert,
-            cas=None,
-            encryption_algorithm=serialization.BestAvailableEncryption(validated_data['password'].encode())
-        )
-
-        # Сохраняем в БД
-        return UploadedP12.objects.create(
-            filename=validated_data['filename'] + '.p12',
-            file_data=p12_data
-        )
+        return self.store(self.build(validated_data))
+
+    def build(self, validated_data):
+        """
+        Issues the certificate and writes its payload to the blob storage; returns the unsaved instance.
+        Holds no database transaction, so callers can keep the write transaction to store() alone.
+        """
+        # Время каждого этапа остаётся в self.timings (заголовок Server-Timing) и в гистограмме ISSUANCE_STAGE_DURATION
+        self.timings = timer = StageTimer()
+
+        # Генерация ключа, подпись и сборка .p12 выполняются бэкендом выпуска (в потоке или в пуле процессов)
+        started = time.perf_counter()
+        p12_data, metadata, stages = get_issuance_backend().run(build_p12_timed, dict(validated_data))
+        # dispatch — время вызова бэкенда сверх этапов внутри build_p12_timed (очередь, передача в процесс)
+        timer.stages.update(stages)
+        timer.add('dispatch', time.perf_counter() - started - sum(stages.values()))
+
+        # Сохраняем в БД вместе с полями сертификата (serial, subject, срок действия, ключ)
+        with timer.stage('blob'):
+            return self.build_instance(validated_data, p12_data, metadata)
+
+    def store(self, instance):
+        """Inserts a certificate returned by build() and records the issuance metrics."""
+        timer = self.timings
+        with timer.stage('db'):
+            instance.save()
+        for stage, seconds in timer.stages.items():
+            metrics.ISSUANCE_STAGE_DURATION.observe(seconds, stage=stage)
+        metrics.CERTIFICATES_CREATED.inc(source='single')
+        return instance
+
+    @staticmethod
+    def build_instance(validated_data, p12_data, metadata=None):
+        """Returns an unsaved UploadedP12 for a built .p12 (also used by batch creation with bulk_create)."""
+        filename = validated_data['filename'] + '.p12'
+        instance = UploadedP12(filename=filename, filename_normalized=normalize_filename(filename), **(metadata or {}))
+        instance.set_payload(p12_data)
+        return instance
 
 
 class UploadedP12Serializer(serializers.ModelSerializer):
@@ -114,16 +108,43 @@ class UploadedP12Serializer(serializers.ModelSerializer):
         - id: Unique identifier of the certificate
         - filename: Name of the uploaded certificate file (e.g., "user01.p12")
         - uploaded_at: Timestamp when the certificate was uploaded
+        - serial_number, subject_*, not_before, not_after, key_algorithm, key_size, fingerprint_sha256:
+          X.509 fields of the certificate (empty for certificates that were not backfilled yet)
         - file: URL to download the certificate (constructed dynamically)
     """
     file = serializers.SerializerMethodField()
 
     class Meta:
         model = UploadedP12
-        fields = ['id', 'filename', 'uploaded_at', 'file']
+        fields = ['id', 'filename', 'uploaded_at', *UploadedP12.CERTIFICATE_FIELDS, 'file']
 
     def get_file(self, obj):
         request = self.context.get('request')
         if request:
             return reverse('file-download', kwargs={'pk': obj.pk}, request=request)
         return None
+
+
+class IssuanceJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for representing background certificate issuance jobs.
+
+    Fields:
+        - id: Unique identifier of the job
+        - status: pending, running, done or failed
+        - result: ID of the created UploadedP12 once the job is done
+        - file: URL to download the certificate once the job is done
+        - error: Failure reason for failed jobs
+        - created_at / finished_at: Job timestamps
+    """
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IssuanceJob
+        fields = ['id', 'status', 'result', 'file', 'error', 'created_at', 'finished_at']
+
+    def get_file(self, obj):
+        request = self.context.get('request')
+        if request and obj.result_id:
+            return reverse('file-download', kwargs={'pk': obj.result_id}, request=request)
+        return None
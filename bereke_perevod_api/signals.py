@@ -0,0 +1,76 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import get_token_cache
+from .models import ApiToken, CollectionVersion, UploadedP12
+from .search import install_search_index
+from .storage import get_blob_storage
+
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_operation():
+    """
+    Silences the per-row certificate receivers below in the current thread.
+
+    The caller takes over their work: bumps the collection version once per transaction
+    and cleans up blobs for the whole batch (see retention.delete_in_batches).
+    """
+    previous = getattr(_bulk, 'active', False)
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = previous
+
+
+def in_bulk_operation():
+    return getattr(_bulk, 'active', False)
+
+
+@receiver(post_delete, sender=UploadedP12)
+def delete_orphaned_blob(sender, instance, using, **kwargs):
+    """
+    Removes the payload from the blob storage once no certificate references it.
+
+    A request that saves the same content after this deletion keeps the payload (see
+    BlobStorage.delete), even if its certificate row is not committed yet.
+    """
+    key = instance.blob_key
+    if not key or in_bulk_operation():
+        return
+    deleted_at = time.time()
+
+    def _delete():
+        if not UploadedP12.objects.using(using).filter(blob_key=key).exists():
+            get_blob_storage().delete(key, saved_before=deleted_at)
+
+    transaction.on_commit(_delete, using=using)
+
+
+@receiver(post_save, sender=UploadedP12)
+@receiver(post_delete, sender=UploadedP12)
+def bump_certificates_version(sender, **kwargs):
+    """Invalidates listing ETags; bulk operations that skip signals bump the version themselves."""
+    if in_bulk_operation():
+        return
+    CollectionVersion.bump(CollectionVersion.CERTIFICATES)
+
+
+@receiver(post_save, sender=ApiToken)
+@receiver(post_delete, sender=ApiToken)
+def forget_cached_token(sender, instance, **kwargs):
+    """Drops a revoked, changed or deleted token from this process's authentication cache."""
+    get_token_cache().discard(instance.key_hash)
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """Re-creates search triggers that SQLite drops when a migration rebuilds the certificates table."""
+    install_search_index(connections[using])
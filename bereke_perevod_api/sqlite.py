@@ -0,0 +1,44 @@
+from django.conf import settings
+
+# Прагмы профиля DB_PROFILE=production (config/settings.py) и benchmark_sqlite --profile production:
+# WAL — читатели не блокируют писателя, busy_timeout вместо немедленного "database is locked"
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # в KiB (отрицательное значение), т.е. 64 MiB
+    'temp_store': 'MEMORY',
+}
+
+# Прагмы, значения которых — ключевые слова, а не числа
+KEYWORD_PRAGMAS = {'journal_mode', 'synchronous', 'temp_store'}
+
+
+def pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ValueError(f'Invalid PRAGMA name: {name!r}')
+        if name in KEYWORD_PRAGMAS:
+            if not str(value).isalpha():
+                raise ValueError(f'Invalid value for PRAGMA {name}: {value!r}')
+            statements.append(f'PRAGMA {name} = {value}')
+        else:
+            statements.append(f'PRAGMA {name} = {int(value)}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    connection_created receiver: applies SQLITE_PRAGMAS to every new SQLite connection.
+
+    With CONN_MAX_AGE the connection and its page cache / mmap survive between requests,
+    so this runs once per worker connection rather than once per request.
+    """
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
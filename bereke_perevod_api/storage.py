@@ -0,0 +1,212 @@
+import datetime
+import functools
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Substr
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class BlobStorage:
+    """
+    Interface of certificate payload storages.
+
+    Payloads are addressed by the key returned from `save()`; storing the same bytes twice
+    may return the same key, so a key can be shared by several certificates.
+    """
+
+    def save(self, data):
+        raise NotImplementedError
+
+    def open(self, key):
+        raise NotImplementedError
+
+    def delete(self, key, saved_before=None):
+        """
+        Removes the payload. With `saved_before` (a UNIX timestamp) a payload saved again at or
+        after that moment is kept: a concurrent request is about to reference the same content.
+        """
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def path(self, key):
+        """Local filesystem path of the payload, or None if the storage is not file-based."""
+        return None
+
+
+class LocalBlobStorage(BlobStorage):
+    """
+    Content-addressed storage in a local directory.
+
+    The key is the SHA-256 hex digest of the payload. Files are sharded by the first
+    characters of the digest (`ab/cd/abcd…`) and written to a temporary file in the target
+    directory, fsynced and atomically renamed, so readers never see partial payloads.
+    """
+
+    def __init__(self, location, shard_depth=2, shard_width=2):
+        self.location = os.fspath(location)
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+
+    def path(self, key):
+        shards = [key[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return os.path.join(self.location, *shards, key)
+
+    def save(self, data):
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path(key)
+        try:
+            self._touch(path)
+            return key
+        except FileNotFoundError:
+            pass
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+            self._touch(path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key
+
+    @staticmethod
+    def _touch(path):
+        # mtime — время последнего сохранения, по тем же часам, что и saved_before в delete()
+        # (без явного времени ядро ставит грубую отметку, которая может оказаться раньше time.time())
+        now = time.time()
+        os.utime(path, (now, now))
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key, saved_before=None):
+        path = self.path(key)
+        try:
+            if saved_before is not None and os.path.getmtime(path) >= saved_before:
+                return
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+
+class DatabaseBlobStorage(BlobStorage):
+    """
+    Content-addressed storage in the PayloadBlob table, for deployments with several hosts.
+
+    Payloads are read back in `chunk_size` slices (SUBSTRING of the bytea/BLOB column), so a
+    download never holds more than one chunk in memory and seeks (Range requests) are cheap.
+    """
+
+    def __init__(self, using='default', chunk_size=256 * 1024):
+        self.using = using
+        self.chunk_size = chunk_size
+
+    def _rows(self):
+        from .models import PayloadBlob
+        return PayloadBlob.objects.using(self.using)
+
+    def save(self, data):
+        key = hashlib.sha256(data).hexdigest()
+        # created_at — время последнего сохранения: повторное сохранение защищает строку от delete(saved_before=...)
+        if self._rows().filter(key=key).update(created_at=timezone.now()):
+            return key
+        try:
+            with transaction.atomic(using=self.using):
+                self._rows().create(key=key, data=data, size=len(data))
+        except IntegrityError:
+            # то же содержимое только что сохранил параллельный запрос
+            pass
+        return key
+
+    def open(self, key):
+        size = self._rows().filter(key=key).values_list('size', flat=True).first()
+        if size is None:
+            raise FileNotFoundError(key)
+        return io.BufferedReader(DatabaseBlobFile(self, key, size), buffer_size=self.chunk_size)
+
+    def read_chunk(self, key, offset, length):
+        chunk = self._rows().filter(key=key).annotate(
+            chunk=Substr('data', offset + 1, length)
+        ).values_list('chunk', flat=True).first()
+        return bytes(chunk or b'')
+
+    def delete(self, key, saved_before=None):
+        rows = self._rows().filter(key=key)
+        if saved_before is not None:
+            rows = rows.filter(created_at__lt=datetime.datetime.fromtimestamp(saved_before, datetime.timezone.utc))
+        rows.delete()
+
+    def exists(self, key):
+        return self._rows().filter(key=key).exists()
+
+
+class DatabaseBlobFile(io.RawIOBase):
+    """Seekable read-only file over a PayloadBlob row; each read fetches one slice."""
+
+    def __init__(self, storage, key, size):
+        self.storage = storage
+        self.key = key
+        self.size = size
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self.position = offset
+        return offset
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        chunk = self.storage.read_chunk(self.key, self.position, length)
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+
+@functools.lru_cache(maxsize=None)
+def get_blob_storage():
+    """Returns the storage configured by CERT_BLOB_STORAGE ({'BACKEND': ..., 'OPTIONS': {...}})."""
+    config = settings.CERT_BLOB_STORAGE
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def _reset_blob_storage(setting, **kwargs):
+    if setting == 'CERT_BLOB_STORAGE':
+        get_blob_storage.cache_clear()
@@ -0,0 +1,25 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with a local blob storage in a temporary directory instead of CERT_BLOB_ROOT."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.blob_root = tempfile.mkdtemp(prefix='bereke-blobs-')
+        config = settings.CERT_BLOB_STORAGE
+        options = dict(config.get('OPTIONS', {}))
+        if 'location' in options:
+            options['location'] = self.blob_root
+        self.blob_settings = override_settings(CERT_BLOB_STORAGE=dict(config, OPTIONS=options))
+        self.blob_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.blob_settings.disable()
+        shutil.rmtree(self.blob_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,98 @@
+import datetime
+import time
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.auth import TokenCache, get_token_cache
+from bereke_perevod_api.models import ApiToken
+
+
+class TokenCacheTest(TestCase):
+    def test_lru_eviction_and_ttl(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', 'user-a', 1, None)
+        cache.set('b', 'user-b', 2, None)
+        cache.get('a')
+        cache.set('c', 'user-c', 3, None)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+
+        expired = TokenCache(maxsize=2, ttl=0.01)
+        expired.set('a', 'user-a', 1, None)
+        time.sleep(0.02)
+        self.assertIsNone(expired.get('a'))
+
+
+class ApiTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = User.objects.create_user(username='robot', password='testpass123')
+        self.token, self.key = ApiToken.issue(self.user, name='ci')
+        self.client = APIClient()
+        self.url = reverse('files')
+
+    def get(self, key):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {key}')
+
+    def test_key_is_stored_hashed(self):
+        self.assertNotEqual(self.token.key_hash, self.key)
+        self.assertEqual(self.token.prefix, self.key[:ApiToken.PREFIX_LENGTH])
+
+    def test_valid_token(self):
+        self.assertEqual(self.get(self.key).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {self.key}').status_code, 200)
+
+    def test_invalid_token(self):
+        self.assertIn(self.get('wrong').status_code, (401, 403))
+
+    def test_non_utf8_header_is_not_a_server_error(self):
+        self.assertIn(self.client.get(self.url, HTTP_AUTHORIZATION='\xff\xfe abc').status_code, (401, 403))
+        self.assertIn(self.client.get(self.url, HTTP_AUTHORIZATION='Token \xff\xfe').status_code, (401, 403))
+
+    def test_cache_hit_skips_token_query(self):
+        self.get(self.key)
+        self.token.refresh_from_db()
+        first_used = self.token.last_used_at
+        self.assertIsNotNone(first_used)
+
+        # Попадание в кэш: ни сессии, ни таблицы токенов
+        with self.assertNumQueries(2):  # версия коллекции + список
+            self.client.get(self.url, {'pagination': 'cursor'}, HTTP_AUTHORIZATION=f'Token {self.key}')
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.last_used_at, first_used)
+
+    def test_revoked_token_is_rejected(self):
+        self.get(self.key)
+        self.token.revoke()
+        self.assertIn(self.get(self.key).status_code, (401, 403))
+
+    def test_expired_token_is_rejected(self):
+        ApiToken.objects.filter(pk=self.token.pk).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertIn(self.get(self.key).status_code, (401, 403))
+
+    def test_create_endpoint_accepts_token(self):
+        response = self.client.post(reverse('file-create'), {}, format='json', HTTP_AUTHORIZATION=f'Token {self.key}')
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiTokenCommandsTest(TestCase):
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = User.objects.create_user(username='robot', password='testpass123')
+
+    def test_create_and_revoke(self):
+        out = StringIO()
+        call_command('create_api_token', 'robot', '--days', '30', stdout=out, stderr=StringIO())
+        key = out.getvalue().strip()
+        token = ApiToken.objects.get(key_hash=ApiToken.hash_key(key))
+        self.assertIsNotNone(token.expires_at)
+
+        call_command('revoke_api_token', token.prefix, stdout=StringIO())
+        token.refresh_from_db()
+        self.assertIsNotNone(token.revoked_at)
@@ -0,0 +1,97 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.serializers import CertCreateSerializer
+from bereke_perevod_api.storage import get_blob_storage
+
+
+def make_item(filename, **overrides):
+    item = {
+        'filename': filename,
+        'expiration': 30,
+        'password': 'strongpass123',
+        'password2': 'strongpass123',
+        'full_name': 'Иван Иванов',
+        'department': 'IT',
+        'organization': 'Айыл Банк',
+        'city': 'г.Бишкек',
+        'region': 'Чуй',
+        'country_code': 'KG',
+    }
+    item.update(overrides)
+    return item
+
+
+@override_settings(CERT_BATCH_BACKEND='inline')
+class CertBatchCreateViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.url = reverse('file-create-batch')
+
+    def test_json_array_all_created(self):
+        response = self.client.post(self.url, data=[make_item('first'), make_item('second')], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([r['filename'] for r in response.data['results']], ['first.p12', 'second.p12'])
+        self.assertEqual(UploadedP12.objects.count(), 2)
+
+    def test_partial_failure_is_reported_per_item(self):
+        items = [make_item('good'), make_item('bad', password2='wrong')]
+        response = self.client.post(self.url, data=items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+        self.assertIn('Пароли не совпадают', str(response.data['results'][1]['errors']))
+        self.assertEqual(list(UploadedP12.objects.values_list('filename', flat=True)), ['good.p12'])
+
+    def test_failed_chunk_removes_written_blobs(self):
+        built = []
+        build_instance = CertCreateSerializer.build_instance
+
+        def tracking_build_instance(*args):
+            built.append(build_instance(*args))
+            return built[-1]
+
+        with mock.patch.object(CertCreateSerializer, 'build_instance', tracking_build_instance), \
+                mock.patch('bereke_perevod_api.batch.CollectionVersion.bump', side_effect=DatabaseError('locked')):
+            response = self.client.post(self.url, data=[make_item('first'), make_item('second')], format='json')
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(len(built), 2)
+        self.assertFalse(any(get_blob_storage().exists(instance.blob_key) for instance in built))
+
+    def test_csv_upload(self):
+        item = make_item('from_csv')
+        content = ','.join(item) + '\n' + ','.join(str(v) for v in item.values()) + '\n'
+        upload = SimpleUploadedFile('certs.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(self.url, data={'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UploadedP12.objects.filter(filename='from_csv.p12').exists())
+
+    def test_ndjson_upload_with_broken_line(self):
+        content = json.dumps(make_item('from_ndjson')) + '\n{broken\n'
+        upload = SimpleUploadedFile('certs.ndjson', content.encode())
+        response = self.client.post(self.url, data={'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+
+    @override_settings(CERT_BATCH_MAX_ITEMS=1)
+    def test_too_many_items(self):
+        response = self.client.post(self.url, data=[make_item('a'), make_item('b')], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadedP12.objects.exists())
+
+    def test_not_a_list(self):
+        response = self.client.post(self.url, data=make_item('single'), format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import CollectionVersion, UploadedP12
+
+
+class ConditionalResponsesTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.cert = UploadedP12.objects.create(filename='testcert.p12', file_data=b'test binary data')
+
+    def test_download_not_modified(self):
+        url = reverse('file-download', kwargs={'pk': self.cert.pk})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(etag, f'"{self.cert.sha256}"')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_not_modified(self):
+        url = reverse('file-detail', kwargs={'pk': self.cert.pk})
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_listing_not_modified_skips_certificate_query(self):
+        url = reverse('files')
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('uploadedp12' in q['sql'] for q in ctx.captured_queries))
+
+    def test_listing_etag_changes_on_create_and_delete(self):
+        url = reverse('files')
+        etag = self.client.get(url)['ETag']
+
+        other = UploadedP12.objects.create(filename='other.p12', file_data=b'other')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        other.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listing_etag_depends_on_query(self):
+        url = reverse('files')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'search': 'test'})['ETag'])
+
+
+class CollectionVersionTest(TestCase):
+    def test_bump(self):
+        self.assertEqual(CollectionVersion.current('things'), (0, None))
+        CollectionVersion.bump('things')
+        CollectionVersion.bump('things')
+        version, updated_at = CollectionVersion.current('things')
+        self.assertEqual(version, 2)
+        self.assertIsNotNone(updated_at)
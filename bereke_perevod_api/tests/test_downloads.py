@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.downloads import parse_range
+from bereke_perevod_api.models import UploadedP12
+
+
+class ParseRangeTest(TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-4', 10), (0, 4))
+        self.assertEqual(parse_range('bytes=5-', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=8-100', 10), (8, 9))
+        self.assertEqual(parse_range('bytes=10-', 10), 'unsatisfiable')
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        self.assertIsNone(parse_range('', 10))
+
+
+class FileDownloadRangeTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        settings_override = override_settings(CERT_BLOB_STORAGE={
+            'BACKEND': 'bereke_perevod_api.storage.LocalBlobStorage',
+            'OPTIONS': {'location': self.location},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.data = b'0123456789'
+        self.cert = UploadedP12.objects.create(filename='testcert.p12', file_data=self.data)
+        self.url = reverse('file-download', kwargs={'pk': self.cert.pk})
+
+    def test_full_download_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['ETag'], f'"{self.cert.sha256}"')
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+    def test_suffix_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range_mismatch_serves_full_payload(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_if_range_match(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=f'"{self.cert.sha256}"')
+        self.assertEqual(response.status_code, 206)
+
+    @override_settings(CERT_DOWNLOAD_ACCEL='x-accel-redirect', CERT_DOWNLOAD_ACCEL_PREFIX='/protected-blobs/')
+    def test_x_accel_redirect(self):
+        response = self.client.get(self.url)
+        key = self.cert.blob_key
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-blobs/{key[:2]}/{key[2:4]}/{key}')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="testcert.p12"')
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,77 @@
+import csv
+import datetime
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import ScanState, UploadedP12
+
+
+def create_cert(name, expires_in_days):
+    return UploadedP12.objects.create(
+        filename=f'{name}.p12', file_data=b'data', subject_cn=name,
+        not_after=timezone.now() + datetime.timedelta(days=expires_in_days),
+    )
+
+
+class ExpiringViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        create_cert('later', 20)
+        create_cert('soon', 5)
+        create_cert('far', 90)
+        create_cert('expired', -1)
+        UploadedP12.objects.create(filename='legacy.p12', file_data=b'data')
+
+    def test_ndjson(self):
+        response = self.client.get(reverse('expiring'), {'within': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['subject_cn'] for row in rows], ['soon', 'later'])
+
+    def test_csv(self):
+        response = self.client.get(reverse('expiring'), {'within': 100, 'output': 'csv'})
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['subject_cn'] for row in rows], ['soon', 'later', 'far'])
+
+    def test_invalid_within(self):
+        for value in ('abc', '0', '100000'):
+            self.assertEqual(self.client.get(reverse('expiring'), {'within': value}).status_code, 400)
+
+
+class ScanExpiryCommandTest(TestCase):
+    def scan(self, *args):
+        out = StringIO()
+        call_command('scan_expiry', *args, stdout=out, stderr=StringIO())
+        return [json.loads(line)['subject_cn'] for line in out.getvalue().splitlines() if line]
+
+    def test_incremental_scan(self):
+        create_cert('soon', 5)
+        create_cert('far', 40)
+        self.assertEqual(self.scan('--within', '30'), ['soon'])
+
+        # Повторный запуск без изменений ничего не сообщает
+        self.assertEqual(self.scan('--within', '30'), [])
+
+        # Новые сертификаты и те, что вошли в расширенное окно
+        create_cert('new', 10)
+        self.assertEqual(self.scan('--within', '45'), ['new', 'far'])
+
+        state = ScanState.objects.get(name='scan_expiry')
+        self.assertEqual(state.last_id, UploadedP12.objects.order_by('-id').first().pk)
+
+    def test_dry_run_and_reset(self):
+        create_cert('soon', 5)
+        self.assertEqual(self.scan('--dry-run'), ['soon'])
+        self.assertEqual(self.scan(), ['soon'])
+        self.assertEqual(self.scan(), [])
+        self.assertEqual(self.scan('--reset'), ['soon'])
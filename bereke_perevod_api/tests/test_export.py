@@ -0,0 +1,45 @@
+import io
+import zipfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.export import zip_certificates
+from bereke_perevod_api.models import UploadedP12
+
+
+class CertExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.asanov = UploadedP12.objects.create(filename='asanov.p12', file_data=b'asanov-data')
+        self.duplicate = UploadedP12.objects.create(filename='asanov.p12', file_data=b'second-data')
+        self.ivanov = UploadedP12.objects.create(filename='ivanov.p12', file_data=b'ivanov-data' * 10000)
+
+    def export(self, params=None):
+        response = self.client.get(reverse('files-export'), params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_export_all(self):
+        archive = self.export()
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(sorted(archive.namelist()),
+                         sorted(['asanov.p12', f'asanov-{self.asanov.pk}.p12', 'ivanov.p12']))
+        self.assertEqual(archive.read('ivanov.p12'), b'ivanov-data' * 10000)
+
+    def test_export_uses_list_filters(self):
+        archive = self.export({'search': 'ivanov'})
+        self.assertEqual(archive.namelist(), ['ivanov.p12'])
+
+    def test_empty_export_is_valid_zip(self):
+        self.assertEqual(self.export({'search': 'nobody'}).namelist(), [])
+
+    def test_archive_is_streamed_in_pieces(self):
+        pieces = [piece for piece in zip_certificates(UploadedP12.objects.order_by('id'), chunk_size=1) if piece]
+        self.assertGreater(len(pieces), 3)
+        self.assertLess(max(len(piece) for piece in pieces), 70 * 1024)
@@ -0,0 +1,137 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.certs import build_p12
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.storage import get_blob_storage
+
+
+def make_p12(full_name, password):
+    return build_p12({
+        'expiration': 30, 'password': password, 'full_name': full_name, 'department': 'IT',
+        'organization': 'MyCompany', 'city': 'Bishkek', 'region': 'Chuy', 'country_code': 'KG',
+    })
+
+
+@override_settings(CERT_BATCH_BACKEND='inline')
+class CertImportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.asanov, cls.asanov_meta = make_p12('Asan Asanov', 'first')
+        cls.ivanov, _ = make_p12('Ivan Ivanov', 'second')
+
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def zip_upload(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+        return SimpleUploadedFile('certs.zip', buffer.getvalue(), content_type='application/zip')
+
+    def test_zip_import_with_password_map_and_duplicates(self):
+        upload = self.zip_upload({
+            'dept/asanov.p12': self.asanov,
+            'dept/copy_of_asanov.p12': self.asanov,
+            'ivanov.pfx': self.ivanov,
+            'broken.p12': b'not a pkcs12',
+            'readme.txt': b'ignored',
+        })
+        response = self.client.post(reverse('file-import'), {
+            'file': upload,
+            'passwords': json.dumps({'ivanov.pfx': 'second'}),
+            'password': 'first',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['processed'], 4)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['duplicates'], 1)
+        self.assertEqual([e['file'] for e in response.data['errors']], ['broken.p12'])
+
+        cert = UploadedP12.objects.get(fingerprint_sha256=self.asanov_meta['fingerprint_sha256'])
+        self.assertEqual(cert.filename, 'asanov.p12')
+        self.assertEqual(cert.subject_cn, 'Asan Asanov')
+        self.assertEqual(cert.read_payload(), self.asanov)
+
+    def test_already_stored_certificate_is_skipped(self):
+        upload = SimpleUploadedFile('asanov.p12', self.asanov)
+        self.client.post(reverse('file-import'), {'file': upload, 'password': 'first'}, format='multipart')
+
+        upload = SimpleUploadedFile('asanov_again.p12', self.asanov)
+        response = self.client.post(reverse('file-import'), {'file': upload, 'password': 'first'}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['imported'], 0)
+        self.assertEqual(response.data['skipped'][0]['id'], UploadedP12.objects.get().pk)
+
+    def test_failed_insert_removes_written_blobs(self):
+        upload = SimpleUploadedFile('asanov.p12', self.asanov)
+        with mock.patch('bereke_perevod_api.importer.CollectionVersion.bump', side_effect=DatabaseError('locked')):
+            response = self.client.post(reverse('file-import'), {'file': upload, 'password': 'first'},
+                                        format='multipart')
+        self.assertEqual(response.data['failed'], 1)
+        self.assertFalse(UploadedP12.objects.exists())
+        self.assertFalse(get_blob_storage().exists(hashlib.sha256(self.asanov).hexdigest()))
+
+    def test_concurrent_import_of_same_certificate_is_reported_as_duplicate(self):
+        set_payload = UploadedP12.set_payload
+
+        def set_payload_racing(instance, data):
+            set_payload(instance, data)
+            if instance.filename == 'asanov.p12':
+                # параллельный импорт вставил тот же сертификат после проверки на дубликаты
+                UploadedP12.objects.create(filename='other.p12', fingerprint_sha256=instance.fingerprint_sha256)
+
+        upload = self.zip_upload({'asanov.p12': self.asanov, 'ivanov.pfx': self.ivanov})
+        with mock.patch.object(UploadedP12, 'set_payload', set_payload_racing):
+            response = self.client.post(reverse('file-import'), {
+                'file': upload, 'passwords': json.dumps({'ivanov.pfx': 'second'}), 'password': 'first',
+            }, format='multipart')
+
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(response.data['duplicates'], 1)
+        self.assertEqual(response.data['skipped'][0]['id'], UploadedP12.objects.get(filename='other.p12').pk)
+        self.assertEqual(sorted(UploadedP12.objects.values_list('filename', flat=True)), ['ivanov.pfx', 'other.p12'])
+
+    def test_wrong_password(self):
+        upload = SimpleUploadedFile('asanov.p12', self.asanov)
+        response = self.client.post(reverse('file-import'), {'file': upload, 'password': 'wrong'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed'], 1)
+
+    def test_missing_file(self):
+        response = self.client.post(reverse('file-import'), {}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_command_from_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'nested'))
+            for name, data in (('asanov.p12', self.asanov), ('nested/ivanov.p12', self.ivanov)):
+                with open(os.path.join(tmp, name), 'wb') as f:
+                    f.write(data)
+            passwords = os.path.join(tmp, 'passwords.csv')
+            with open(passwords, 'w') as f:
+                f.write('asanov.p12,first\nnested/ivanov.p12,second\n')
+
+            out = StringIO()
+            call_command('import_p12', tmp, passwords=passwords, stdout=out, stderr=StringIO())
+
+        self.assertIn('2 imported', out.getvalue())
+        self.assertEqual(UploadedP12.objects.count(), 2)
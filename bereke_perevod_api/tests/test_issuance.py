@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from cryptography.hazmat.primitives.serialization import pkcs12
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.certs import build_p12
+from bereke_perevod_api.issuance import IssuanceBusy, IssuanceTimeout, ProcessPoolBackend
+from bereke_perevod_api.models import UploadedP12
+
+
+SPEC = {
+    'filename': 'testcert',
+    'expiration': 30,
+    'password': 'strongpass123',
+    'password2': 'strongpass123',
+    'full_name': 'Иван Иванов',
+    'department': 'IT',
+    'organization': 'Айыл Банк',
+    'city': 'г.Бишкек',
+    'region': 'Чуй',
+    'country_code': 'KG',
+}
+
+
+class ProcessPoolBackendTest(TestCase):
+    def setUp(self):
+        self.backend = ProcessPoolBackend(max_workers=1, max_pending=1, timeout=60, retry_after=7)
+        self.addCleanup(self.backend.shutdown)
+
+    def test_build_in_worker_process(self):
+        """Сертификат собирается в отдельном процессе и читается с паролем"""
+        p12_data, metadata = self.backend.run(build_p12, SPEC)
+        key, cert, _ = pkcs12.load_key_and_certificates(p12_data, SPEC['password'].encode())
+        self.assertIsNotNone(key)
+        self.assertIsNotNone(cert)
+        self.assertEqual(metadata['serial_number'], format(cert.serial_number, 'x'))
+
+    def test_saturated_backend_rejects_jobs(self):
+        """Сверх лимита задач бэкенд отвечает IssuanceBusy с Retry-After"""
+        future = self.backend.submit(time.sleep, 1)
+        with self.assertRaises(IssuanceBusy) as ctx:
+            self.backend.submit(time.sleep, 0)
+        self.assertEqual(ctx.exception.wait, 7)
+        future.result()
+        # слот освобождается после завершения задачи
+        self.backend.submit(time.sleep, 0).result()
+
+    def test_job_timeout(self):
+        with self.assertRaises(IssuanceTimeout):
+            self.backend.run(time.sleep, 2, timeout=0.1)
+
+
+class CertCreateBackpressureTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_busy_backend_returns_503_with_retry_after(self):
+        backend = mock.Mock()
+        backend.run.side_effect = IssuanceBusy(wait=5)
+        with mock.patch('bereke_perevod_api.serializers.get_issuance_backend', return_value=backend):
+            response = self.client.post(reverse('file-create'), data=SPEC, format='json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertFalse(UploadedP12.objects.exists())
@@ -0,0 +1,153 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bereke_perevod_api import jobs
+from bereke_perevod_api.issuance import IssuanceBusy
+from bereke_perevod_api.models import IssuanceJob, UploadedP12
+from bereke_perevod_api.serializers import CertCreateSerializer
+
+
+@override_settings(CERT_JOBS_INPROCESS_WORKER=False)
+class AsyncCertCreateTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.valid_data = {
+            'filename': 'testcert',
+            'expiration': 30,
+            'password': 'strongpass123',
+            'password2': 'strongpass123',
+            'full_name': 'Иван Иванов',
+            'department': 'IT',
+            'organization': 'Айыл Банк',
+            'city': 'г.Бишкек',
+            'region': 'Чуй',
+            'country_code': 'KG',
+        }
+
+    def test_async_create_returns_job(self):
+        response = self.client.post(reverse('file-create') + '?async=true', data=self.valid_data, format='json')
+        self.assertEqual(response.status_code, 202)
+        job = IssuanceJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, IssuanceJob.STATUS_PENDING)
+        self.assertEqual(response['Location'], response.data['status_url'])
+        # пароль не хранится в открытом виде
+        self.assertNotIn('password', job.spec)
+        self.assertNotIn(b'strongpass123', bytes(job.secret))
+        self.assertFalse(UploadedP12.objects.exists())
+
+    def test_job_completes_and_reports_certificate(self):
+        response = self.client.post(reverse('file-create'), data=self.valid_data, format='json',
+                                    HTTP_PREFER='respond-async')
+        job_id = response.data['job_id']
+
+        self.assertEqual(jobs.run_pending(), 1)
+
+        response = self.client.get(reverse('job-detail', kwargs={'pk': job_id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], IssuanceJob.STATUS_DONE)
+        cert = UploadedP12.objects.get(pk=response.data['result'])
+        self.assertEqual(cert.filename, 'testcert.p12')
+        self.assertTrue(response.data['file'].endswith(reverse('file-download', kwargs={'pk': cert.pk})))
+        self.assertIsNone(IssuanceJob.objects.get(pk=job_id).secret)
+
+    def test_failed_job_records_error(self):
+        job = jobs.enqueue(dict(self.valid_data), user=self.user)
+        with mock.patch('bereke_perevod_api.serializers.build_p12_timed', side_effect=ValueError('boom')), \
+                self.assertLogs('bereke_perevod_api.jobs', level='ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, IssuanceJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'boom')
+        self.assertIsNone(job.secret)
+
+    def test_undecryptable_secret_fails_job(self):
+        job = jobs.enqueue(dict(self.valid_data), user=self.user)
+        IssuanceJob.objects.filter(pk=job.pk).update(secret=b'not-a-fernet-token')
+        with self.assertLogs('bereke_perevod_api.jobs', level='ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, IssuanceJob.STATUS_FAILED)
+        self.assertIsNone(job.secret)
+
+    def test_requeue_stale_fails_after_max_attempts(self):
+        started = timezone.now() - datetime.timedelta(minutes=10)
+        retry = jobs.enqueue(dict(self.valid_data), user=self.user)
+        exhausted = jobs.enqueue(dict(self.valid_data), user=self.user)
+        IssuanceJob.objects.filter(pk=retry.pk).update(status=IssuanceJob.STATUS_RUNNING, started_at=started,
+                                                       attempts=1)
+        IssuanceJob.objects.filter(pk=exhausted.pk).update(status=IssuanceJob.STATUS_RUNNING, started_at=started,
+                                                           attempts=3)
+
+        self.assertEqual(jobs.requeue_stale(60, max_attempts=3), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retry.status, IssuanceJob.STATUS_PENDING)
+        self.assertEqual(exhausted.status, IssuanceJob.STATUS_FAILED)
+        self.assertIsNone(exhausted.secret)
+
+    def test_certificate_is_built_outside_the_transaction(self):
+        job = jobs.enqueue(dict(self.valid_data), user=self.user)
+        outer = len(connection.atomic_blocks)
+        depths = []
+        build = CertCreateSerializer.build
+
+        def tracking_build(serializer, spec):
+            depths.append(len(connection.atomic_blocks))
+            return build(serializer, spec)
+
+        with mock.patch.object(CertCreateSerializer, 'build', tracking_build):
+            self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(depths, [outer])
+        job.refresh_from_db()
+        self.assertEqual(job.status, IssuanceJob.STATUS_DONE)
+
+    def test_busy_backend_requeues_and_returns(self):
+        job = jobs.enqueue(dict(self.valid_data), user=self.user)
+        with mock.patch('bereke_perevod_api.serializers.build_p12_timed', side_effect=IssuanceBusy(wait=0)) as build:
+            self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(build.call_count, 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, IssuanceJob.STATUS_PENDING)
+
+    def test_job_not_found(self):
+        response = self.client.get(reverse('job-detail', kwargs={'pk': 9999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_html_form_enqueues_job(self):
+        self.client.post(reverse('home'), data=self.valid_data)
+        self.assertEqual(IssuanceJob.objects.count(), 1)
+        self.assertFalse(UploadedP12.objects.exists())
+
+
+class WorkerStartupTest(TestCase):
+    @override_settings(CERT_JOBS_INPROCESS_WORKER=True)
+    def test_should_start_worker(self):
+        with mock.patch.dict('os.environ', {'RUN_MAIN': ''}):
+            self.assertTrue(jobs.should_start_worker(['/venv/bin/gunicorn', 'config.wsgi']))
+            self.assertFalse(jobs.should_start_worker(['manage.py', 'migrate']))
+            self.assertFalse(jobs.should_start_worker(['manage.py', 'test']))
+            self.assertFalse(jobs.should_start_worker(['manage.py', 'runserver']))
+            self.assertTrue(jobs.should_start_worker(['manage.py', 'runserver', '--noreload']))
+        with mock.patch.dict('os.environ', {'RUN_MAIN': 'true'}):
+            self.assertTrue(jobs.should_start_worker(['manage.py', 'runserver']))
+
+    @override_settings(CERT_JOBS_INPROCESS_WORKER=False)
+    def test_disabled_worker_never_starts(self):
+        self.assertFalse(jobs.should_start_worker(['/venv/bin/gunicorn', 'config.wsgi']))
+
+    def test_ready_starts_worker(self):
+        from django.apps import apps
+        config = apps.get_app_config('bereke_perevod_api')
+        with mock.patch('bereke_perevod_api.jobs.should_start_worker', return_value=True), \
+                mock.patch('bereke_perevod_api.jobs.get_worker') as get_worker:
+            config.ready()
+        get_worker.return_value.start.assert_called_once_with()
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.keypool import KeyPool, acquire_key
+
+
+class KeyPoolTest(TestCase):
+    def test_acquire_takes_pre_generated_key(self):
+        """Ключ из заполненного пула выдаётся без генерации на месте"""
+        pool = KeyPool(target_size=2, key_size=1024)
+        pool.fill()
+        self.assertEqual(pool.stats()['size'], 2)
+
+        acquired = pool.acquire()
+        self.assertEqual(acquired.key_size, 1024)
+        self.assertEqual(pool.hits, 1)
+        self.assertEqual(pool.misses, 0)
+
+    def test_disabled_pool_generates_inline(self):
+        """Пул размером 0 всегда генерирует ключ на месте"""
+        pool = KeyPool(target_size=0, key_size=1024)
+        key = pool.acquire()
+        self.assertEqual(key.key_size, 1024)
+        stats = pool.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 0)
+        self.assertFalse(stats['worker_alive'])
+
+    def test_keys_are_unique(self):
+        pool = KeyPool(target_size=3, key_size=1024)
+        pool.fill()
+        numbers = {pool.acquire().private_numbers().d for _ in range(3)}
+        self.assertEqual(len(numbers), 3)
+
+    @override_settings(CERT_KEY_SIZE=1024)
+    def test_pool_worker_process_generates_inline(self):
+        """В воркере пула процессов ключ генерируется на месте, собственный пул не запускается"""
+        with mock.patch('bereke_perevod_api.keypool.multiprocessing.parent_process', return_value=object()), \
+                mock.patch('bereke_perevod_api.keypool.get_key_pool') as get_key_pool:
+            key = acquire_key()
+        self.assertEqual(key.key_size, 1024)
+        get_key_pool.assert_not_called()
+
+
+class KeyPoolStatsViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('keypool-stats')
+
+    def test_admin_gets_stats(self):
+        User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('target_size', response.data)
+        self.assertIn('size', response.data)
+
+    def test_regular_user_denied(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
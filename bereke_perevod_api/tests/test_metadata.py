@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+import tempfile
+import warnings
+from io import StringIO
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.certs import SUBJECT_MAX_LENGTHS, build_p12, certificate_metadata
+from bereke_perevod_api.models import UploadedP12
+
+SPEC = {
+    'filename': 'legacy',
+    'expiration': 30,
+    'password': 'secret123',
+    'password2': 'secret123',
+    'full_name': 'Asan Asanov',
+    'department': 'IT',
+    'organization': 'MyCompany',
+    'city': 'Bishkek',
+    'region': 'Chuy',
+    'country_code': 'KG',
+}
+
+
+class CertificateMetadataTest(TestCase):
+    def test_max_lengths_match_model(self):
+        for field, max_length in SUBJECT_MAX_LENGTHS.items():
+            self.assertEqual(UploadedP12._meta.get_field(field).max_length, max_length, field)
+
+    def test_values_are_cut_to_column_length(self):
+        key = ec.generate_private_key(ec.SECP256R1())
+        # такой C не собрать штатно, но чужой .p12 может его содержать (при разборе — только UserWarning)
+        name = x509.Name([x509.NameAttribute(NameOID.COUNTRY_NAME, 'KGZ', _validate=False),
+                          x509.NameAttribute(NameOID.COMMON_NAME, 'x' * 64)])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+                .serial_number(1).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+                .sign(key, hashes.SHA256()))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            metadata = certificate_metadata(cert)
+        self.assertEqual(metadata['subject_c'], 'KG')
+        self.assertEqual(metadata['subject_cn'], 'x' * 64)
+
+
+class CertListMetadataFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        for i, (org, day) in enumerate([('Alpha', 20), ('Beta', 5), ('Alpha', 10)]):
+            UploadedP12.objects.create(
+                filename=f'cert_{i}.p12', file_data=b'data', subject_o=org, subject_cn=f'User {i}',
+                serial_number=f'a{i}', fingerprint_sha256=f'{i}' * 64, key_algorithm='RSA',
+                not_after=make_aware(datetime.datetime(2025, 8, day)),
+            )
+
+    def filenames(self, params):
+        response = self.client.get(reverse('files'), params)
+        self.assertEqual(response.status_code, 200)
+        return [item['filename'] for item in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.filenames({'organization': 'Alpha', 'ordering': 'not_after'}),
+                         ['cert_2.p12', 'cert_0.p12'])
+        self.assertEqual(self.filenames({'expires_before': '2025-08-10'}), ['cert_1.p12'])
+        self.assertEqual(self.filenames({'expires_after': '2025-08-10', 'ordering': '-not_after'}),
+                         ['cert_0.p12', 'cert_2.p12'])
+        self.assertEqual(self.filenames({'serial': '0x0A1'}), ['cert_1.p12'])
+        self.assertEqual(self.filenames({'fingerprint': ':'.join(['22'] * 32).upper()}), ['cert_2.p12'])
+
+    def test_fields_in_response(self):
+        response = self.client.get(reverse('files'), {'common_name': 'User 1'})
+        item = response.data['results'][0]
+        self.assertEqual(item['subject_o'], 'Beta')
+        self.assertEqual(item['key_algorithm'], 'RSA')
+
+    def test_non_default_ordering_keeps_page_numbers(self):
+        response = self.client.get(reverse('files'), {'ordering': 'not_after', 'pagination': 'cursor'})
+        self.assertIn('count', response.data)
+
+
+class BackfillCertMetadataTest(TestCase):
+    def setUp(self):
+        p12_data, self.metadata = build_p12(SPEC)
+        self.cert = UploadedP12.objects.create(filename='legacy.p12', file_data=p12_data)
+        self.unknown = UploadedP12.objects.create(filename='unknown.p12', file_data=p12_data)
+
+    def test_backfill_with_password_map(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'passwords.json')
+            with open(path, 'w') as f:
+                json.dump({'legacy.p12': 'secret123', str(self.unknown.pk): 'wrong'}, f)
+            err = StringIO()
+            call_command('backfill_cert_metadata', passwords=path, stdout=StringIO(), stderr=err)
+
+        self.cert.refresh_from_db()
+        self.assertEqual(self.cert.fingerprint_sha256, self.metadata['fingerprint_sha256'])
+        self.assertEqual(self.cert.subject_cn, 'Asan Asanov')
+        self.assertEqual(self.cert.not_after, self.metadata['not_after'])
+        self.unknown.refresh_from_db()
+        self.assertEqual(self.unknown.fingerprint_sha256, '')
+        self.assertIn(str(self.unknown.pk), err.getvalue())
+
+    def test_default_password(self):
+        err = StringIO()
+        call_command('backfill_cert_metadata', password=['secret123'], stdout=StringIO(), stderr=err)
+        self.cert.refresh_from_db()
+        self.assertEqual(self.cert.fingerprint_sha256, self.metadata['fingerprint_sha256'])
+        # unknown.p12 — копия того же сертификата: отпечаток уникален, копия остаётся без метаданных
+        self.assertEqual(list(UploadedP12.objects.filter(fingerprint_sha256='').values_list('pk', flat=True)),
+                         [self.unknown.pk])
+        self.assertIn(f'duplicate(s) of stored certificates: ids {self.unknown.pk}', err.getvalue())
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api import metrics
+from bereke_perevod_api.models import UploadedP12
+
+
+def sample(text, name, **labels):
+    """Value of one sample in the exposition text, or None."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def _increment_in_child():
+    metrics.CERTIFICATES_CREATED.inc(3, source='child')
+
+
+class MetricsDirTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(METRICS_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class MmapStoreTest(MetricsDirTestCase):
+    def test_values_are_readable_from_the_file_and_survive_growth(self):
+        path = os.path.join(self.directory, 'sum_1.db')
+        store = metrics.MmapStore(path)
+        store.initial_size = 64
+        store.add('a', 1)
+        store.add('a', 2.5)
+        for index in range(200):
+            store.add(f'key-{index}', index)
+        store.close()
+
+        values = metrics.MmapStore.read(path)
+        self.assertEqual(values['a'], 3.5)
+        self.assertEqual(values['key-199'], 199)
+
+        # файл открывается повторно с уже записанными значениями
+        store = metrics.MmapStore(path)
+        store.add('a', 1)
+        store.close()
+        self.assertEqual(metrics.MmapStore.read(path)['a'], 4.5)
+
+
+class CollectTest(MetricsDirTestCase):
+    def test_sums_worker_processes(self):
+        metrics.CERTIFICATES_CREATED.inc(source='child')
+        process = multiprocessing.get_context('fork').Process(target=_increment_in_child)
+        process.start()
+        process.join()
+
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.startswith('sum_')]), 2)
+        text = metrics.render()
+        self.assertEqual(sample(text, 'bereke_certificates_created_total', source='child'), 4)
+
+    def test_live_gauges_of_dead_processes_are_ignored(self):
+        dead = metrics.MmapStore(os.path.join(self.directory, 'live_999999999.db'))
+        dead.add(metrics._sample_key('bereke_http_requests_in_flight', {}), 5)
+        dead.close()
+        metrics.HTTP_REQUESTS_IN_FLIGHT.add(1)
+
+        # 5 «зависших» запросов умершего воркера не учитываются
+        self.assertIn('\nbereke_http_requests_in_flight 1\n', metrics.render())
+
+    def test_histogram_rendering(self):
+        metrics.DB_QUERIES_PER_REQUEST.observe(3, route='files')
+        text = metrics.render()
+        self.assertIn('# TYPE bereke_db_queries_per_request histogram', text)
+        self.assertEqual(sample(text, 'bereke_db_queries_per_request_bucket', le='0.0', route='files'), 0)
+        self.assertEqual(sample(text, 'bereke_db_queries_per_request_bucket', le='2.0', route='files'), 0)
+        self.assertEqual(sample(text, 'bereke_db_queries_per_request_bucket', le='5.0', route='files'), 1)
+        self.assertEqual(sample(text, 'bereke_db_queries_per_request_bucket', le='+Inf', route='files'), 1)
+        self.assertEqual(sample(text, 'bereke_db_queries_per_request_sum', route='files'), 3)
+        buckets = re.findall(r'bereke_db_queries_per_request_bucket\{le="([^"]+)",route="files"', text)
+        self.assertEqual(buckets, ['0.0', '1.0', '2.0', '5.0', '10.0', '20.0', '50.0', '100.0', '200.0', '+Inf'])
+
+    def test_histogram_snapshot(self):
+        for value, route in ((0, 'files'), (3, 'files'), (300, 'files'), (1, 'file-download')):
+            metrics.DB_QUERIES_PER_REQUEST.observe(value, route=route)
+        snapshot = metrics.DB_QUERIES_PER_REQUEST.snapshot('route')
+        self.assertEqual(snapshot['files']['count'], 3)
+        self.assertEqual(snapshot['files']['sum'], 303)
+        self.assertEqual(snapshot['files']['buckets'][:4], [(0, 1), (1, 1), (2, 1), (5, 2)])
+        self.assertEqual(snapshot['files']['buckets'][-1], (float('inf'), 3))
+        self.assertEqual(snapshot['file-download']['count'], 1)
+
+
+class MetricsEndpointTest(MetricsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+
+    def test_request_db_and_download_metrics(self):
+        cert = UploadedP12.objects.create(filename='m.p12', file_data=b'0123456789')
+        self.assertEqual(self.client.get(reverse('files')).status_code, 200)
+        response = self.client.get(reverse('file-download', kwargs={'pk': cert.pk}))
+        b''.join(response.streaming_content)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        self.assertEqual(sample(text, 'bereke_http_requests_total', method='GET', route='files', status='200'), 1)
+        self.assertEqual(sample(text, 'bereke_http_request_duration_seconds_count', route='files'), 1)
+        self.assertGreater(sample(text, 'bereke_db_queries_total', route='files'), 0)
+        self.assertEqual(sample(text, 'bereke_download_bytes_total', route='file-download'), 10)
+
+    def test_create_throughput_and_issuance_stages(self):
+        response = self.client.post(reverse('file-create'), data={
+            'filename': 'metrics', 'expiration': 30, 'password': 'strongpass123', 'password2': 'strongpass123',
+            'full_name': 'Иван Иванов', 'department': 'IT', 'organization': 'Айыл Банк',
+            'city': 'г.Бишкек', 'region': 'Чуй', 'country_code': 'KG',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertEqual(sample(text, 'bereke_certificates_created_total', source='single'), 1)
+        self.assertEqual(sample(text, 'bereke_issuance_stage_seconds_count', stage='keygen'), 1)
+
+    def test_access(self):
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get(reverse('metrics')).status_code, 403)
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(anonymous.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            response = anonymous.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,125 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.pagination import InvalidCursor, decode_cursor, keyset_page
+
+
+class KeysetPageTest(TestCase):
+    def setUp(self):
+        same_time = make_aware(datetime.datetime(2025, 7, 11, 12, 0))
+        self.certs = []
+        for i in range(7):
+            cert = UploadedP12.objects.create(filename=f'cert_{i}.p12', file_data=b'data')
+            # Две пары с одинаковым uploaded_at — порядок внутри определяет id
+            uploaded_at = same_time if i in (2, 3) else same_time + datetime.timedelta(minutes=i)
+            UploadedP12.objects.filter(pk=cert.pk).update(uploaded_at=uploaded_at)
+            self.certs.append(cert)
+        self.queryset = UploadedP12.objects.metadata()
+        self.expected = [c.pk for c in sorted(
+            UploadedP12.objects.all(), key=lambda c: (c.uploaded_at, c.pk), reverse=True
+        )]
+
+    def walk_forward(self, page_size):
+        pages, token = [], None
+        while True:
+            rows, token, _ = keyset_page(self.queryset, token, page_size)
+            pages.append([row.pk for row in rows])
+            if token is None:
+                return pages
+
+    def test_forward_walk_covers_all_rows_once(self):
+        pages = self.walk_forward(3)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+    def test_previous_returns_same_page(self):
+        first, next_token, previous_token = keyset_page(self.queryset, None, 3)
+        self.assertIsNone(previous_token)
+        second, _, previous_token = keyset_page(self.queryset, next_token, 3)
+        back, _, back_previous = keyset_page(self.queryset, previous_token, 3)
+        self.assertEqual([r.pk for r in back], [r.pk for r in first])
+        self.assertIsNone(back_previous)
+
+    def test_new_rows_do_not_shift_next_page(self):
+        _, next_token, _ = keyset_page(self.queryset, None, 3)
+        UploadedP12.objects.create(filename='newest.p12', file_data=b'data')
+        rows, _, _ = keyset_page(self.queryset, next_token, 3)
+        self.assertEqual([r.pk for r in rows], self.expected[3:6])
+
+    def test_single_query_per_page(self):
+        _, next_token, _ = keyset_page(self.queryset, None, 3)
+        with CaptureQueriesContext(connection) as ctx:
+            keyset_page(self.queryset, next_token, 3)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'].upper())
+
+    def test_invalid_cursor(self):
+        for token in ('garbage', 'W10', 'WyJ4IiwiMjAyNSIsMV0'):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+
+class CertListCursorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        for i in range(12):
+            UploadedP12.objects.create(filename=f'cert_{i}.p12', file_data=b'data')
+
+    def test_cursor_mode_is_opt_in(self):
+        response = self.client.get(reverse('files'))
+        self.assertIn('count', response.data)
+
+        response = self.client.get(reverse('files'), {'pagination': 'cursor'})
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), 5)
+
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_cursor_keeps_filters(self):
+        response = self.client.get(reverse('files'), {'pagination': 'cursor', 'search': 'cert_1'})
+        self.assertEqual({item['filename'] for item in response.data['results']},
+                         {'cert_1.p12', 'cert_10.p12', 'cert_11.p12'})
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('files'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_endpoint_is_cached_per_version(self):
+        url = reverse('files-count')
+        response = self.client.get(url, {'search': 'cert_1'})
+        self.assertEqual(response.data, {'count': 3, 'approximate': False})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, {'search': 'cert_1'}, HTTP_IF_NONE_MATCH='"other"')
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()])
+
+        UploadedP12.objects.create(filename='cert_12.p12', file_data=b'data')
+        response = self.client.get(url, {'search': 'cert_1'})
+        self.assertEqual(response.data['count'], 4)
+
+    def test_html_view_cursor_mode(self):
+        response = self.client.get(reverse('detail'), {'pagination': 'cursor'})
+        self.assertTrue(response.context['cursor_mode'])
+        self.assertEqual(len(response.context['files']), 5)
+        response = self.client.get(reverse('detail'), {'pagination': 'cursor',
+                                                       'cursor': response.context['next_cursor']})
+        self.assertEqual(len(response.context['files']), 5)
+        self.assertTrue(response.context['previous_cursor'])
@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.profiling import ProfilingMiddleware, normalize_sql, read_records
+
+
+class NormalizeSqlTest(TestCase):
+    def test_collapses_whitespace_and_in_lists(self):
+        self.assertEqual(normalize_sql('SELECT  *\n FROM t WHERE id IN (%s, %s, %s)'),
+                         'SELECT * FROM t WHERE id IN (...)')
+        self.assertEqual(normalize_sql('SELECT * FROM t WHERE id IN (%s)'), 'SELECT * FROM t WHERE id IN (...)')
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory,
+                                              PROFILING_SAMPLE_RATE=0, PROFILING_SLOW_MS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_disabled_by_default(self):
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: HttpResponse())
+
+    def test_detects_repeated_queries(self):
+        certs = [UploadedP12.objects.create(filename=f'{i}.p12', file_data=b'x') for i in range(6)]
+
+        def n_plus_one(request):
+            for cert in certs:
+                UploadedP12.objects.metadata().get(pk=cert.pk)
+            UploadedP12.objects.metadata().get(pk=certs[0].pk)
+            return HttpResponse()
+
+        with self.assertLogs('bereke_perevod_api.profiling', level='WARNING'):
+            ProfilingMiddleware(n_plus_one)(RequestFactory().get('/n-plus-one/'))
+
+        [record] = read_records(self.directory)
+        self.assertEqual(record['route'], 'unmatched')
+        self.assertEqual(record['queries'], 7)
+        self.assertEqual(record['duplicate_queries'], 6)
+        self.assertEqual(record['identical_queries'], 1)
+        self.assertEqual(record['duplicates'][0]['count'], 7)
+        self.assertIn('"bereke_perevod_api_uploadedp12"', record['duplicates'][0]['sql'])
+        self.assertIsNone(record['profile'])
+
+    def test_slow_sampled_request_dumps_profile(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            client = APIClient()
+            client.login(username='testuser', password='testpass123')
+            self.assertEqual(client.get(reverse('files')).status_code, 200)
+
+        record = [r for r in read_records(self.directory) if r['route'] == 'files'][0]
+        self.assertGreater(record['queries'], 0)
+        self.assertGreaterEqual(record['wall_ms'], record['query_ms'])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, record['profile'])))
+
+        out = io.StringIO()
+        call_command('profile_report', profile=record['profile'], top=5, stdout=out)
+        self.assertIn('function calls', out.getvalue())
+
+    def test_report(self):
+        records = [
+            {'time': '', 'method': 'GET', 'path': '/api/listing/', 'route': 'files', 'status': 200,
+             'wall_ms': wall, 'cpu_ms': 1.0, 'queries': 12, 'query_ms': 2.0, 'duplicate_queries': 10,
+             'identical_queries': 0, 'duplicates': [{'sql': 'SELECT 1 FROM t WHERE id = %s', 'count': 11}],
+             'profile': 'files-1-1.prof' if wall > 100 else None}
+            for wall in (10.0, 20.0, 300.0)
+        ]
+        with open(os.path.join(self.directory, 'requests-1.ndjson'), 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+            f.write('{"truncated"')
+
+        out = io.StringIO()
+        call_command('profile_report', dir=self.directory, stdout=out)
+        report = out.getvalue()
+        self.assertIn('3 requests, 1 routes', report)
+        self.assertRegex(report, r'files\s+3\s+20\.0\s+300\.0\s+300\.0')
+        self.assertIn('30 extra in 3 requests (max 11/request) [files]', report)
+        self.assertIn('files-1-1.prof', report)
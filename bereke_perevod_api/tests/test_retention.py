@@ -0,0 +1,115 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bereke_perevod_api import retention
+from bereke_perevod_api.models import CollectionVersion, IssuanceJob, UploadedP12
+from bereke_perevod_api.storage import get_blob_storage
+
+
+def create_cert(name, age_days=0, data=None):
+    cert = UploadedP12.objects.create(filename=f'{name}.p12', file_data=data or name.encode())
+    if age_days:
+        UploadedP12.objects.filter(pk=cert.pk).update(uploaded_at=timezone.now() - datetime.timedelta(days=age_days))
+    return cert
+
+
+class DeleteInBatchesTest(TestCase):
+    def test_batches_bump_version_once_per_batch(self):
+        certs = [create_cert(f'cert_{i}') for i in range(5)]
+        version, _ = CollectionVersion.current(CollectionVersion.CERTIFICATES)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = retention.delete_in_batches(UploadedP12.objects.filter(id__in=[c.pk for c in certs[:4]]),
+                                                  batch_size=2)
+
+        self.assertEqual(deleted, 4)
+        self.assertEqual(list(UploadedP12.objects.values_list('id', flat=True)), [certs[4].pk])
+        self.assertEqual(CollectionVersion.current(CollectionVersion.CERTIFICATES)[0], version + 2)
+
+    def test_orphaned_blobs_removed_shared_blobs_kept(self):
+        old = create_cert('old', data=b'shared')
+        keep = create_cert('keep', data=b'shared')
+        lone = create_cert('lone', data=b'lone')
+        storage = get_blob_storage()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            retention.delete_in_batches(UploadedP12.objects.filter(id__in=[old.pk, lone.pk]))
+
+        self.assertTrue(storage.exists(keep.blob_key))
+        self.assertFalse(storage.exists(lone.blob_key))
+
+    def test_issuance_job_results_are_unlinked(self):
+        cert = create_cert('job')
+        job = IssuanceJob.objects.create(spec={}, result=cert, status=IssuanceJob.STATUS_DONE)
+        retention.delete_in_batches(UploadedP12.objects.all())
+        job.refresh_from_db()
+        self.assertIsNone(job.result_id)
+
+
+class CertBulkDeleteViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.url = reverse('file-delete-bulk')
+
+    def test_delete_by_ids(self):
+        certs = [create_cert(f'cert_{i}') for i in range(3)]
+        response = self.client.post(self.url, {'ids': [certs[0].pk, certs[2].pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'deleted': 2})
+        self.assertEqual(list(UploadedP12.objects.values_list('id', flat=True)), [certs[1].pk])
+
+    def test_delete_by_filter(self):
+        create_cert('asanov')
+        create_cert('ivanov')
+        response = self.client.post(self.url, {'filter': {'search': 'ivanov'}}, format='json')
+        self.assertEqual(response.data, {'deleted': 1})
+        self.assertEqual(list(UploadedP12.objects.values_list('filename', flat=True)), ['asanov.p12'])
+
+    def test_requires_ids_or_filter(self):
+        create_cert('asanov')
+        for body in ({}, {'filter': {}}, {'filter': {'ordering': 'relevance'}}, {'ids': ['1']}):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+        self.assertEqual(UploadedP12.objects.count(), 1)
+
+    def test_rejects_filters_that_would_match_everything(self):
+        create_cert('asanov')
+        for filters in ({'date_to': '31.12.2024'}, {'search': '   '}, {'date_from': 20240101},
+                        {'serial': '::'}, {'date_to': '2024-12-31', 'owner': 'asanov'}):
+            response = self.client.post(self.url, {'filter': filters}, format='json')
+            self.assertEqual(response.status_code, 400, filters)
+            self.assertIn('filter', response.data)
+        self.assertEqual(UploadedP12.objects.count(), 1)
+
+
+class PurgeCertificatesCommandTest(TestCase):
+    def test_purge_older_than(self):
+        create_cert('old', age_days=400)
+        create_cert('older', age_days=800)
+        create_cert('fresh', age_days=10)
+
+        out = StringIO()
+        call_command('purge_certificates', '--older-than', '365', '--dry-run', stdout=out)
+        self.assertIn('2 certificate(s) would be deleted', out.getvalue())
+        self.assertEqual(UploadedP12.objects.count(), 3)
+
+        call_command('purge_certificates', '--older-than', '365', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(list(UploadedP12.objects.values_list('filename', flat=True)), ['fresh.p12'])
+
+    def test_incremental_vacuum(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        # В транзакции теста VACUUM недоступен; без auto_vacuum=INCREMENTAL функция ничего не делает
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum')
+            mode = cursor.fetchone()[0]
+        self.assertEqual(retention.incremental_vacuum(), mode == 2)
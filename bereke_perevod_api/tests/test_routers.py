@@ -0,0 +1,110 @@
+import io
+
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.views import View
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.routers import STICKY_COOKIE, ReplicaRoutingMiddleware, replica_reads
+
+
+def read_alias():
+    return router.db_for_read(UploadedP12)
+
+
+class ReadView(View):
+    use_replica = True
+
+    def get(self, request):
+        return HttpResponse(read_alias())
+
+    def post(self, request):
+        return HttpResponse(read_alias())
+
+
+@replica_reads
+def stream_view(request):
+    return StreamingHttpResponse(read_alias() for _ in range(2))
+
+
+def write_view(request):
+    UploadedP12.objects.filter(pk=0).delete()
+    return HttpResponse(read_alias())
+
+
+# TransactionTestCase: внутри транзакции TestCase роутер всегда читает с primary
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingMiddlewareTest(TransactionTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, view, request):
+        def get_response(request):
+            return middleware.process_view(request, view, (), {}) or view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request)
+
+    def test_safe_request_of_read_only_view_uses_replica(self):
+        response = self.call(ReadView.as_view(), self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        # после запроса чтение снова идёт с primary
+        self.assertEqual(read_alias(), 'default')
+
+    def test_unsafe_method_and_unmarked_view_use_primary(self):
+        self.assertEqual(self.call(ReadView.as_view(), self.factory.post('/')).content, b'default')
+        self.assertEqual(self.call(write_view, self.factory.get('/')).content, b'default')
+
+    def test_sticky_cookie_pins_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.call(ReadView.as_view(), request).content, b'default')
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.call(write_view, self.factory.get('/'))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertNotIn(STICKY_COOKIE, self.call(ReadView.as_view(), self.factory.get('/')).cookies)
+
+    def test_streaming_content_reads_from_replica(self):
+        response = self.call(stream_view, self.factory.get('/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replica1replica1')
+        self.assertEqual(read_alias(), 'default')
+
+    def test_file_response_keeps_file_to_stream(self):
+        @replica_reads
+        def file_view(request):
+            return FileResponse(io.BytesIO(b'payload'))
+
+        response = self.call(file_view, self.factory.get('/'))
+        self.assertIsNotNone(response.file_to_stream)
+        self.assertEqual(b''.join(response.streaming_content), b'payload')
+
+    def test_primary_inside_transaction(self):
+        def view(request):
+            with transaction.atomic():
+                return HttpResponse(read_alias())
+        view.use_replica = True
+        self.assertEqual(self.call(view, self.factory.get('/')).content, b'default')
+
+
+# 'default' в роли реплики: маршрутизация проходит весь стек, не требуя второй базы
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingIntegrationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.cert = UploadedP12.objects.create(filename='replica.p12', file_data=b'data')
+
+    def test_listing_and_delete(self):
+        response = self.client.get(reverse('files'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        response = self.client.delete(reverse('file-delete', kwargs={'pk': self.cert.pk}))
+        self.assertIn(response.status_code, (200, 204))
+        self.assertIn(STICKY_COOKIE, response.cookies)
@@ -0,0 +1,61 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from bereke_perevod_api import schema
+
+
+class CachedSchemaTest(TestCase):
+    def setUp(self):
+        schema.reset_schema_documents()
+        self.addCleanup(schema.reset_schema_documents)
+
+    def test_schema_is_generated_once(self):
+        with mock.patch.object(schema, 'render_schema', wraps=schema.render_schema) as render:
+            first = self.client.get('/swagger.json')
+            second = self.client.get('/swagger.json')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('/listing/', json.loads(first.content)['paths'])
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/swagger.yaml')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/yaml'))
+
+        response = self.client.get('/swagger.yaml', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_gzip(self):
+        plain = self.client.get('/swagger.json')
+        response = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_ui_uses_spec_url(self):
+        with mock.patch.object(schema, 'render_schema') as render:
+            response = self.client.get('/swagger/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'/swagger.json', response.content)
+        render.assert_not_called()
+
+    def test_generate_openapi_command(self):
+        with tempfile.TemporaryDirectory() as output:
+            call_command('generate_openapi', output=output, stdout=StringIO())
+            with open(os.path.join(output, 'openapi.json'), 'rb') as f:
+                body = f.read()
+            with open(os.path.join(output, 'openapi.json.gz'), 'rb') as f:
+                self.assertEqual(gzip.decompress(f.read()), body)
+            self.assertTrue(os.path.exists(os.path.join(output, 'openapi.yaml.gz')))
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import UploadedP12
+from bereke_perevod_api.search import FTS_TABLE, SQLITE_TRIGGERS, install_search_index, normalize_filename
+
+
+class NormalizeFilenameTest(TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_filename('25AB_asan.Asanov-p12'), '25ab asan asanov p12')
+        self.assertEqual(normalize_filename('  asan   asanov '), 'asan asanov')
+        self.assertEqual(normalize_filename(None), '')
+
+
+class FilenameSearchTest(TestCase):
+    def setUp(self):
+        self.asanov = UploadedP12.objects.create(filename='25AB_asan.asanov.p12', file_data=b'1')
+        self.ivanov = UploadedP12.objects.create(filename='99ZZ_ivan.ivanov.p12', file_data=b'2')
+        self.prefix = UploadedP12.objects.create(filename='asanov_backup.p12', file_data=b'3')
+
+    def search(self, term, **kwargs):
+        return list(UploadedP12.objects.search(term, **kwargs).order_by('id'))
+
+    def test_separator_tolerant_search(self):
+        self.assertEqual(self.search('asan.asanov'), [self.asanov])
+        self.assertEqual(self.search('ASAN ASANOV'), [self.asanov])
+        self.assertEqual(self.search('25ab_asan'), [self.asanov])
+        self.assertEqual(self.search('ivanov'), [self.ivanov])
+
+    def test_uses_fts_index_on_sqlite(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 index is SQLite-specific')
+        with CaptureQueriesContext(connection) as ctx:
+            self.search('asanov')
+        self.assertIn(FTS_TABLE, ctx.captured_queries[-1]['sql'])
+
+    def test_short_term_falls_back_to_like(self):
+        self.assertEqual(self.search('zz'), [self.ivanov])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.ivanov.filename = 'petrov.p12'
+        self.ivanov.save()
+        self.assertEqual(self.search('ivanov'), [])
+        self.assertEqual(self.search('petrov'), [self.ivanov])
+
+        self.ivanov.delete()
+        self.assertEqual(self.search('petrov'), [])
+
+    def test_ranked_search(self):
+        results = list(UploadedP12.objects.search('asanov', ranked=True))
+        self.assertEqual(results, [self.prefix, self.asanov])
+
+    def test_install_restores_missing_triggers(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 index is SQLite-specific')
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        UploadedP12.objects.create(filename='sidorov.p12', file_data=b'4')
+
+        install_search_index(connection)
+
+        self.assertEqual(len(self.search('sidorov')), 1)
+
+
+class CertListSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        UploadedP12.objects.create(filename='25AB_asan.asanov.p12', file_data=b'1')
+        UploadedP12.objects.create(filename='asanov_backup.p12', file_data=b'2')
+
+    def test_relevance_ordering(self):
+        response = self.client.get(reverse('files'), {'search': 'asanov', 'ordering': 'relevance'})
+        self.assertEqual([item['filename'] for item in response.data['results']],
+                         ['asanov_backup.p12', '25AB_asan.asanov.p12'])
@@ -58,9 +58,23 @@ class CertCreateSerializerTest(TestCase):
         obj = serializer.save()
         self.assertIsNotNone(obj)
         self.assertEqual(obj.filename, self.valid_data['filename'] + '.p12')
-        self.assertTrue(obj.file_data)  # Данные сертификата должны присутствовать в файле
+        self.assertTrue(obj.read_payload())  # Данные сертификата должны присутствовать в хранилище
         self.assertTrue(UploadedP12.objects.filter(id=obj.id).exists())
 
+    def test_create_stores_certificate_fields(self):
+        """Поля X.509 сохраняются в отдельных колонках при выпуске"""
+        serializer = CertCreateSerializer(data=self.valid_data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        obj = UploadedP12.objects.get(pk=serializer.save().pk)
+        self.assertEqual(obj.subject_cn, 'Иван Иванов')
+        self.assertEqual(obj.subject_o, 'Айыл Банк')
+        self.assertEqual(obj.subject_c, 'KG')
+        self.assertEqual(obj.key_algorithm, 'RSA')
+        self.assertEqual(obj.key_size, 2048)
+        self.assertEqual((obj.not_after - obj.not_before).days, 365)
+        self.assertEqual(len(obj.fingerprint_sha256), 64)
+        self.assertTrue(obj.serial_number)
+
 
 class UploadedP12SerializerTest(TestCase):
     def setUp(self):
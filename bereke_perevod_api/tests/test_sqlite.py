@@ -0,0 +1,87 @@
+import io
+import os
+import sqlite3
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from unittest import skipUnless
+
+from bereke_perevod_api.management.commands.benchmark_sqlite import PROFILES
+from bereke_perevod_api.sqlite import PRODUCTION_PRAGMAS, apply_pragmas, pragma_statements
+
+
+class PragmaStatementsTest(SimpleTestCase):
+    def test_renders_keywords_and_numbers(self):
+        self.assertEqual(
+            pragma_statements({'journal_mode': 'WAL', 'busy_timeout': 5000, 'cache_size': -65536}),
+            ['PRAGMA journal_mode = WAL', 'PRAGMA busy_timeout = 5000', 'PRAGMA cache_size = -65536'],
+        )
+
+    def test_rejects_invalid_names_and_values(self):
+        with self.assertRaises(ValueError):
+            pragma_statements({'journal_mode; DROP TABLE x': 'WAL'})
+        with self.assertRaises(ValueError):
+            pragma_statements({'synchronous': 'NORMAL; DROP TABLE x'})
+        with self.assertRaises(ValueError):
+            pragma_statements({'busy_timeout': '5000 ms'})
+
+    def test_benchmark_uses_production_pragmas(self):
+        self.assertIs(PROFILES['production']['pragmas'], PRODUCTION_PRAGMAS)
+        self.assertEqual(len(pragma_statements(PRODUCTION_PRAGMAS)), len(PRODUCTION_PRAGMAS))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite only')
+class ApplyPragmasTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.raw = sqlite3.connect(os.path.join(self.tmp.name, 'db.sqlite3'))
+        self.addCleanup(self.raw.close)
+
+    def pragma(self, name):
+        return self.raw.execute(f'PRAGMA {name}').fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 4321})
+    def test_applies_configured_pragmas(self):
+        apply_pragmas(sender=None, connection=_Connection(self.raw))
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 4321)
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_noop_without_profile(self):
+        apply_pragmas(sender=None, connection=_Connection(self.raw))
+        self.assertEqual(self.pragma('journal_mode'), 'delete')
+
+
+class _Connection:
+    """Stand-in for a DatabaseWrapper: apply_pragmas only needs vendor and a cursor context manager."""
+    vendor = 'sqlite'
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self):
+        return _Cursor(self.raw)
+
+
+class _Cursor:
+    def __init__(self, raw):
+        self.cursor = raw.cursor()
+
+    def __enter__(self):
+        return self.cursor
+
+    def __exit__(self, *exc):
+        self.cursor.close()
+
+
+class BenchmarkCommandTest(SimpleTestCase):
+    def test_reports_both_profiles(self):
+        out = io.StringIO()
+        call_command('benchmark_sqlite', workers=2, seconds=0.3, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('req/s', lines[0])
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['default', 'production'])
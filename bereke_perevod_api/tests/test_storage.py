@@ -0,0 +1,146 @@
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api.models import PayloadBlob, UploadedP12
+from bereke_perevod_api.storage import DatabaseBlobStorage, LocalBlobStorage, get_blob_storage
+
+
+class LocalBlobStorageTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = LocalBlobStorage(self.location)
+
+    def test_save_is_content_addressed_and_sharded(self):
+        data = b'test binary data'
+        key = self.storage.save(data)
+        self.assertEqual(key, hashlib.sha256(data).hexdigest())
+        self.assertEqual(self.storage.path(key), os.path.join(self.location, key[:2], key[2:4], key))
+        with self.storage.open(key) as f:
+            self.assertEqual(f.read(), data)
+        # повторное сохранение того же содержимого даёт тот же ключ
+        self.assertEqual(self.storage.save(data), key)
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(key))), [key])
+
+    def test_delete(self):
+        key = self.storage.save(b'data')
+        self.storage.delete(key)
+        self.assertFalse(self.storage.exists(key))
+        self.storage.delete(key)  # удаление отсутствующего ключа не падает
+
+    def test_delete_keeps_payload_saved_again(self):
+        key = self.storage.save(b'data')
+        os.utime(self.storage.path(key), (1, 1))
+        deleted_at = time.time()
+        self.storage.save(b'data')  # параллельный запрос сохранил то же содержимое
+        self.storage.delete(key, saved_before=deleted_at)
+        self.assertTrue(self.storage.exists(key))
+        self.storage.delete(key, saved_before=time.time() + 1)
+        self.assertFalse(self.storage.exists(key))
+
+
+class DatabaseBlobStorageTest(TestCase):
+    def setUp(self):
+        self.storage = DatabaseBlobStorage(chunk_size=4)
+
+    def test_save_is_content_addressed(self):
+        data = b'test binary data'
+        key = self.storage.save(data)
+        self.assertEqual(key, hashlib.sha256(data).hexdigest())
+        self.assertEqual(self.storage.save(data), key)
+        self.assertEqual(PayloadBlob.objects.count(), 1)
+        with self.storage.open(key) as f:
+            self.assertEqual(f.read(), data)
+
+    def test_open_reads_in_chunks_and_seeks(self):
+        key = self.storage.save(b'0123456789')
+        with self.storage.open(key) as f:
+            self.assertEqual(f.read(3), b'012')
+            f.seek(-2, io.SEEK_END)
+            self.assertEqual(f.read(), b'89')
+            f.seek(4)
+            self.assertEqual(f.read(100), b'456789')
+
+    def test_delete_and_missing_key(self):
+        key = self.storage.save(b'data')
+        self.storage.delete(key)
+        self.assertFalse(self.storage.exists(key))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open(key)
+
+    def test_delete_keeps_payload_saved_again(self):
+        key = self.storage.save(b'data')
+        PayloadBlob.objects.filter(key=key).update(created_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+        deleted_at = time.time()
+        self.storage.save(b'data')
+        self.storage.delete(key, saved_before=deleted_at)
+        self.assertTrue(self.storage.exists(key))
+
+    @override_settings(CERT_BLOB_STORAGE={'BACKEND': 'bereke_perevod_api.storage.DatabaseBlobStorage'})
+    def test_certificate_payload_and_range_download(self):
+        cert = UploadedP12.objects.create(filename='db.p12', file_data=b'0123456789')
+        self.assertTrue(PayloadBlob.objects.filter(key=cert.blob_key).exists())
+        self.assertEqual(cert.read_payload(), b'0123456789')
+
+        client = APIClient()
+        User.objects.create_user(username='testuser', password='testpass123')
+        client.login(username='testuser', password='testpass123')
+        response = client.get(reverse('file-download', kwargs={'pk': cert.pk}), HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+
+class UploadedP12BlobTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        settings_override = override_settings(CERT_BLOB_STORAGE={
+            'BACKEND': 'bereke_perevod_api.storage.LocalBlobStorage',
+            'OPTIONS': {'location': self.location},
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_save_moves_payload_to_storage(self):
+        cert = UploadedP12.objects.create(filename='testcert.p12', file_data=b'test binary data')
+        cert.refresh_from_db()
+        self.assertIsNone(cert.file_data)
+        self.assertEqual(cert.size, 16)
+        self.assertEqual(cert.sha256, hashlib.sha256(b'test binary data').hexdigest())
+        self.assertTrue(get_blob_storage().exists(cert.blob_key))
+        self.assertEqual(cert.read_payload(), b'test binary data')
+
+    def test_delete_removes_unreferenced_blob(self):
+        first = UploadedP12.objects.create(filename='a.p12', file_data=b'same')
+        second = UploadedP12.objects.create(filename='b.p12', file_data=b'same')
+        key = first.blob_key
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(get_blob_storage().exists(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(get_blob_storage().exists(key))
+
+    def test_migrate_blobs_command(self):
+        legacy = UploadedP12.objects.create(filename='legacy.p12', file_data=b'x')
+        UploadedP12.objects.filter(pk=legacy.pk).update(file_data=b'legacy data', blob_key='', size=None, sha256='')
+
+        call_command('migrate_blobs', batch_size=1, stdout=io.StringIO())
+
+        legacy.refresh_from_db()
+        self.assertIsNone(legacy.file_data)
+        self.assertTrue(legacy.blob_key)
+        self.assertEqual(legacy.read_payload(), b'legacy data')
@@ -0,0 +1,75 @@
+import re
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bereke_perevod_api import metrics
+from bereke_perevod_api.timing import ISSUANCE_STAGES, StageTimer
+
+
+SPEC = {
+    'filename': 'timed',
+    'expiration': 30,
+    'password': 'strongpass123',
+    'password2': 'strongpass123',
+    'full_name': 'Иван Иванов',
+    'department': 'IT',
+    'organization': 'Айыл Банк',
+    'city': 'г.Бишкек',
+    'region': 'Чуй',
+    'country_code': 'KG',
+}
+
+
+class StageTimerTest(TestCase):
+    def test_server_timing_header(self):
+        timer = StageTimer()
+        timer.add('keygen', 0.012)
+        timer.add('db', 0.002)
+        timer.add('db', 0.001)
+        self.assertEqual(timer.server_timing(), 'keygen;dur=12.000, db;dur=3.000, total;dur=15.000')
+
+    def test_stage_measures_elapsed_time(self):
+        timer = StageTimer()
+        with timer.stage('sign'):
+            pass
+        self.assertGreaterEqual(timer.stages['sign'], 0.0)
+
+
+class IssuanceTimingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+
+    def test_create_emits_server_timing_and_feeds_histograms(self):
+        before = metrics.ISSUANCE_STAGE_DURATION.snapshot('stage').get('pkcs12', {}).get('count', 0)
+
+        response = self.client.post(reverse('file-create'), data=SPEC, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        names = re.findall(r'(\w+);dur=[\d.]+', response['Server-Timing'])
+        self.assertEqual(names, ['keygen', 'sign', 'pkcs12', 'dispatch', 'blob', 'db', 'total'])
+        self.assertEqual(metrics.ISSUANCE_STAGE_DURATION.snapshot('stage')['pkcs12']['count'], before + 1)
+
+    @override_settings(CERT_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.post(reverse('file-create'), data=SPEC, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_timings_endpoint(self):
+        self.client.post(reverse('file-create'), data=SPEC, format='json')
+
+        response = self.client.get(reverse('issuance-timings'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(response.data['keygen']['count'], 1)
+        self.assertEqual(response.data['keygen']['buckets'][-1][0], '+Inf')
+        self.assertEqual(list(response.data), list(ISSUANCE_STAGES))
+
+    def test_timings_endpoint_requires_admin(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.assertEqual(self.client.get(reverse('issuance-timings')).status_code, 403)
@@ -1,7 +1,9 @@
 import datetime
 
+from django.db import connection
 from django.http import Http404
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import make_aware
 from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from django.urls import reverse
@@ -177,3 +179,69 @@ class FileDownloadViewTest(TestCase):
 
         response = FileDownloadView.as_view()(request, pk=99999)
         self.assertEqual(response.status_code, 404)
+
+
+class MetadataQueryTest(TestCase):
+    """Списки, детали и удаление не должны читать содержимое .p12 из базы"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        self.cert = UploadedP12.objects.create(filename='testcert.p12', file_data=b'test binary data')
+
+    def assertNoBlobQueries(self, url, method='get'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(any('uploadedp12' in sql for sql in selects))
+        self.assertFalse(any('"file_data"' in sql for sql in selects), selects)
+
+    def test_api_listing(self):
+        self.assertNoBlobQueries(reverse('files'))
+
+    def test_api_detail(self):
+        self.assertNoBlobQueries(reverse('file-detail', kwargs={'pk': self.cert.pk}))
+
+    def test_html_listing(self):
+        self.assertNoBlobQueries(reverse('detail'))
+
+    def test_admin_changelist(self):
+        self.assertNoBlobQueries(reverse('admin:bereke_perevod_api_uploadedp12_changelist'))
+
+    def test_api_delete(self):
+        self.assertNoBlobQueries(reverse('file-delete', kwargs={'pk': self.cert.pk}), method='delete')
+
+
+class CertListDateRangeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        for day in (9, 10, 11):
+            cert = UploadedP12.objects.create(filename=f'cert_{day}.p12', file_data=b'data')
+            UploadedP12.objects.filter(pk=cert.pk).update(
+                uploaded_at=make_aware(datetime.datetime(2025, 7, day, 23, 59, 59))
+            )
+        self.url = reverse('files')
+
+    def filenames(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['filename'] for item in response.data['results']]
+
+    def test_single_day_is_half_open_range(self):
+        self.assertEqual(self.filenames({'date': '2025-07-10'}), ['cert_10.p12'])
+
+    def test_date_range_is_inclusive(self):
+        self.assertEqual(self.filenames({'date_from': '2025-07-10', 'date_to': '2025-07-11'}),
+                         ['cert_11.p12', 'cert_10.p12'])
+        self.assertEqual(self.filenames({'date_to': '2025-07-09'}), ['cert_9.p12'])
+
+    def test_invalid_date_is_ignored(self):
+        self.assertEqual(len(self.filenames({'date': '2025-13-45'})), 3)
+
+    def test_html_view_date_range(self):
+        response = self.client.get(reverse('detail'), {'date_from': '2025-07-11'})
+        self.assertEqual([f.filename for f in response.context['files']], ['cert_11.p12'])
@@ -0,0 +1,33 @@
+import time
+from contextlib import contextmanager
+
+# Этапы выпуска в порядке выполнения: ключ из пула, подпись, упаковка PKCS#12, доставка в/из
+# пула процессов, запись в blob-хранилище и вставка строки в БД
+ISSUANCE_STAGES = ('keygen', 'sign', 'pkcs12', 'dispatch', 'blob', 'db')
+
+
+class StageTimer:
+    """Accumulates wall time per named stage, measured with the monotonic perf_counter."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + max(seconds, 0.0)
+
+    def total(self):
+        return sum(self.stages.values())
+
+    def server_timing(self):
+        """Value of the Server-Timing header: `keygen;dur=12.3, sign;dur=0.4, ..., total;dur=15.1` (ms)."""
+        metrics = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.stages.items()]
+        metrics.append(f'total;dur={self.total() * 1000:.3f}')
+        return ', '.join(metrics)
@@ -4,9 +4,20 @@ from . import views
 
 urlpatterns = [
     path('create/', views.CertCreateView.as_view(),name='file-create'),
+    path('create/batch/', views.CertBatchCreateView.as_view(), name='file-create-batch'),
+    path('import/', views.CertImportView.as_view(), name='file-import'),
+    path('jobs/<int:pk>/', views.IssuanceJobDetailView.as_view(), name='job-detail'),
     path('delete/<int:pk>', views.CertDeleteView.as_view(), name='file-delete'),
+    path('delete/bulk/', views.CertBulkDeleteView.as_view(), name='file-delete-bulk'),
 
     path('listing/', views.CertListView.as_view(), name='files'),
+    path('listing/count/', views.CertCountView.as_view(), name='files-count'),
     path('listing/<int:pk>/', views.CertDetailView.as_view(), name='file-detail'),
     path('download/<int:pk>/', views.FileDownloadView.as_view(), name='file-download'),
+
+    path('export/', views.CertExportView.as_view(), name='files-export'),
+    path('expiring/', views.ExpiringCertificatesView.as_view(), name='expiring'),
+
+    path('keypool/', views.KeyPoolStatsView.as_view(), name='keypool-stats'),
+    path('issuance/timings/', views.IssuanceTimingsView.as_view(), name='issuance-timings'),
 ]
\ No newline at end of file
@@ -1,18 +1,34 @@
-import io
-import re
-
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
-from django.http import Http404, FileResponse
+from rest_framework.parsers import JSONParser, MultiPartParser
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from .auth import CsrfExemptSessionAuthentication
-from .models import UploadedP12
-from .serializers import CertCreateSerializer, UploadedP12Serializer
+from . import batch, expiry, export, importer, jobs, metrics, retention
+from .auth import ApiTokenAuthentication, CsrfExemptSessionAuthentication, MetricsAccess
+from .conditional import listing_validators, metadata_etag, not_modified, set_validators
+from .downloads import serve_payload
+from .filters import FILTER_PARAMS, filter_certificates, filter_errors
+from .keypool import get_key_pool
+from .models import IssuanceJob, UploadedP12
+from .pagination import KeysetPagination, approximate_count, wants_cursor_pagination
+from .serializers import CertCreateSerializer, IssuanceJobSerializer, UploadedP12Serializer
+from .timing import ISSUANCE_STAGES
+
+
+def wants_async(request):
+    """Async issuance is requested with ?async=true or the `Prefer: respond-async` header."""
+    if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
 
 
 class CertCreateView(APIView):
@@ -20,9 +36,21 @@ class CertCreateView(APIView):
     Accepts form data, generates a pseudo .p12 certificate as plain text,
     and saves it in the database as binary content.
     Returns a success message if creation is successful, otherwise returns validation errors.
+    In async mode (?async=true) the certificate is built by a background worker and
+    the response is 202 with the id of the issuance job.
     """
-    authentication_classes = [CsrfExemptSessionAuthentication]
+    authentication_classes = [CsrfExemptSessionAuthentication, ApiTokenAuthentication]
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='async',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description='Выпустить сертификат в фоне и сразу вернуть id задачи (202)',
+                example=True
+            )
+        ],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             required=[
@@ -48,6 +76,17 @@ class CertCreateView(APIView):
                 description="Успешное создание",
                 examples={"application/json": {"message": "Сертификат создан"}}
             ),
+            202: openapi.Response(
+                description="Задача выпуска поставлена в очередь",
+                examples={
+                    "application/json": {
+                        "message": "Сертификат поставлен в очередь",
+                        "job_id": 12,
+                        "status": "pending",
+                        "status_url": "http://localhost:8000/api/jobs/12/"
+                    }
+                }
+            ),
             400: openapi.Response(
                 description="Ошибки валидации",
                 examples={
@@ -56,6 +95,18 @@ class CertCreateView(APIView):
                         "expiration": ["Срок действия (expiration) должен быть от 1 до 365 дней."]
                     }
                 }
+            ),
+            503: openapi.Response(
+                description="Бэкенд выпуска перегружен (см. заголовок Retry-After)",
+                examples={
+                    "application/json": {"detail": "Сервис выпуска сертификатов перегружен, повторите запрос позже."}
+                }
+            ),
+            504: openapi.Response(
+                description="Превышено время выпуска сертификата",
+                examples={
+                    "application/json": {"detail": "Превышено время ожидания выпуска сертификата."}
+                }
             )
         },
         operation_summary="Создание сертификата",
@@ -65,11 +116,197 @@ class CertCreateView(APIView):
     def post(self, request):
         serializer = CertCreateSerializer(data=request.data)
         if serializer.is_valid():
+            if wants_async(request):
+                job = jobs.enqueue(serializer.validated_data, user=request.user)
+                status_url = reverse('job-detail', kwargs={'pk': job.pk}, request=request)
+                return Response({
+                    'message': 'Сертификат поставлен в очередь',
+                    'job_id': job.pk,
+                    'status': job.status,
+                    'status_url': status_url,
+                }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
             serializer.save()
-            return Response({'message': 'Сертификат создан'}, status=status.HTTP_201_CREATED)
+            response = Response({'message': 'Сертификат создан'}, status=status.HTTP_201_CREATED)
+            if getattr(settings, 'CERT_SERVER_TIMING', True):
+                response['Server-Timing'] = serializer.timings.server_timing()
+            return response
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CertBatchCreateView(APIView):
+    """
+    Creates many certificates in one request.
+
+    Accepts a JSON array of the same objects as /api/create/ or an uploaded CSV/NDJSON file.
+    All items are validated up front, built in parallel and stored with bulk_create;
+    the response lists the result of every item, so partial failures are reported per index.
+    """
+    authentication_classes = [CsrfExemptSessionAuthentication, ApiTokenAuthentication]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'filename': openapi.Schema(type=openapi.TYPE_STRING, example='my_certificate'),
+                    'expiration': openapi.Schema(type=openapi.TYPE_INTEGER, example=365),
+                    'password': openapi.Schema(type=openapi.TYPE_STRING, format='password', example='secret123'),
+                    'password2': openapi.Schema(type=openapi.TYPE_STRING, format='password', example='secret123'),
+                    'full_name': openapi.Schema(type=openapi.TYPE_STRING, example='John Doe'),
+                    'department': openapi.Schema(type=openapi.TYPE_STRING, example='IT Department'),
+                    'organization': openapi.Schema(type=openapi.TYPE_STRING, example='MyCompany'),
+                    'city': openapi.Schema(type=openapi.TYPE_STRING, example='Bishkek'),
+                    'region': openapi.Schema(type=openapi.TYPE_STRING, example='Chuy'),
+                    'country_code': openapi.Schema(type=openapi.TYPE_STRING, example='KG'),
+                }
+            )
+        ),
+        responses={
+            201: openapi.Response(
+                description="Все сертификаты созданы",
+                examples={
+                    "application/json": {
+                        "created": 2,
+                        "failed": 0,
+                        "results": [
+                            {"index": 0, "status": "created", "id": 10, "filename": "asanov.p12"},
+                            {"index": 1, "status": "created", "id": 11, "filename": "ivanov.p12"}
+                        ]
+                    }
+                }
+            ),
+            207: openapi.Response(
+                description="Часть сертификатов не создана",
+                examples={
+                    "application/json": {
+                        "created": 1,
+                        "failed": 1,
+                        "results": [
+                            {"index": 0, "status": "created", "id": 10, "filename": "asanov.p12"},
+                            {"index": 1, "status": "error", "errors": {"non_field_errors": ["Пароли не совпадают."]}}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Ни один сертификат не создан или неверный формат запроса",
+                examples={"application/json": {"error": "Ожидается массив сертификатов или файл (CSV/NDJSON)."}}
+            )
+        },
+        operation_summary="Пакетное создание сертификатов",
+        operation_description="Создаёт сертификаты из JSON массива или загруженного CSV/NDJSON файла (поле file)."
+    )
+    def post(self, request):
+        try:
+            items = batch.parse_items(request)
+        except batch.BatchParseError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_items = getattr(settings, 'CERT_BATCH_MAX_ITEMS', 1000)
+        if not items:
+            return Response({"error": "Пустой список сертификатов."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_items:
+            return Response({"error": f"Не более {max_items} сертификатов за один запрос."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = batch.create_batch(items)
+        created = sum(1 for r in results if r['status'] == 'created')
+        failed = len(results) - created
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({'created': created, 'failed': failed, 'results': results}, status=response_status)
+
+
+class CertImportView(APIView):
+    """
+    Imports existing .p12 files (or ZIP archives of them) issued elsewhere.
+    Files are parsed in the batch backend with the given passwords, certificates already
+    stored (same SHA-256 fingerprint) are skipped and the rest is inserted in batches.
+    """
+    authentication_classes = [CsrfExemptSessionAuthentication, ApiTokenAuthentication]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='file',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=True,
+                description='Файлы .p12/.pfx или ZIP архивы (можно несколько)'
+            ),
+            openapi.Parameter(
+                name='passwords',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='JSON объект {"имя файла": "пароль"}'
+            ),
+            openapi.Parameter(
+                name='password',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='Пароль, который пробуется для всех файлов (можно несколько)'
+            )
+        ],
+        responses={
+            201: openapi.Response(
+                description="Все файлы импортированы или уже были в базе",
+                examples={
+                    "application/json": {
+                        "processed": 3, "imported": 2, "duplicates": 1, "failed": 0,
+                        "skipped": [{"file": "old/asanov.p12", "reason": "duplicate", "id": 41, "duplicate_of": None}],
+                        "errors": [], "seconds": 0.412, "files_per_second": 7.3
+                    }
+                }
+            ),
+            207: openapi.Response(
+                description="Часть файлов не импортирована",
+                examples={
+                    "application/json": {
+                        "processed": 2, "imported": 1, "duplicates": 0, "failed": 1, "skipped": [],
+                        "errors": [{"file": "ivanov.p12",
+                                    "error": "Не удалось открыть PKCS#12: неверный пароль или повреждённый файл"}],
+                        "seconds": 0.301, "files_per_second": 6.6
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Ни один файл не импортирован",
+                examples={"application/json": {"error": "Загрузите файлы .p12 или ZIP архив (поле file)."}}
+            )
+        },
+        operation_summary="Импорт сертификатов",
+        operation_description="Импортирует существующие .p12 файлы или ZIP архивы с ними и возвращает отчёт по каждому файлу."
+    )
+    def post(self, request):
+        uploads = request.FILES.getlist('file')
+        if not uploads:
+            return Response({"error": "Загрузите файлы .p12 или ZIP архив (поле file)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            password_map = importer.parse_password_map(request.data['passwords']) if request.data.get('passwords') else {}
+        except importer.P12ImportError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = importer.import_p12(importer.iter_uploads(uploads), password_map=password_map,
+                                     passwords=request.data.getlist('password'))
+        if report['failed'] and not report['imported']:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif report['failed']:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(report, status=response_status)
+
+
 class CertDeleteView(APIView):
     """
     Deletes a specific uploaded .p12 certificate by ID.
@@ -104,7 +341,7 @@ class CertDeleteView(APIView):
     )
     def delete(self, request, pk):
         try:
-            file_obj = UploadedP12.objects.get(pk=pk)
+            file_obj = UploadedP12.objects.metadata().get(pk=pk)
         except UploadedP12.DoesNotExist:
             return Response({"error": "Сертификат не найден!"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -112,12 +349,73 @@ class CertDeleteView(APIView):
         return Response({"message": "Сертификат удален!"}, status=status.HTTP_204_NO_CONTENT)
 
 
+class CertBulkDeleteView(APIView):
+    """
+    Deletes many certificates at once: by a list of ids or by the list filters.
+    Rows are deleted in short batched transactions (see retention.delete_in_batches).
+    """
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                                      example=[1, 2, 3]),
+                'filter': openapi.Schema(type=openapi.TYPE_OBJECT,
+                                         description='Фильтры списка: search, date, date_from, date_to, organization, ...',
+                                         example={'date_to': '2024-12-31'}),
+            }
+        ),
+        responses={
+            200: openapi.Response(
+                description="Сертификаты удалены",
+                examples={"application/json": {"deleted": 120}}
+            ),
+            400: openapi.Response(
+                description="Не указаны ids или фильтр, либо фильтр неверен",
+                examples={"application/json": {"error": "Неверные фильтры.",
+                                               "filter": {"date_to": "Ожидается дата в формате YYYY-MM-DD."}}}
+            )
+        },
+        operation_summary="Массовое удаление сертификатов",
+        operation_description="Удаляет сертификаты по списку идентификаторов или по фильтрам списка пачками в коротких транзакциях."
+    )
+    def post(self, request):
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+                return Response({"error": "ids должен быть списком целых чисел."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = UploadedP12.objects.filter(id__in=ids)
+        elif isinstance(filters, dict) and any(name in FILTER_PARAMS for name in filters):
+            # Удаление по тем же фильтрам, что и список, но строго: фильтр, который список молча
+            # пропустил бы (неверная дата, пустая строка), здесь удалил бы всю таблицу
+            errors = filter_errors(filters)
+            if errors:
+                return Response({"error": "Неверные фильтры.", "filter": errors}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = filter_certificates(UploadedP12.objects.all(), filters)
+            if not queryset.query.where:
+                return Response({"error": "Укажите список ids или хотя бы один фильтр."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            return Response({"error": "Укажите список ids или хотя бы один фильтр."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        deleted = retention.delete_in_batches(queryset)
+        return Response({"deleted": deleted})
+
+
 class CertListView(APIView):
     """
     Returns a list of uploaded .p12 certificates.
-    Supports partial search by filename (?search=) and optional filter by upload date (?date=YYYY-MM-DD).
+    Supports partial search by filename (?search=) and optional filter by upload date (?date=YYYY-MM-DD)
+    or date range (?date_from=&date_to=), and filters/ordering on certificate fields
+    (?organization=, ?common_name=, ?serial=, ?fingerprint=, ?expires_before=, ?ordering=not_after).
     Search is tolerant to symbols like -, _, . and spaces.
+    Responses carry an ETag derived from the collection version, so unchanged pages
+    are answered with 304 Not Modified without querying the certificates.
     """
+    use_replica = True
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter(
@@ -128,6 +426,15 @@ class CertListView(APIView):
                 description='Поиск по имени файла. Символы -, _, . и пробелы игнорируются.',
                 example='asanov'
             ),
+            openapi.Parameter(
+                name='ordering',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=['relevance', '-uploaded_at', 'uploaded_at', 'not_after', '-not_after', 'subject_cn', '-subject_cn'],
+                description='relevance — сначала совпадения с начала имени, затем с начала слова, затем по подстроке; '
+                            'not_after — по сроку действия; subject_cn — по владельцу. По умолчанию -uploaded_at',
+            ),
             openapi.Parameter(
                 name='date',
                 in_=openapi.IN_QUERY,
@@ -135,6 +442,92 @@ class CertListView(APIView):
                 required=False,
                 description='Фильтрация по дате загрузки (формат YYYY-MM-DD)',
                 example='2025-07-11'
+            ),
+            openapi.Parameter(
+                name='date_from',
+                in_=openapi.IN_QUERY,
+                type=openapi.FORMAT_DATE,
+                required=False,
+                description='Загружены не раньше этой даты (включительно, YYYY-MM-DD)',
+                example='2025-07-01'
+            ),
+            openapi.Parameter(
+                name='date_to',
+                in_=openapi.IN_QUERY,
+                type=openapi.FORMAT_DATE,
+                required=False,
+                description='Загружены не позже этой даты (включительно, YYYY-MM-DD)',
+                example='2025-07-31'
+            ),
+            openapi.Parameter(
+                name='organization',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='Организация (O) в subject сертификата, точное совпадение',
+                example='MyCompany'
+            ),
+            openapi.Parameter(
+                name='common_name',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='Владелец (CN) в subject сертификата, точное совпадение',
+                example='John Doe'
+            ),
+            openapi.Parameter(
+                name='serial',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='Серийный номер в hex (регистр и двоеточия не важны)',
+            ),
+            openapi.Parameter(
+                name='fingerprint',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='SHA-256 отпечаток сертификата в hex',
+            ),
+            openapi.Parameter(
+                name='key_algorithm',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=['RSA', 'EC', 'DSA', 'Ed25519', 'Ed448'],
+                description='Алгоритм ключа',
+            ),
+            openapi.Parameter(
+                name='expires_before',
+                in_=openapi.IN_QUERY,
+                type=openapi.FORMAT_DATE,
+                required=False,
+                description='Срок действия истекает раньше этой даты (YYYY-MM-DD)',
+                example='2026-01-01'
+            ),
+            openapi.Parameter(
+                name='expires_after',
+                in_=openapi.IN_QUERY,
+                type=openapi.FORMAT_DATE,
+                required=False,
+                description='Срок действия истекает не раньше этой даты (YYYY-MM-DD)',
+                example='2025-08-01'
+            ),
+            openapi.Parameter(
+                name='pagination',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=['cursor'],
+                description='cursor — постраничный вывод по курсору (next/previous без count); '
+                            'страницы не смещаются при добавлении новых сертификатов',
+            ),
+            openapi.Parameter(
+                name='cursor',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description='Курсор из ссылок next/previous предыдущего ответа',
             )
         ],
         responses={
@@ -149,7 +542,13 @@ class CertListView(APIView):
                             {
                                 "id": 1,
                                 "filename": "25AB_asan.asanov.p12",
-                                "uploaded_at": "2025-07-11T14:21:34Z"
+                                "uploaded_at": "2025-07-11T14:21:34Z",
+                                "serial_number": "3f1c0a9d2e",
+                                "subject_cn": "Asan Asanov",
+                                "subject_o": "MyCompany",
+                                "not_after": "2026-07-11T14:21:34Z",
+                                "key_algorithm": "RSA",
+                                "key_size": 2048
                             },
                             {
                                 "id": 2,
@@ -166,36 +565,67 @@ class CertListView(APIView):
     )
 
     def get(self, request):
-        search = request.query_params.get('search', '').strip()
-        date_str = request.query_params.get('date', '').strip()
+        # Версия коллекции проверяется до запроса списка и сериализации
+        etag, last_modified = listing_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
 
-        queryset = UploadedP12.objects.all()
+        queryset = filter_certificates(UploadedP12.objects.metadata(), request.query_params)
 
-        if search:
-            normalized_search = re.sub(r'[-_.]', ' ', search).lower()
-            queryset = queryset.filter(
-                Q(filename__icontains=search) |
-                Q(filename__icontains=normalized_search)
-            )
+        if wants_cursor_pagination(request.query_params):
+            paginator = KeysetPagination()
+        else:
+            paginator = PageNumberPagination()
+        paginated_qs = paginator.paginate_queryset(queryset, request)
+        serializer = UploadedP12Serializer(paginated_qs, many=True, context={'request': request})
 
-        if date_str:
-            from django.utils.dateparse import parse_date
-            parsed_date = parse_date(date_str)
-            if parsed_date:
-                queryset = queryset.filter(uploaded_at__date=parsed_date)
+        return set_validators(paginator.get_paginated_response(serializer.data), etag, last_modified)
 
-        paginator = PageNumberPagination()
-        paginated_qs = paginator.paginate_queryset(queryset.order_by('-uploaded_at'), request)
-        serializer = UploadedP12Serializer(paginated_qs, many=True, context={'request': request})
 
-        return paginator.get_paginated_response(serializer.data)
+class CertCountView(APIView):
+    """
+    Returns the number of certificates matching the list filters (?search=, ?date=, ?date_from=, ?date_to=).
+    Kept apart from the listing so that cursor pages never run COUNT(*); the count is cached
+    per collection version and filters, and may be a planner estimate for the unfiltered list.
+    """
+    use_replica = True
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(name=name, in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+                              description='Тот же фильтр, что и в списке сертификатов')
+            for name in FILTER_PARAMS
+        ],
+        responses={
+            200: openapi.Response(
+                description="Количество сертификатов",
+                examples={"application/json": {"count": 1520, "approximate": False}}
+            )
+        },
+        operation_summary="Количество сертификатов",
+        operation_description="Возвращает количество сертификатов по фильтрам списка; "
+                              "approximate=true означает оценку без точного подсчёта."
+    )
+    def get(self, request):
+        etag, last_modified = listing_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        queryset = filter_certificates(UploadedP12.objects.metadata(), request.query_params)
+        count, approximate = approximate_count(queryset, request.query_params, FILTER_PARAMS)
+        return set_validators(Response({'count': count, 'approximate': approximate}), etag, last_modified)
 
 
 class CertDetailView(APIView):
     """
     Retrieves detailed information about a specific uploaded certificate (.p12 file)
     by its primary key (ID). Returns metadata and optionally the file content.
+    Answers If-None-Match / If-Modified-Since with 304 Not Modified.
     """
+    use_replica = True
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter(
@@ -232,17 +662,25 @@ class CertDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            file_obj = UploadedP12.objects.get(pk=pk)
+            file_obj = UploadedP12.objects.metadata().get(pk=pk)
         except UploadedP12.DoesNotExist:
             return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = metadata_etag(file_obj)
+        response = not_modified(request, etag, file_obj.uploaded_at)
+        if response is not None:
+            return response
         serializer = UploadedP12Serializer(file_obj)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, file_obj.uploaded_at)
 
 
 class FileDownloadView(APIView):
     """
     Download certificate via ID.
+    Supports single byte ranges (Range / If-Range) and offloading to the front proxy.
     """
+    use_replica = True
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter(
@@ -251,6 +689,13 @@ class FileDownloadView(APIView):
                 description='ID сертификата для скачивания',
                 type=openapi.TYPE_INTEGER,
                 required=True
+            ),
+            openapi.Parameter(
+                name='Range',
+                in_=openapi.IN_HEADER,
+                description='Диапазон байт, например bytes=0-1023',
+                type=openapi.TYPE_STRING,
+                required=False
             )
         ],
         responses={
@@ -262,6 +707,7 @@ class FileDownloadView(APIView):
                     }
                 }
             ),
+            206: openapi.Response(description="Часть файла по заголовку Range"),
             404: openapi.Response(
                 description="Сертификат не найден",
                 examples={
@@ -270,16 +716,233 @@ class FileDownloadView(APIView):
                     }
                 }
             ),
+            416: openapi.Response(description="Запрошенный диапазон вне файла"),
         },
         operation_summary="Скачивание сертификата",
         operation_description="Возвращает файл .p12 по заданному ID в виде вложения."
     )
     def get(self, request, pk):
         try:
-            file_obj = UploadedP12.objects.get(pk=pk)
+            file_obj = UploadedP12.objects.metadata().get(pk=pk)
         except UploadedP12.DoesNotExist:
             raise Http404
 
-        file_stream = io.BytesIO(file_obj.file_data)
-        response = FileResponse(file_stream, as_attachment=True, filename=file_obj.filename)
-        return response
\ No newline at end of file
+        return serve_payload(request, file_obj)
+
+
+class CertExportView(APIView):
+    """
+    Streams the certificates matching the list filters (?search=, ?date=, ?date_from=, ...)
+    as one ZIP archive built on the fly, instead of one download request per certificate.
+    """
+    use_replica = True
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(name=name, in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+                              description='Тот же фильтр, что и в списке сертификатов')
+            for name in FILTER_PARAMS
+        ],
+        responses={
+            200: openapi.Response(description="ZIP архив с файлами .p12 (application/zip)")
+        },
+        operation_summary="Экспорт сертификатов",
+        operation_description="Возвращает потоком ZIP архив со всеми сертификатами, подходящими под фильтры списка."
+    )
+    def get(self, request):
+        queryset = filter_certificates(UploadedP12.objects.all(), request.query_params)
+        response = StreamingHttpResponse(export.zip_certificates(queryset), content_type='application/zip')
+        filename = timezone.localtime().strftime('certificates_%Y%m%d_%H%M%S.zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class ExpiringCertificatesView(APIView):
+    """
+    Streams certificates that expire within the next N days (?within=30), soonest first,
+    as NDJSON (default) or CSV (?output=csv).
+    Served from the indexed not_after column; no certificate payload is read or decrypted.
+    """
+    use_replica = True
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='within',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                required=False,
+                description=f'Окно в днях от текущего момента (1–{expiry.MAX_WITHIN_DAYS}, по умолчанию 30)',
+                example=30
+            ),
+            openapi.Parameter(
+                name='output',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=['ndjson', 'csv'],
+                description='Формат ответа: ndjson (по умолчанию) или csv',
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Поток строк NDJSON или CSV",
+                examples={
+                    "application/x-ndjson": {
+                        "id": 1, "filename": "25AB_asan.asanov.p12", "subject_cn": "Asan Asanov",
+                        "subject_o": "MyCompany", "serial_number": "3f1c0a9d2e",
+                        "not_after": "2025-08-01T09:00:00Z", "fingerprint_sha256": "9f86d08..."
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Неверный параметр within",
+                examples={"application/json": {"error": "within должен быть целым числом от 1 до 3650."}}
+            )
+        },
+        operation_summary="Истекающие сертификаты",
+        operation_description="Возвращает потоком сертификаты, срок действия которых истекает в ближайшие N дней."
+    )
+    def get(self, request):
+        try:
+            within = int(request.query_params.get('within', 30))
+        except ValueError:
+            within = 0
+        if not 1 <= within <= expiry.MAX_WITHIN_DAYS:
+            return Response({"error": f"within должен быть целым числом от 1 до {expiry.MAX_WITHIN_DAYS}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        output = request.query_params.get('output', 'ndjson')
+        if output not in expiry.CONTENT_TYPES:
+            output = 'ndjson'
+
+        rows = expiry.expiring(within).iterator(chunk_size=500)
+        response = StreamingHttpResponse(expiry.render_lines(rows, output), content_type=expiry.CONTENT_TYPES[output])
+        if output == 'csv':
+            response['Content-Disposition'] = f'attachment; filename="expiring_{within}d.csv"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class KeyPoolStatsView(APIView):
+    """
+    Returns fill-level metrics of the pool of pre-generated RSA keys.
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Response(
+                description="Состояние пула ключей",
+                examples={
+                    "application/json": {
+                        "target_size": 8,
+                        "size": 6,
+                        "key_size": 2048,
+                        "hits": 120,
+                        "misses": 3,
+                        "generated": 129,
+                        "worker_alive": True
+                    }
+                }
+            )
+        },
+        operation_summary="Пул RSA ключей",
+        operation_description="Возвращает текущий размер пула заранее сгенерированных ключей и счётчики попаданий/промахов."
+    )
+    def get(self, request):
+        return Response(get_key_pool().stats())
+
+
+class IssuanceTimingsView(APIView):
+    """
+    Returns per-stage latency histograms of certificate issuance (keygen, sign, pkcs12, dispatch,
+    blob, db) as JSON: the bereke_issuance_stage_seconds series of /metrics, summed over all workers
+    when METRICS_DIR is set.
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Response(
+                description="Гистограммы времени по этапам выпуска",
+                examples={
+                    "application/json": {
+                        "keygen": {"buckets": [[0.001, 3], [0.0025, 3]], "count": 3, "sum": 0.0021},
+                        "db": {"buckets": [[0.001, 0], [0.0025, 2]], "count": 3, "sum": 0.0061}
+                    }
+                }
+            )
+        },
+        operation_summary="Время выпуска по этапам",
+        operation_description="Возвращает накопленные гистограммы длительности этапов выпуска сертификата."
+    )
+    def get(self, request):
+        order = {name: index for index, name in enumerate(ISSUANCE_STAGES)}
+        return Response({
+            name: {**data, 'buckets': [['+Inf' if bound == float('inf') else bound, count]
+                                       for bound, count in data['buckets']]}
+            for name, data in sorted(metrics.ISSUANCE_STAGE_DURATION.snapshot('stage').items(),
+                                     key=lambda item: (order.get(item[0], len(order)), item[0]))
+        })
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint: request, database, download and issuance metrics of all workers
+    (see metrics.MetricsMiddleware), in the text exposition format.
+    """
+    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    permission_classes = [MetricsAccess]
+    swagger_schema = None
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+class IssuanceJobDetailView(APIView):
+    """
+    Returns the status of a background issuance job and, once it is done,
+    the id and download URL of the created certificate.
+    """
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='pk',
+                in_=openapi.IN_PATH,
+                description='ID задачи выпуска',
+                type=openapi.TYPE_INTEGER,
+                required=True
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Статус задачи",
+                examples={
+                    "application/json": {
+                        "id": 12,
+                        "status": "done",
+                        "result": 41,
+                        "file": "http://localhost:8000/api/download/41/",
+                        "error": "",
+                        "created_at": "2025-07-11T14:21:34Z",
+                        "finished_at": "2025-07-11T14:21:35Z"
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Задача не найдена",
+                examples={"application/json": {"error": "Задача не найдена"}}
+            )
+        },
+        operation_summary="Статус задачи выпуска",
+        operation_description="Возвращает статус фоновой задачи выпуска сертификата (pending, running, done, failed)."
+    )
+    def get(self, request, pk):
+        try:
+            job = IssuanceJob.objects.defer('secret', 'spec').get(pk=pk)
+        except IssuanceJob.DoesNotExist:
+            return Response({"error": "Задача не найдена"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = IssuanceJobSerializer(job, context={'request': request})
+        return Response(serializer.data)
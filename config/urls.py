@@ -2,22 +2,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Certificate API",
-      default_version='v1',
-      description="API for managing .p12 certificates: upload, list, download, delete",
-      contact=openapi.Contact(email="support@example.com"),
-      license=openapi.License(name="MIT License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from bereke_perevod_api.schema import cached_schema, schema_view
+from bereke_perevod_api.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,10 +12,11 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
 
     path('api/', include('bereke_perevod_api.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 
-    # Документация swagger:
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0),
-          name='schema-json'),
+    # Документация swagger: схема собирается один раз и отдаётся из памяти,
+    # страницы UI загружают её по SPEC_URL (собственная схема UI-страниц пустая)
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', cached_schema, name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 